@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+启动导入耗时基准测试
+
+在全新的子进程中以 `python -X importtime` 导入目标模块，解析 stderr 中的导入耗时表，
+报告每个目标的总导入耗时（取多次运行的中位数）以及累计耗时最高的模块，
+用来确认 main.py 启动时没有把 scrapegraphai、playwright 之类的重量级依赖提前导入。
+
+--budget-ms 指定 main 的导入耗时上限，超出时返回非零退出码，可放进 CI。
+
+用法：
+    python -m benchmarks.bench_import_time [--modules main scrapers.smart_scraper] [--repeat 5] [--top 15] [--budget-ms 300]
+"""
+from typing import Dict, List, Optional, Tuple
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["main", "scrapers.NUIST_get_links", "scrapers.aminer_search", "scrapers.smart_scraper"]
+# 启动时不应导入的重量级模块
+HEAVY_MODULES = ("scrapegraphai", "playwright", "langchain", "bs4", "requests")
+
+IMPORT_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str) -> Tuple[Optional[Dict[str, Tuple[int, int]]], str]:
+    """
+    在子进程中导入模块
+
+    返回:
+        ({模块名: (自身耗时us, 累计耗时us)}, 错误信息)；导入失败时前者为 None
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE_RE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    if result.returncode != 0:
+        error_lines = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        return None, error_lines[-1] if error_lines else f"退出码 {result.returncode}"
+    return timings, ""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="启动导入耗时基准测试")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="要测量的模块")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块的测量次数（取中位数）")
+    parser.add_argument("--top", type=int, default=15, help="显示累计耗时最高的前N个模块")
+    parser.add_argument("--budget-ms", type=float, default=None, help="main 的导入耗时上限（毫秒）")
+    args = parser.parse_args(argv)
+
+    exit_code = 0
+    for module in args.modules:
+        runs = []
+        error = ""
+        for _ in range(max(args.repeat, 1)):
+            timings, error = measure_import(module)
+            if timings is None:
+                break
+            runs.append(timings)
+        if not runs:
+            print(f"{module}: 导入失败（{error}）\n")
+            continue
+
+        total_ms = statistics.median(run.get(module, (0, 0))[1] for run in runs) / 1000
+        last = runs[-1]
+        heavy = sorted({name.split(".")[0] for name in last if name.split(".")[0] in HEAVY_MODULES})
+        print(f"{module}: 导入耗时 {total_ms:.1f} ms（{len(runs)} 次中位数），共导入 {len(last)} 个模块"
+              + (f"，包含重量级依赖: {', '.join(heavy)}" if heavy else ""))
+        top = sorted(((name, cumulative) for name, (_, cumulative) in last.items() if name != module),
+                     key=lambda item: -item[1])[:args.top]
+        for name, cumulative in top:
+            print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+        print()
+
+        if module == "main" and args.budget_ms is not None and total_ms > args.budget_ms:
+            print(f"main 导入耗时 {total_ms:.1f} ms 超出预算 {args.budget_ms:.0f} ms")
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+合并吞吐量基准测试
+
+以输出目录中的真实教师数据为学校数据，构造对应的“AMiner数据”（打乱列表顺序、
+改写部分出版物标题大小写、补充工作经历），复制到指定规模后，
+对比原来的 merge_data（出版物按 DOI 或“标题_年份”精确键去重）与当前 merge_data（近似去重）
+逐条合并的吞吐量（条/秒）。两种方式交替运行、各取最快一次，当前实现每次运行前清空年份解析、
+标题归一化等缓存；同时校验出版物以外的字段结果一致，并给出两种方式保留的出版物总数
+（近似去重不会像精确键那样把 DOI 为 NA 的不同论文合并为一篇，保留的条数可能不同）。
+
+用法：
+    python -m benchmarks.bench_merge [--data-dir NUIST_teacher_data] [--sizes 1000 10000 50000]
+"""
+from typing import Callable, Dict, List, Tuple
+import argparse
+import copy
+import gc
+import json
+import logging
+import os
+import random
+import re
+import time
+
+from utils.merge_data import merge_data, _extract_year_cached
+from utils import pub_dedup
+
+
+def load_records(data_dir: str) -> List[Dict]:
+    """读取输出目录中的教师数据"""
+    records = []
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.endswith('.json'):
+            with open(os.path.join(data_dir, filename), 'r', encoding='utf-8') as f:
+                records.append(json.load(f))
+    return records
+
+
+def make_aminer_variant(record: Dict, rng: random.Random) -> Dict:
+    """根据学校数据构造一份有差异的AMiner数据"""
+    variant = copy.deepcopy(record)
+    basic_info = variant.get('basic_info') or {}
+    for field in ('title', 'honors'):
+        if isinstance(basic_info.get(field), list):
+            rng.shuffle(basic_info[field])
+    bio_details = variant.get('bio_details') or {}
+    work_experience = bio_details.get('work_experience')
+    if isinstance(work_experience, list):
+        rng.shuffle(work_experience)
+        work_experience.append(f"{rng.randint(1990, 2024)}-至今 某研究所 研究员")
+    academic = variant.get('academic') or {}
+    for pub in academic.get('publications') or []:
+        if isinstance(pub, dict) and isinstance(pub.get('title_en'), str) and rng.random() < 0.5:
+            pub['title_en'] = pub['title_en'].upper()
+    variant['data_sources'] = {"aminer_url": "https://www.aminer.cn/profile/example"}
+    return variant
+
+
+def make_pairs(records: List[Dict], size: int, seed: int = 0) -> List[Tuple[Dict, Dict]]:
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(size):
+        record = records[i % len(records)]
+        pairs.append((record, make_aminer_variant(record, rng)))
+    return pairs
+
+
+# --- 原来的 merge_data（基线） ---
+
+def _baseline_list(school_list, aminer_list) -> List:
+    merged_set = set(item for item in (school_list if isinstance(school_list, list) else []) if item)
+    merged_set.update(item for item in (aminer_list if isinstance(aminer_list, list) else []) if item)
+    return sorted(list(merged_set))
+
+
+def _baseline_single(school_val, aminer_val, default=''):
+    if school_val is not None and school_val != '':
+        return school_val
+    if aminer_val is not None and aminer_val != '':
+        return aminer_val
+    return default
+
+
+def _baseline_year(experience_str) -> int:
+    if not isinstance(experience_str, str):
+        return 9999
+    match = re.search(r'^(\d{4})', experience_str)
+    if match:
+        return int(match.group(1))
+    match = re.search(r'^(\d{4})\.', experience_str)
+    if match:
+        return int(match.group(1))
+    return 9999
+
+
+def _baseline_publications(school_pubs, aminer_pubs) -> List:
+    merged_pubs_dict = {}
+    for pubs in (aminer_pubs, school_pubs):
+        for pub in pubs if isinstance(pubs, list) else []:
+            if not isinstance(pub, dict):
+                continue
+            key = pub.get('DOI') or f"{pub.get('title_en', pub.get('title_cn', 'NoTitle'))}_{pub.get('year', 'NoYear')}"
+            key = "".join(str(key).split()).lower()
+            if key not in merged_pubs_dict and (pub.get('title_en') or pub.get('title_cn') or pub.get('DOI')):
+                merged_pubs_dict[key] = pub
+
+    def get_pub_year(p):
+        year = p.get('year')
+        if isinstance(year, (int, float)):
+            return int(year)
+        if isinstance(year, str) and year.isdigit():
+            return int(year)
+        return 0
+
+    final_pubs = list(merged_pubs_dict.values())
+    try:
+        final_pubs.sort(key=get_pub_year, reverse=True)
+    except Exception as e:
+        logging.warning(f"出版物按年份排序时出现错误: {e}")
+    return final_pubs
+
+
+def baseline_merge_data(school_data: Dict, aminer_data: Dict) -> Dict:
+    """原来的做法：与当前 merge_data 相同的字段合并规则，出版物按精确键去重，没有缓存"""
+    sd, ad = school_data or {}, aminer_data or {}
+    sb, ab = sd.get('basic_info') or {}, ad.get('basic_info') or {}
+    sbio, abio = sd.get('bio_details') or {}, ad.get('bio_details') or {}
+    se, ae = sbio.get('education') or {}, abio.get('education') or {}
+    sa, aa = sd.get('academic') or {}, ad.get('academic') or {}
+
+    education = {field: _baseline_single(se.get(field), ae.get(field)) for field in ('undergrad', 'master', 'phd')}
+    work_experience = _baseline_list(sbio.get('work_experience'), abio.get('work_experience'))
+    try:
+        work_experience.sort(key=_baseline_year)
+    except Exception as e:
+        logging.warning(f"工作经历排序时出现错误: {e}")
+
+    merged_data = {
+        'basic_info': {
+            'name': _baseline_single(sb.get('name'), ab.get('name')),
+            'admin_role': _baseline_single(sb.get('admin_role'), ab.get('admin_role')),
+            'title': _baseline_list(sb.get('title'), ab.get('title')),
+            'mentor_qualification': _baseline_list(sb.get('mentor_qualification'), ab.get('mentor_qualification')),
+            'honors': _baseline_list(sb.get('honors'), ab.get('honors')),
+        },
+        'bio_details': {
+            'birth_year': _baseline_single(sbio.get('birth_year'), abio.get('birth_year')),
+            'education': education if any(education.values()) else {},
+            'work_experience': work_experience,
+        },
+        'likes': sd.get('likes', 0),
+        'academic': {
+            'research_fields': _baseline_list(sa.get('research_fields'), aa.get('research_fields')),
+            'publications': _baseline_publications(sa.get('publications'), aa.get('publications')),
+        },
+        'data_sources': {},
+    }
+    if sd.get('data_sources'):
+        merged_data['data_sources'].update(sd['data_sources'])
+    if ad.get('data_sources'):
+        merged_data['data_sources'].update(ad['data_sources'])
+    return merged_data
+
+
+def clear_caches() -> None:
+    """清空当前实现的各级缓存，保证每次都从冷缓存开始计时"""
+    _extract_year_cached.cache_clear()
+    pub_dedup._normalize_title_str.cache_clear()
+    pub_dedup._normalize_doi_str.cache_clear()
+    pub_dedup._cached_shingles.cache_clear()
+    pub_dedup._cached_signature.cache_clear()
+    pub_dedup._cached_bands.cache_clear()
+
+
+def without_publications(merged: Dict) -> Dict:
+    """去掉出版物列表，用于比较其余字段"""
+    return {**merged, 'academic': {**merged['academic'], 'publications': None}}
+
+
+def compare(funcs: List[Callable[[], List[Dict]]], repeat: int) -> Tuple[List[float], List[List[Dict]]]:
+    """
+    交替运行各个函数 repeat 轮，分别取最快一次的耗时（减少机器负载波动的影响）
+
+    计时期间关闭循环垃圾回收（与 timeit 相同），避免已保存的大量合并结果拖慢后运行的一方
+    """
+    best, results = [float("inf")] * len(funcs), [None] * len(funcs)
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            clear_caches()
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                results[i] = func()
+                best[i] = min(best[i], time.perf_counter() - start)
+            finally:
+                gc.enable()
+    return best, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="合并吞吐量基准测试")
+    parser.add_argument("--data-dir", default="NUIST_teacher_data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = load_records(args.data_dir)
+    print(f"{'条数':>8} {'原来(条/秒)':>12} {'当前(条/秒)':>12} {'当前/原来':>9} {'其余字段一致':>12} "
+          f"{'原来保留论文':>12} {'当前保留论文':>12}")
+    for size in args.sizes:
+        pairs = make_pairs(records, size)
+        (baseline_elapsed, current_elapsed), (baseline, current) = compare(
+            [lambda: [baseline_merge_data(school, aminer) for school, aminer in pairs],
+             lambda: [merge_data(school, aminer) for school, aminer in pairs]],
+            args.repeat)
+        same = all(without_publications(a) == without_publications(b) for a, b in zip(baseline, current))
+        baseline_pubs = sum(len(merged['academic']['publications']) for merged in baseline)
+        current_pubs = sum(len(merged['academic']['publications']) for merged in current)
+        print(f"{size:>8} {size / baseline_elapsed:>12.0f} {size / current_elapsed:>12.0f} "
+              f"{baseline_elapsed / current_elapsed:>9.2f} {str(same):>12} {baseline_pubs:>12} {current_pubs:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+机构别名匹配基准测试
+
+用一组典型的 AMiner 机构文本（复制到指定规模），对比原来逐个别名转小写做子串查找的方式
+与 utils.org_match.OrgTable 编译后的正则：
+- 吞吐量：每秒判断的 (机构文本, 目标机构) 对数。正则需要先规范化文本，单次判断比子串查找慢，
+  但两者都在微秒级，一页最多20条结果，远小于一次页面请求；减少的是翻页次数（见运行指标 aminer_search_pages）
+- 结果差异：两种方式判断不一致的机构文本（例如 "Nanjing University" 命中南信大的英文全称）
+并列出输出目录中门户姓名清理后的搜索词，检查截断姓名的处理。
+最后用模拟的搜索结果检查 AMinerClient.find_profile_url 不会采用姓名不符的同单位教师。
+
+用法：
+    python -m benchmarks.bench_org_match [--data-dir NUIST_teacher_data] [--size 100000] [--repeat 3]
+"""
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import time
+
+from utils.org_match import ORG_MAPPING_PATH, NameMatcher, OrgTable
+
+SAMPLE_AFFILIATIONS = [
+    "School of Atmospheric Sciences, Nanjing University of Information Science & Technology, Nanjing 210044, China",
+    "Nanjing University of Information Science and Technology",
+    "南京信息工程大学大气科学学院",
+    "School of Atmospheric Sciences, Nanjing University, Nanjing, China",
+    "南京大学大气科学学院",
+    "Nanjing University of Posts and Telecommunications (NJUPT)",
+    "NUIST",
+    "Key Laboratory of Meteorological Disaster, Ministry of Education, NUIST, Nanjing",
+    "Institute of Atmospheric Physics, Chinese Academy of Sciences",
+    "Peking University",
+    "Department of Atmospheric Sciences, University of Washington, Seattle",
+    "",
+]
+
+
+def substring_match(mapping: Dict[str, List[str]]) -> Callable[[str, str], bool]:
+    """原来的做法：目标机构的每个别名转小写后在机构文本中做子串查找"""
+    def match(text: str, org: str) -> bool:
+        lowered = text.lower()
+        return any(alias.lower() in lowered for alias in mapping.get(org, [org]))
+    return match
+
+
+def check_colleague_not_taken() -> None:
+    """第0页只有同单位的 陈海，第1页才是 陈海山 本人：应当继续翻页找到本人，而不是返回同事"""
+    from scrapers.aminer_client import AMinerClient, PAGE_SIZE
+
+    nuist = {"affiliation": "Nanjing University of Information Science & Technology"}
+    others = [{"id": f"other{i}", "name_zh": f"李{i}", "profile": {"affiliation": "Peking University"}}
+              for i in range(PAGE_SIZE - 1)]
+    pages = {
+        0: [{"id": "colleague", "name_zh": "陈海", "profile": nuist}] + others,
+        1: [{"id": "target", "name_zh": "陈海山", "profile": nuist}],
+    }
+    client = AMinerClient.__new__(AMinerClient)
+    client.search_person = lambda query, page=0: pages.get(page, [])
+    url = client.find_profile_url(NameMatcher("陈海山"), "南京信息工程大学")
+    assert url.endswith("/target"), f"采用了错误的候选: {url!r}"
+    # 只有同事时不采用任何人
+    pages.pop(1)
+    url = client.find_profile_url(NameMatcher("陈海山"), "南京信息工程大学")
+    assert url == "", f"采用了姓名不符的候选: {url!r}"
+    print("\n同单位姓名不符的候选不会被采用：通过")
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="机构别名匹配基准测试")
+    parser.add_argument("--data-dir", default="NUIST_teacher_data")
+    parser.add_argument("--mapping", default=ORG_MAPPING_PATH)
+    parser.add_argument("--size", type=int, default=100000, help="判断次数")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.mapping, "r", encoding="utf-8") as f:
+        mapping = json.load(f)
+    orgs = list(mapping)
+    pairs = [(SAMPLE_AFFILIATIONS[i % len(SAMPLE_AFFILIATIONS)], orgs[i % len(orgs)]) for i in range(args.size)]
+    old = substring_match(mapping)
+    table = OrgTable(mapping)
+
+    print(f"{'方式':<16} {'次/秒':>12}")
+    for name, match in [("逐个别名子串", old), ("编译后的正则", table.matches)]:
+        elapsed = best_of(lambda: [match(text, org) for text, org in pairs], args.repeat)
+        print(f"{name:<16} {args.size / elapsed:>12.0f}")
+
+    print("\n判断不一致的机构文本：")
+    for text in SAMPLE_AFFILIATIONS:
+        for org in orgs:
+            if old(text, org) != table.matches(text, org):
+                print(f"  {org}: 子串查找 {old(text, org)}，正则 {table.matches(text, org)}  ← {text!r}")
+
+    if os.path.isdir(args.data_dir):
+        print(f"\n{args.data_dir} 中非中文姓名的搜索词：")
+        for filename in sorted(os.listdir(args.data_dir)):
+            name = os.path.splitext(filename)[0]
+            if not filename.endswith(".json"):
+                continue
+            matcher = NameMatcher(name)
+            if matcher.queries != [name]:
+                print(f"  {name!r:<24} → 搜索词 {matcher.queries}{'（前缀匹配）' if matcher.prefix else ''}")
+
+    check_colleague_not_taken()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+提示词前缀基准测试
+
+离线（默认）：对比各提示词变体（scrapers.smart_scraper.PROMPTS）的字符数、UTF-8字节数和token数
+（安装了 tiktoken 时用 cl100k_base 估算，与 DeepSeek 的分词器不完全一致，只用于相对比较），
+并检查两次不同网页的请求是否以完全相同的提示词开头（即提示词可以作为缓存前缀）。
+
+在线（--live）：直接以流式方式调用 DeepSeek 的 chat/completions 接口，
+每个变体连续请求 --repeat 次（每次的网页内容不同，只有提示词相同），记录：
+- 首个token时间（TTFT）和总耗时：ScrapeGraphAI 不使用流式输出，流水线中无法测得 TTFT
+- prompt_tokens 以及 prompt_cache_hit_tokens / prompt_cache_miss_tokens：第二次起命中的前缀缓存
+需要 requests 和 DEEPSEEK_API_KEY 环境变量（或 smart_scraper.graph_config 中的 api_key）。
+
+用法：
+    python -m benchmarks.bench_prompt_prefix
+    python -m benchmarks.bench_prompt_prefix --live --url https://faculty.nuist.edu.cn/jaewonchoi/zh_CN/index.htm --repeat 3
+"""
+from typing import Dict, List, Optional
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+from scrapers.smart_scraper import PROMPTS, graph_config
+
+API_URL = "https://api.deepseek.com/chat/completions"
+MODEL = "deepseek-chat"
+# 发送给模型的网页正文上限（字符）
+MAX_CONTENT_CHARS = 12000
+
+_TAG_RE = re.compile(r"<script.*?</script>|<style.*?</style>|<[^>]+>", re.S | re.I)
+
+
+def build_message(prompt: str, content: str, request_id: int) -> str:
+    """与 ScrapeGraphAI 一致的顺序：固定的指令在前，每次不同的网页内容在后"""
+    return f"{prompt}\n\n[请求 {request_id}]\n网页内容：\n{content}"
+
+
+def count_tokens(text: str) -> Optional[int]:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def offline_report() -> None:
+    print(f"{'变体':<10} {'字符':>6} {'字节':>6} {'行数':>5} {'token(估算)':>12} {'前缀稳定':>8}  sha1")
+    for name, prompt in PROMPTS.items():
+        first = build_message(prompt, "<html>教师A</html>", 1)
+        second = build_message(prompt, "<html>教师B的主页</html>", 2)
+        shared = len(os.path.commonprefix([first, second]))
+        tokens = count_tokens(prompt)
+        print(f"{name:<10} {len(prompt):>6} {len(prompt.encode('utf-8')):>6} {prompt.count(chr(10)) + 1:>5} "
+              f"{tokens if tokens is not None else '-':>12} {str(shared >= len(prompt)):>8}  "
+              f"{hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]}")
+
+
+def fetch_page_text(url: str) -> str:
+    """下载网页并粗略去掉标签（只用于测量，不追求抽取质量）"""
+    import requests
+    response = requests.get(url, headers=graph_config.get("headers"), timeout=30)
+    response.encoding = response.apparent_encoding
+    return " ".join(_TAG_RE.sub(" ", response.text).split())[:MAX_CONTENT_CHARS]
+
+
+def stream_completion(api_key: str, message: str) -> Dict[str, float]:
+    """流式请求一次，返回 TTFT、总耗时和 usage 中的token数"""
+    import requests
+    payload = {"model": MODEL, "messages": [{"role": "user", "content": message}], "stream": True,
+               "stream_options": {"include_usage": True}, "temperature": 0}
+    start = time.perf_counter()
+    ttft = None
+    usage: Dict = {}
+    with requests.post(API_URL, json=payload, stream=True, timeout=300,
+                       headers={"Authorization": f"Bearer {api_key}"}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if ttft is None and any((choice.get("delta") or {}).get("content") for choice in chunk.get("choices", [])):
+                ttft = time.perf_counter() - start
+            usage = chunk.get("usage") or usage
+    return {"ttft": ttft or 0.0, "total": time.perf_counter() - start,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "cache_hit": usage.get("prompt_cache_hit_tokens", 0),
+            "cache_miss": usage.get("prompt_cache_miss_tokens", 0)}
+
+
+def live_report(urls: List[str], repeat: int, variants: List[str]) -> None:
+    api_key = os.environ.get("DEEPSEEK_API_KEY") or graph_config["llm"].get("api_key")
+    if not api_key:
+        raise SystemExit("需要设置 DEEPSEEK_API_KEY 环境变量或 graph_config 中的 api_key")
+    pages = [fetch_page_text(url) for url in urls]
+    print(f"\n{'变体':<10} {'次序':>4} {'输入token':>10} {'缓存命中':>8} {'未命中':>8} {'TTFT':>8} {'总耗时':>8}")
+    request_id = 0
+    for name in variants:
+        for i in range(repeat):
+            request_id += 1
+            result = stream_completion(api_key, build_message(PROMPTS[name], pages[i % len(pages)], request_id))
+            print(f"{name:<10} {i + 1:>4} {result['prompt_tokens']:>10} {result['cache_hit']:>8} "
+                  f"{result['cache_miss']:>8} {result['ttft']:>7.2f}s {result['total']:>7.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="提示词前缀基准测试")
+    parser.add_argument("--live", action="store_true", help="调用 DeepSeek API 测量 TTFT 和前缀缓存命中")
+    parser.add_argument("--url", action="append", default=None, help="测试用的教师主页（可指定多个，轮流使用）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个变体的请求次数")
+    parser.add_argument("--variants", nargs="+", default=list(PROMPTS), choices=list(PROMPTS))
+    args = parser.parse_args()
+
+    offline_report()
+    if args.live:
+        live_report(args.url or ["https://faculty.nuist.edu.cn/jaewonchoi/zh_CN/index.htm"], args.repeat,
+                    args.variants)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+出版物模糊去重基准测试
+
+生成大规模合成出版物列表（含标点、大小写、空格差异和缺失DOI的重复条目），
+对比 PublicationIndex（MinHash + LSH）与逐对比较的耗时，并统计去重的召回率和准确率。
+另外生成一批 Jaccard 相似度刚好在阈值附近（[0.8, 0.9)）的标题对，检查 LSH 模式与逐条校验模式的判定一致。
+
+用法：
+    python -m benchmarks.bench_pub_dedup [--sizes 1000 10000 100000] [--near-pairs 300]
+"""
+from typing import Dict, List, Tuple
+import argparse
+import random
+import string
+import time
+
+from utils.pub_dedup import (PublicationIndex, normalize_doi, normalize_title, shingles, jaccard, DEFAULT_THRESHOLD,
+                             NUM_BUCKETS, NUM_BANDS)
+
+WORDS = [
+    "precipitation", "monsoon", "climate", "variability", "summer", "winter", "east", "asian", "tropical",
+    "cyclone", "soil", "moisture", "land", "surface", "model", "simulation", "prediction", "extended",
+    "range", "impact", "snow", "cover", "ocean", "temperature", "anomaly", "radar", "convective", "storm",
+    "aerosol", "boundary", "layer", "machine", "learning", "ensemble", "drought", "heatwave", "urban",
+    "typhoon", "rainfall", "satellite", "retrieval", "assimilation", "pacific", "indian", "tibetan", "plateau",
+]
+
+
+def _perturb(title: str, rng: random.Random) -> str:
+    """模拟不同来源的标题差异：大小写、标点、空格"""
+    choice = rng.randrange(4)
+    if choice == 0:
+        return title.upper()
+    if choice == 1:
+        return title.replace(" ", "-", 1) + "."
+    if choice == 2:
+        return "  ".join(title.split())
+    return title.title()
+
+
+def make_publications(n: int, duplicate_ratio: float = 0.3, seed: int = 42) -> Tuple[List[Dict], List[int]]:
+    """生成 n 条出版物及其真实分组编号"""
+    rng = random.Random(seed)
+    pubs, labels = [], []
+    originals = []
+    while len(pubs) < n:
+        if originals and rng.random() < duplicate_ratio:
+            label = rng.randrange(len(originals))
+            base = originals[label]
+            pub = {
+                "title_en": _perturb(base["title_en"], rng),
+                "year": base["year"],
+                "journal": base["journal"],
+                "DOI": base["DOI"] if rng.random() < 0.3 else "",
+            }
+        else:
+            label = len(originals)
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14)))
+            pub = {
+                "title_en": title,
+                "year": rng.randint(2000, 2025),
+                "journal": "Journal of " + rng.choice(WORDS).title(),
+                "DOI": "10.%04d/%s" % (rng.randint(1000, 9999), "".join(rng.choices(string.ascii_lowercase, k=8)))
+                       if rng.random() < 0.6 else "",
+            }
+            originals.append(pub)
+        pubs.append(pub)
+        labels.append(label)
+    return pubs, labels
+
+
+def run_index(pubs: List[Dict]) -> Tuple[List[int], float, int]:
+    """使用索引去重，返回每条的分组编号、耗时和候选校验次数"""
+    index = PublicationIndex()
+    start = time.perf_counter()
+    assigned = [index.add_or_match(pub)[0] for pub in pubs]
+    return assigned, time.perf_counter() - start, index.comparisons
+
+
+def run_pairwise(pubs: List[Dict]) -> Tuple[List[int], float]:
+    """逐对比较的基线实现"""
+    start = time.perf_counter()
+    kept: List[Tuple[str, object, int]] = []
+    assigned = []
+    for pub in pubs:
+        doi = normalize_doi(pub.get("DOI"))
+        shingle_set = shingles(normalize_title(pub.get("title_en")))
+        match = None
+        for kept_id, (kept_doi, kept_shingles, kept_year) in enumerate(kept):
+            if doi and kept_doi:
+                if doi == kept_doi:
+                    match = kept_id
+                    break
+                continue
+            if abs(kept_year - pub["year"]) <= 1 and jaccard(shingle_set, kept_shingles) >= DEFAULT_THRESHOLD:
+                match = kept_id
+                break
+        if match is None:
+            match = len(kept)
+            kept.append((doi, shingle_set, pub["year"]))
+        assigned.append(match)
+    return assigned, time.perf_counter() - start
+
+
+def make_near_threshold_pairs(n: int, upper: float = 0.9, seed: int = 7) -> List[Tuple[Dict, Dict, float]]:
+    """生成 n 对标题 Jaccard 相似度在 [DEFAULT_THRESHOLD, upper) 之间的出版物（随机替换一到两个单词）"""
+    rng = random.Random(seed)
+    pairs = []
+    while len(pairs) < n:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(10, 16))]
+        variant = list(words)
+        for _ in range(rng.randint(1, 2)):
+            variant[rng.randrange(len(variant))] = rng.choice(WORDS)
+        title, other_title = " ".join(words), " ".join(variant)
+        similarity = jaccard(shingles(normalize_title(title)), shingles(normalize_title(other_title)))
+        if DEFAULT_THRESHOLD <= similarity < upper:
+            year = rng.randint(2000, 2025)
+            pairs.append(({"title_en": title, "year": year}, {"title_en": other_title, "year": year}, similarity))
+    return pairs
+
+
+def check_near_threshold(pairs: List[Tuple[Dict, Dict, float]]) -> None:
+    """阈值附近的标题对：LSH 模式与逐条校验模式找到的重复条目应当一致"""
+    pairwise = PublicationIndex(small_limit=len(pairs) + 1)
+    lsh = PublicationIndex(small_limit=0)
+    for pub, _, _ in pairs:
+        pairwise.add_or_match(pub)
+        lsh.add_or_match(pub)
+    pairwise_found = [pairwise.find(other) for _, other, _ in pairs]
+    lsh_found = [lsh.find(other) for _, other, _ in pairs]
+    agree = sum(a == b for a, b in zip(pairwise_found, lsh_found))
+    rows = NUM_BUCKETS // NUM_BANDS
+    expected = 1 - (1 - DEFAULT_THRESHOLD ** rows) ** NUM_BANDS
+    print(f"阈值附近 {len(pairs)} 对（Jaccard ∈ [{DEFAULT_THRESHOLD}, 0.9)）：逐条校验合并 "
+          f"{sum(found == i for i, found in enumerate(pairwise_found))} 对，LSH 合并 "
+          f"{sum(found == i for i, found in enumerate(lsh_found))} 对，一致 {agree} 对"
+          f"（{NUM_BANDS}段×{rows}行，相似度 {DEFAULT_THRESHOLD} 时成为候选的概率 {expected:.3f}）")
+    # LSH 是概率索引（字符串哈希随进程变化），允许极少数贴近阈值的标题对漏检
+    assert agree >= 0.99 * len(pairs), "LSH 与逐条校验在阈值附近的判定不一致"
+
+
+def pair_quality(assigned: List[int], labels: List[int]) -> Tuple[float, float]:
+    """以“与首条同组”为判定，计算重复条目的召回率和准确率"""
+    first_by_label: Dict[int, int] = {}
+    first_by_assigned: Dict[int, int] = {}
+    true_dup = predicted_dup = correct = 0
+    for i, (assigned_id, label) in enumerate(zip(assigned, labels)):
+        is_true = label in first_by_label
+        is_pred = assigned_id in first_by_assigned
+        true_dup += is_true
+        predicted_dup += is_pred
+        if is_true and is_pred and labels[first_by_assigned[assigned_id]] == label:
+            correct += 1
+        first_by_label.setdefault(label, i)
+        first_by_assigned.setdefault(assigned_id, i)
+    recall = correct / true_dup if true_dup else 1.0
+    precision = correct / predicted_dup if predicted_dup else 1.0
+    return recall, precision
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="出版物模糊去重基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pairwise-limit", type=int, default=5000, help="超过该规模不运行逐对比较基线")
+    parser.add_argument("--near-pairs", type=int, default=300, help="阈值附近一致性检查的标题对数")
+    args = parser.parse_args()
+
+    check_near_threshold(make_near_threshold_pairs(args.near_pairs))
+
+    print(f"{'条数':>8} {'索引耗时(s)':>12} {'条/秒':>10} {'候选校验':>10} {'召回率':>8} {'准确率':>8} {'逐对耗时(s)':>12}")
+    for size in args.sizes:
+        pubs, labels = make_publications(size)
+        assigned, elapsed, comparisons = run_index(pubs)
+        recall, precision = pair_quality(assigned, labels)
+        pairwise = "-"
+        if size <= args.pairwise_limit:
+            _, pairwise_elapsed = run_pairwise(pubs)
+            pairwise = f"{pairwise_elapsed:.3f}"
+        print(f"{size:>8} {elapsed:>12.3f} {size / elapsed:>10.0f} {comparisons:>10} "
+              f"{recall:>8.3f} {precision:>8.3f} {pairwise:>12}")
+
+
+if __name__ == "__main__":
+    main()
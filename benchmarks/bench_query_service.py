@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询服务压测脚本
+
+在子进程中启动 utils.query_service（或使用 --url 指定已运行的服务），
+多个客户端线程通过长连接循环发送一组典型查询，报告每秒请求数和延迟分位数。
+--etag 时客户端会带上 If-None-Match，用于衡量 304 缓存命中时的吞吐量。
+
+用法：
+    python -m benchmarks.bench_query_service [--data-dir NUIST_teacher_data] [--clients 8] [--duration 10] [--etag]
+    python -m benchmarks.bench_query_service --url http://127.0.0.1:8765
+"""
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+import argparse
+import http.client
+import multiprocessing
+import socket
+import threading
+import time
+
+QUERIES = [
+    "/teachers",
+    "/teachers?title=" + quote("教授") + "&sort=likes",
+    "/teachers?mentor=" + quote("博导") + "&birth_from=1975&birth_to=1989",
+    "/teachers?field=" + quote("陆气相互作用"),
+    "/teachers?field=" + quote("台风") + "&page=1&page_size=5",
+    "/teachers?field=climate",
+    "/teachers?title=" + quote("副教授") + "&page=2&page_size=10",
+    "/teachers/" + quote("郭栋"),
+    "/stats",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_server(data_dir: str, port: int) -> None:
+    from utils.query_service import serve
+    serve([data_dir], port=port, reload_interval=0)
+
+
+def _wait_ready(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/stats")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("查询服务未能在规定时间内启动")
+
+
+def _client(host: str, port: int, deadline: float, use_etag: bool, offset: int,
+            latencies: List[float], statuses: Dict[int, int], lock: threading.Lock) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    etags: Dict[str, str] = {}
+    local_latencies, local_statuses = [], {}
+    i = offset
+    while time.perf_counter() < deadline:
+        path = QUERIES[i % len(QUERIES)]
+        i += 1
+        headers = {"If-None-Match": etags[path]} if use_etag and path in etags else {}
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        local_latencies.append(time.perf_counter() - start)
+        local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+        if response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        for status, count in local_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+
+def run_load(host: str, port: int, clients: int, duration: float, use_etag: bool) -> Tuple[int, float, List[float], Dict[int, int]]:
+    """运行压测，返回 (请求数, 实际耗时, 延迟列表, 各状态码数量)"""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+    threads = [threading.Thread(target=_client, args=(host, port, deadline, use_etag, i, latencies, statuses, lock))
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), time.perf_counter() - start, latencies, statuses
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="查询服务压测")
+    parser.add_argument("--data-dir", default="NUIST_teacher_data", help="未指定 --url 时用于启动服务的数据目录")
+    parser.add_argument("--url", default=None, help="已运行的服务地址，如 http://127.0.0.1:8765")
+    parser.add_argument("--clients", type=int, default=8, help="并发客户端数")
+    parser.add_argument("--duration", type=float, default=10.0, help="压测时长（秒）")
+    parser.add_argument("--etag", action="store_true", help="带 If-None-Match 请求头（测试304路径）")
+    args = parser.parse_args(argv)
+
+    server_process = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = "127.0.0.1", _free_port()
+        server_process = multiprocessing.Process(target=_run_server, args=(args.data_dir, port), daemon=True)
+        server_process.start()
+    try:
+        _wait_ready(host, port)
+        count, elapsed, latencies, statuses = run_load(host, port, args.clients, args.duration, args.etag)
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.join()
+
+    latencies.sort()
+    print(f"客户端数: {args.clients}，时长: {elapsed:.1f} 秒，请求数: {count}")
+    print(f"吞吐量: {count / elapsed:.0f} 请求/秒")
+    print(f"延迟: p50 {_percentile(latencies, 0.5) * 1000:.2f} ms，"
+          f"p99 {_percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"状态码: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+记录模型基准测试
+
+以输出目录中的真实教师数据为样本，复制到指定规模（每条记录都从原始字节重新解析，
+不共享对象，与分别加载多个学校的数据时一致），对比普通字典与 utils.record_model.TeacherRecord：
+- 内存：tracemalloc 统计加载后仍存活的内存，折算为每万条记录的占用
+- 吞吐量：解析（bytes → 对象）与序列化（对象 → bytes）每秒处理的记录数
+并校验 TeacherRecord 转回字典后与原始数据完全一致。
+
+用法：
+    python -m benchmarks.bench_record_model [--data-dir NUIST_teacher_data] [--size 10000] [--repeat 3]
+"""
+from typing import Callable, List, Tuple
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from utils import record_model
+from utils.record_model import TeacherRecord
+
+
+def load_raw(data_dir: str) -> List[bytes]:
+    """读取输出目录中教师JSON文件的原始字节"""
+    raws = []
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.endswith('.json'):
+            with open(os.path.join(data_dir, filename), 'rb') as f:
+                raws.append(f.read())
+    return raws
+
+
+def measure_memory(build: Callable[[], list]) -> Tuple[int, list]:
+    """构建对象列表后仍存活的内存（字节）"""
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, objects
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="记录模型基准测试")
+    parser.add_argument("--data-dir", default="NUIST_teacher_data")
+    parser.add_argument("--size", type=int, default=10000, help="记录条数")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = load_raw(args.data_dir)
+    raws = [samples[i % len(samples)] for i in range(args.size)]
+    orjson = record_model.orjson
+    print(f"{len(samples)} 条样本复制到 {args.size} 条，orjson: {'已安装' if orjson else '未安装（使用标准库json）'}")
+
+    # 内存
+    variants = [("dict（json）", lambda: [json.loads(raw) for raw in raws])]
+    if orjson:
+        variants.append(("dict（orjson）", lambda: [orjson.loads(raw) for raw in raws]))
+    variants.append(("TeacherRecord", lambda: [TeacherRecord.from_json(raw) for raw in raws]))
+    print(f"\n{'表示':<16} {'内存/万条':>12} {'相对dict(json)':>16}")
+    baseline = None
+    for name, build in variants:
+        used, objects = measure_memory(build)
+        per_10k = used / len(objects) * 10000
+        baseline = baseline or per_10k
+        print(f"{name:<16} {per_10k / 1024 / 1024:>10.1f}MB {per_10k / baseline:>15.0%}")
+        del objects
+
+    # 吞吐量
+    dicts = [json.loads(raw) for raw in raws]
+    records = [TeacherRecord.from_json(raw) for raw in raws]
+    assert all(record.to_dict() == data for record, data in zip(records, dicts)), "转换结果与原始数据不一致"
+
+    rows = [
+        ("解析", "json.loads → dict", lambda: [json.loads(raw) for raw in raws]),
+        ("解析", "TeacherRecord.from_json", lambda: [TeacherRecord.from_json(raw) for raw in raws]),
+        ("序列化", "json.dumps(dict)", lambda: [json.dumps(data, ensure_ascii=False).encode("utf-8") for data in dicts]),
+        ("序列化", "TeacherRecord.to_json", lambda: [record.to_json() for record in records]),
+    ]
+    if orjson:
+        rows.insert(1, ("解析", "orjson.loads → dict", lambda: [orjson.loads(raw) for raw in raws]))
+        rows.insert(4, ("序列化", "orjson.dumps(dict)", lambda: [orjson.dumps(data) for data in dicts]))
+    print(f"\n{'操作':<6} {'方式':<26} {'条/秒':>12}")
+    for operation, name, func in rows:
+        elapsed = best_of(func, args.repeat)
+        print(f"{operation:<6} {name:<26} {args.size / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
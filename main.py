@@ -5,76 +5,60 @@
 教师信息分析系统主程序
 
 该模块是系统的入口点，负责从学校教师门户获取所有教师信息，并转换为结构化JSON文件。
+
+用法：
+    python main.py [--school 南京信息工程大学] [--output-dir NUIST_teacher_data] [--limit 5]
+                   [--force-aminer] [--no-headless] [--workers 4] [--dry-run] [--profile school_scrape merge]
+                   [--shard 0/3] [--queue /shared/work.db] [--store segments [--compress]]
+                   [--time-budget 8h] [--priority new=100,quality=50,likes=10] [--prompt compact]
+
+爬虫模块依赖的 scrapegraphai（LLM/langchain）和 playwright 导入很慢，
+只在第一次真正需要爬取时才导入：只列出教师或续跑时几乎全部跳过的情况下不会加载它们。
 """
-import json
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import argparse
 import os
 import time
-import certifi
 import logging
 
-# 环境变量设置
-os.environ['SSL_CERT_FILE'] = certifi.where()
-os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
-
-# 导入爬虫模块
-from scrapers.NUIST_get_links import NUISTScraper # 南信大爬虫
-from scrapers.smart_scraper import scrape_profile
-from scrapers.aminer_search import search_teacher
-
-# 导入工具模块
+# 导入工具模块（均为轻量模块）
 from utils import check_data_quality
 from utils.merge_data import merge_data
+from utils.raw_sources import delete_raw_snapshot, save_raw_snapshot
+from utils.metrics import REGISTRY, export_run, format_summary, observe
+from utils.politeness import SCHEDULER
+from utils.priority import (DEFAULT_WEIGHTS, CostModel, TimeBudget, build_candidates, expected_fit, load_records,
+                            load_state, parse_duration, parse_weights, save_state)
+from utils.profiling import enable_profiling, finish_profiling
+from utils.segment_store import SegmentStore, store_path_for, write_json_atomic
+from utils.run_logging import current_run_id, log_context, log_stage, setup_logging, shutdown_logging
+from utils.work_queue import WorkQueue, default_worker_id, in_shard, parse_shard
 
-class SimpleFormatter(logging.Formatter):
-    """自定义格式化器，只在WARNING和ERROR级别显示级别前缀"""
-    
-    def format(self, record):
-        # 保存原始消息
-        original_msg = record.msg
-        
-        # 只有WARNING和ERROR级别显示前缀
-        if record.levelno >= logging.WARNING:
-            record.msg = f"{record.levelname} - {record.msg}"
-        
-        # 格式化记录
-        result = super().format(record)
-        
-        # 恢复原始消息，避免影响其他处理器
-        record.msg = original_msg
-        
-        return result
+# 支持的学校及默认输出目录
+SCHOOLS = {
+    "南京信息工程大学": "NUIST_teacher_data",
+    "南京大学": "NJU_teacher_data",
+}
 
-def setup_logging(output_dir: str) -> None:
-    """设置日志配置"""
-    # 确保输出目录存在
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # 日志文件直接放在输出目录下
-    log_file = os.path.join(output_dir, 'teacher_analysis.log')
-    
-    # 创建logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # 清除现有的handlers
-    logger.handlers = []
-    
-    # 创建简单格式化器
-    formatter = SimpleFormatter('%(message)s')
-    
-    # 文件处理器
-    file_handler = logging.FileHandler(log_file, encoding='utf-8', mode='w')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    # 控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
-def process_single_teacher(teacher_info: Dict, school_name: str, force_aminer: bool = False, headless: bool = False) -> Optional[Dict]:
+def configure_certificates() -> None:
+    """设置证书环境变量（requests/playwright 使用），在开始联网前调用"""
+    import certifi
+    os.environ['SSL_CERT_FILE'] = certifi.where()
+    os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
+
+
+def get_scraper(school_name: str):
+    """根据学校名称返回教师列表爬虫，不支持的学校返回 None"""
+    if school_name == "南京信息工程大学":
+        from scrapers.NUIST_get_links import NUISTScraper # 南信大爬虫
+        return NUISTScraper(school_name)
+    return None
+
+
+def process_single_teacher(teacher_info: Dict, school_name: str, force_aminer: bool = False, headless: bool = False, output_dir: Optional[str] = None) -> Optional[Dict]:
     """
     处理单个教师信息的完整流程
     
@@ -83,6 +67,7 @@ def process_single_teacher(teacher_info: Dict, school_name: str, force_aminer: b
     school_name: 学校名称 (用于AMiner搜索)
     force_aminer: 是否强制使用AMiner搜索，默认为False
     headless: 是否使用无头模式，默认为False
+    output_dir: json数据输出目录，设置后会在其 _raw 子目录中保存各数据源的原始抽取结果
     
     流程：
     1. 学校个人网页数据采集
@@ -95,6 +80,9 @@ def process_single_teacher(teacher_info: Dict, school_name: str, force_aminer: b
     输出：
     教师数据json字典
     """
+    # 第一次处理教师时才导入 scrapegraphai 相关模块
+    from scrapers.smart_scraper import scrape_profile
+
     teacher_url = teacher_info["url"]
     teacher_name = teacher_info["name"]
     
@@ -102,65 +90,179 @@ def process_single_teacher(teacher_info: Dict, school_name: str, force_aminer: b
     logging.info(f"网页URL: {teacher_url}")
     
     # 1. 学校数据采集
-    logging.info(f"【步骤1】开始爬取学校个人网页...")
-    school_data = scrape_profile(teacher_url)
-    # 把字典从爬虫原始输出的content里提取出来,得到真正的字典
-    school_data = school_data["content"]
-    
-    # 添加数据来源信息
-    school_data["data_sources"] = {
-        "school_url": teacher_url
-    }
-    
-    logging.info(f"【步骤1完成】已获取 {teacher_name} 的学校网页数据")
+    with log_stage("school_scrape"):
+        logging.info(f"【步骤1】开始爬取学校个人网页...")
+        school_data = scrape_profile(teacher_url)
+        # 把字典从爬虫原始输出的content里提取出来,得到真正的字典
+        school_data = school_data["content"]
+
+        # 添加数据来源信息
+        school_data["data_sources"] = {
+            "school_url": teacher_url
+        }
+        # 保存学校数据原始快照，便于离线重新合并
+        if output_dir:
+            save_raw_snapshot(output_dir, teacher_name, "school", school_data)
+
+        logging.info(f"【步骤1完成】已获取 {teacher_name} 的学校网页数据")
 
     # 2. 数据质量评估
-    logging.info(f"【步骤2】评估数据质量...")
-    is_qualified = check_data_quality.check_data(school_data)
+    with log_stage("quality_check"):
+        logging.info(f"【步骤2】评估数据质量...")
+        is_qualified = check_data_quality.check_data(school_data)
     if is_qualified and not force_aminer:  # 增加force_aminer的判断
         # 6. 如果数据合格且不强制使用AMiner，直接返回学校数据
         logging.info(f"【步骤2完成】{teacher_name} 的学校网页数据质量合格，无需补充")
+        # 本次结果没有使用AMiner数据，删除之前运行留下的AMiner快照，离线重新合并时才与保存的结果一致
+        if output_dir:
+            delete_raw_snapshot(output_dir, teacher_name, "aminer")
         return school_data
     
     else:
         reason = "数据不完整" if not is_qualified else "强制使用AMiner"
         logging.info(f"【步骤2完成】{teacher_name} 的学校数据{reason}，尝试从AMiner获取补充数据")
+        from scrapers.aminer_search import search_teacher
+
         # 3. 先进行搜索得到教师的AMiner主页
-        logging.info(f"【步骤3】在AMiner搜索 {teacher_name} ({school_name})...")
-        aminer_url = search_teacher(teacher_name, school_name, headless=headless)
+        with log_stage("aminer_search"):
+            logging.info(f"【步骤3】在AMiner搜索 {teacher_name} ({school_name})...")
+            aminer_url = search_teacher(teacher_name, school_name, headless=headless)
         
         if not aminer_url:
             logging.warning(f"【步骤3失败】未找到 {teacher_name} 的AMiner主页，返回原始数据")
+            if output_dir:
+                delete_raw_snapshot(output_dir, teacher_name, "aminer")
             return school_data
 
         # 4. 爬取Aminer个人主页
-        logging.info(f"【步骤4】爬取 {teacher_name} 的AMiner主页数据...")
-        aminer_data = scrape_profile(aminer_url)
-        # 把字典从爬虫原始输出的content里提取出来,得到真正的字典
-        aminer_data = aminer_data["content"]
-        
-        # 添加AMiner数据来源
-        aminer_data["data_sources"] = {
-            "aminer_url": aminer_url
-        }
-        logging.info(f"【步骤4完成】已获取AMiner数据")
+        with log_stage("aminer_scrape"):
+            logging.info(f"【步骤4】爬取 {teacher_name} 的AMiner主页数据...")
+            aminer_data = scrape_profile(aminer_url)
+            # 把字典从爬虫原始输出的content里提取出来,得到真正的字典
+            aminer_data = aminer_data["content"]
+
+            # 添加AMiner数据来源
+            aminer_data["data_sources"] = {
+                "aminer_url": aminer_url
+            }
+            if output_dir:
+                save_raw_snapshot(output_dir, teacher_name, "aminer", aminer_data)
+            logging.info(f"【步骤4完成】已获取AMiner数据")
         
         # 5. 合并数据
-        logging.info(f"【步骤5】合并学校数据和AMiner数据...")
-        merged_data = merge_data(school_data, aminer_data)
-        
-        # 确保合并后的数据包含所有数据来源
-        merged_data["data_sources"] = {
-            "school_url": teacher_url,
-            "aminer_url": aminer_url
-        }
+        with log_stage("merge"):
+            logging.info(f"【步骤5】合并学校数据和AMiner数据...")
+            merged_data = merge_data(school_data, aminer_data)
+
+            # 确保合并后的数据包含所有数据来源
+            merged_data["data_sources"] = {
+                "school_url": teacher_url,
+                "aminer_url": aminer_url
+            }
         
         # 6. 返回合并数据
         logging.info(f"【步骤6完成】{teacher_name} 的数据处理完成")
         return merged_data
     
 
-def process_all_teachers(school_name: str, output_dir: str, test_limit: int = 0, force_aminer: bool = False, headless: bool = False) -> None:
+def is_saved(teacher_name: str, output_dir: str, store: Optional[SegmentStore] = None) -> bool:
+    """该教师的数据是否已经保存（json文件或分段存储中）"""
+    return os.path.exists(f"{output_dir}/{teacher_name}.json") or (store is not None and teacher_name in store)
+
+
+def process_and_save_teacher(teacher_info: Dict, school_name: str, output_dir: str, force_aminer: bool = False,
+                             headless: bool = False, store: Optional[SegmentStore] = None) -> bool:
+    """
+    处理单个教师并保存（供顺序执行和线程池共用）
+
+    store 为 None 时保存为 <output_dir>/<教师名>.json，否则写入分段存储
+
+    返回:
+        bool: 是否成功保存
+    """
+    teacher_name = teacher_info["name"]
+    with log_context(teacher_id=teacher_name):
+        try:
+            # 完整处理教师信息，传递 school_name
+            start_time = time.time()
+            teacher_data = process_single_teacher(teacher_info, school_name, force_aminer, headless, output_dir)
+            end_time = time.time()
+
+            if not teacher_data:
+                logging.error(f"处理 {teacher_name} 的数据失败，跳过")
+                return False
+
+            # 存储单个教师数据（原子写入，中途崩溃不会留下损坏的文件）
+            with log_stage("save"):
+                if store is not None:
+                    output_path = store.path
+                    store.put(teacher_name, teacher_data)
+                else:
+                    output_path = f"{output_dir}/{teacher_name}.json"
+                    write_json_atomic(output_path, teacher_data)
+
+            observe("teacher_duration_seconds", end_time - start_time)
+            logging.info(f"已保存 {teacher_name} 的数据到 {output_path}，耗时 {end_time - start_time:.2f} 秒",
+                         extra={"duration": round(end_time - start_time, 4)})
+            return True
+
+        except Exception as e:
+            logging.error(f"处理教师 {teacher_name} 数据时出错: {str(e)}")
+            # 考虑增加更详细的错误日志，例如 traceback
+            import traceback
+            logging.error(traceback.format_exc())
+            return False
+
+
+def run_from_queue(queue: WorkQueue, school_name: str, output_dir: str, workers: int = 1,
+                   force_aminer: bool = False, headless: bool = False,
+                   store: Optional[SegmentStore] = None, should_stop: Optional[Callable[[], bool]] = None) -> List[bool]:
+    """
+    从共享工作队列中循环领取教师并处理，直到队列中没有可领取的任务
+
+    其他进程已经保存了数据的教师直接标记完成；处理失败的教师交回队列等待重试。
+    should_stop 返回 True 时（例如时间预算已用完）不再领取新任务，剩余任务留在队列中。
+
+    返回:
+        List[bool]: 本进程领取的每个任务是否处理成功
+    """
+    def worker_loop() -> List[bool]:
+        owner = default_worker_id()
+        results = []
+        while True:
+            if should_stop is not None and should_stop():
+                return results
+            task = queue.claim(owner)
+            if task is None:
+                return results
+            key, teacher_info = task
+            if is_saved(teacher_info['name'], output_dir, store):
+                queue.complete(key, owner)
+                continue
+            logging.info(f"")
+            logging.info(f"------ 领取教师 {teacher_info['name']}（{owner}） ------")
+            with queue.hold(key, owner) as lease_lost:
+                ok = process_and_save_teacher(teacher_info, school_name, output_dir, force_aminer, headless, store)
+            if lease_lost.is_set():
+                logging.warning(f"{teacher_info['name']} 的租约在处理期间被接管，结果以接管方为准")
+            elif ok:
+                queue.complete(key, owner)
+            else:
+                queue.fail(key, owner, "处理失败")
+            results.append(ok)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker_loop) for _ in range(workers)]
+            return [ok for future in futures for ok in future.result()]
+    return worker_loop()
+
+
+def process_all_teachers(school_name: str, output_dir: str, test_limit: int = 0, force_aminer: bool = False, headless: bool = False,
+                         profile_stages: Optional[List[str]] = None, workers: int = 1, dry_run: bool = False,
+                         shard: Optional[Tuple[int, int]] = None, queue_path: Optional[str] = None,
+                         store_backend: str = "files", compress: bool = False, time_budget: Optional[float] = None,
+                         priority_weights: Optional[Dict[str, float]] = None, prompt_variant: str = "full") -> None:
     """
     处理所有教师信息的完整流程
     
@@ -170,6 +272,17 @@ def process_all_teachers(school_name: str, output_dir: str, test_limit: int = 0,
     test_limit: 测试模式下处理的教师数量，设为0表示处理全部教师
     force_aminer: 是否强制使用AMiner搜索，默认为False
     headless: 是否使用无头模式，默认为False
+    profile_stages: 需要做性能剖析的阶段名（如 ["school_scrape", "merge"]，"all" 表示全部），默认不剖析
+    workers: 同时处理的教师数（线程数），默认为1即顺序处理
+    dry_run: 只获取教师列表并统计待处理/已存在的教师，不爬取个人主页
+    shard: (i, N) 只处理按URL稳定哈希落在第i个分片的教师，用于多进程/多机静态划分
+    queue_path: 共享工作队列（SQLite文件）路径，设置后多个进程从队列中领取教师，租约过期的任务会被重新领取
+    store_backend: "files" 每位教师一个json文件；"segments" 写入 <output_dir>/_store 下的JSONL分段存储
+    compress: 分段存储封存的分段是否使用 zstd 压缩（仅新建存储时有效）
+    time_budget: 时间预算（秒），设置后按优先级处理，剩余时间放不下的教师推迟到下次运行
+    priority_weights: 打分函数权重（见 utils.priority），设置后按优先级而不是列表顺序处理；
+                      只设置 time_budget 时使用默认权重。按优先级处理时，未通过质量检查的已有数据也会重新爬取一次
+    prompt_variant: LLM抽取使用的提示词变体，"full"（默认）或 "compact"（见 scrapers.smart_scraper.PROMPTS）
 
     流程：
     1. 获取所有教师链接
@@ -181,128 +294,204 @@ def process_all_teachers(school_name: str, output_dir: str, test_limit: int = 0,
     """
     # 设置日志
     setup_logging(output_dir)
+    if profile_stages:
+        enable_profiling(output_dir, profile_stages)
+        logging.info(f"已开启性能剖析: {', '.join(profile_stages)}")
+    try:
+        configure_certificates()
     
-    # 确保输出目录存在
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        logging.info(f"创建输出目录: {output_dir}")
-
-    # 获取已处理的教师列表（从现有JSON文件中提取）
-    existing_teachers = []
-    if os.path.exists(output_dir):
-        for filename in os.listdir(output_dir):
-            if filename.endswith('.json'):
-                teacher_name = os.path.splitext(filename)[0]
-                existing_teachers.append(teacher_name)
-        logging.info(f"===============================================")
-        logging.info(f"发现已有 {len(existing_teachers)} 位教师的数据文件")
-        logging.info(f"===============================================")
+        # 确保输出目录存在
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+            logging.info(f"创建输出目录: {output_dir}")
 
-    # 1. 获取所有教师链接和基本信息
-    logging.info(f"")
-    logging.info(f"【阶段1：获取教师列表】")
-    logging.info(f"开始从 {school_name} 获取教师信息...")
-    start_time = time.time()
+        # 获取已处理的教师列表（从现有JSON文件中提取）
+        existing_teachers = set()
+        if os.path.exists(output_dir):
+            for filename in os.listdir(output_dir):
+                if filename.endswith('.json'):
+                    teacher_name = os.path.splitext(filename)[0]
+                    existing_teachers.add(teacher_name)
+            store = None
+            if store_backend == "segments":
+                store = SegmentStore(store_path_for(output_dir), "zstd" if compress else None)
+                existing_teachers.update(store.ids())
+            logging.info(f"===============================================")
+            logging.info(f"发现已有 {len(existing_teachers)} 位教师的数据文件")
+            logging.info(f"===============================================")
 
-    # 根据 school_name 选择 Scraper
-    if school_name == "南京信息工程大学":
-        scraper = NUISTScraper(school_name)
-    else:
-        logging.error(f"错误：不支持的学校名称 '{school_name}'。请在 main.py 中配置。")
-        return
-
-    try:
-        teacher_info_list = scraper.get_all_teacher_links()
-    except Exception as e:
-        logging.error(f"从 {school_name} 获取教师列表时出错: {e}")
-        return
-
-    end_time = time.time()
-    logging.info(f"获取到 {len(teacher_info_list)} 个教师信息，耗时 {end_time - start_time:.2f} 秒")
-    logging.info(f"【阶段1完成】")
-    logging.info(f"")
-
-    # 测试模式下，只处理指定数量的教师
-    if test_limit > 0:
-        logging.warning(f"⚠️ 测试模式已启用，仅处理前 {test_limit} 位教师")
-        teacher_info_list = teacher_info_list[:test_limit]
-
-    # 2. 处理每个教师信息
-    logging.info(f"【阶段2：处理教师信息】")
-    logging.info(f"开始处理教师信息... {'(强制使用AMiner)' if force_aminer else ''} {'(无头模式)' if headless else ''}")
-    processed_count = 0
-    skipped_count = 0
-    
-    for i, teacher_info in enumerate(teacher_info_list):
+        # 1. 获取所有教师链接和基本信息
         logging.info(f"")
-        logging.info(f"------ 处理第 {i+1}/{len(teacher_info_list)} 位教师 ------")
-        
-        # 获取教师姓名
-        teacher_name = teacher_info["name"]
-        
-        # 检查是否已存在该教师的数据
-        if teacher_name in existing_teachers:
-            logging.info(f"跳过 {teacher_name} - 数据已存在")
-            skipped_count += 1
-            continue
-        
+        logging.info(f"【阶段1：获取教师列表】")
+        logging.info(f"开始从 {school_name} 获取教师信息...")
+        start_time = time.time()
+
+        # 根据 school_name 选择 Scraper
+        scraper = get_scraper(school_name)
+        if scraper is None:
+            logging.error(f"错误：不支持的学校名称 '{school_name}'。请在 main.py 中配置。")
+            return
+
         try:
-            # 完整处理教师信息，传递 school_name
-            start_time = time.time()
-            teacher_data = process_single_teacher(teacher_info, school_name, force_aminer, headless)
-            end_time = time.time()
-            
-            if not teacher_data:
-                logging.error(f"处理 {teacher_name} 的数据失败，跳过")
-                continue
-            
-            # 存储单个教师数据为json文件
-            output_path = f"{output_dir}/{teacher_name}.json"
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(teacher_data, f, ensure_ascii=False, indent=2)
-            
-            processed_count += 1
-            logging.info(f"已保存 {teacher_name} 的数据到 {output_path}，耗时 {end_time - start_time:.2f} 秒")
-        
+            with log_stage("list_teachers"):
+                teacher_info_list = scraper.get_all_teacher_links()
         except Exception as e:
-            logging.error(f"处理教师 {teacher_name} 数据时出错: {str(e)}")
-            # 考虑增加更详细的错误日志，例如 traceback
-            import traceback
-            logging.error(traceback.format_exc())
-            continue
+            logging.error(f"从 {school_name} 获取教师列表时出错: {e}")
+            return
+
+        end_time = time.time()
+        logging.info(f"获取到 {len(teacher_info_list)} 个教师信息，耗时 {end_time - start_time:.2f} 秒")
+        logging.info(f"【阶段1完成】")
+        logging.info(f"")
+
+        # 测试模式下，只处理指定数量的教师
+        if test_limit > 0:
+            logging.warning(f"⚠️ 测试模式已启用，仅处理前 {test_limit} 位教师")
+            teacher_info_list = teacher_info_list[:test_limit]
+
+        # 已存在数据的教师直接跳过
+        pending = [info for info in teacher_info_list if info["name"] not in existing_teachers]
+        skipped_count = len(teacher_info_list) - len(pending)
+        if shard:
+            pending = [info for info in pending if in_shard(info["url"], shard)]
+            logging.info(f"分片 {shard[0]}/{shard[1]}：本进程负责 {len(pending)} 位教师")
+
+        # 按优先级排序：新教师、质量不合格的已有数据、点赞数多的教师优先，并估计每位教师的耗时
+        budget = TimeBudget(time_budget)
+        candidates = None
+        if time_budget is not None or priority_weights is not None:
+            with log_stage("prioritize"):
+                scope = [info for info in teacher_info_list if not shard or in_shard(info["url"], shard)]
+                records = load_records(output_dir, store)
+                cost_model = CostModel.from_history(output_dir)
+                schedule_state = load_state(output_dir)
+                # 共享队列按URL去重，已完成的教师不会再次领取，因此队列模式下不重新爬取已有数据
+                recrawled = records if queue_path else schedule_state.get("recrawled", {})
+                candidates = build_candidates(scope, records, priority_weights or DEFAULT_WEIGHTS, cost_model,
+                                              recrawled, force_aminer)
+            pending = [candidate["info"] for candidate in candidates]
+            recrawl_count = sum(1 for candidate in candidates if candidate["kind"] == "recrawl")
+            logging.info(f"按优先级处理 {len(pending)} 位教师（其中 {recrawl_count} 位重新爬取质量不合格的数据），"
+                         f"耗时估计基于最近 {cost_model.runs} 次运行，新教师约 {cost_model.estimate('new', force_aminer):.0f} 秒/位")
+            if time_budget is not None:
+                logging.info(f"时间预算 {time_budget:.0f} 秒，预计可处理约 "
+                             f"{expected_fit(candidates, time_budget, workers)} 位教师")
+
+        if dry_run:
+            logging.info(f"【试运行】共 {len(teacher_info_list)} 位教师，待处理 {len(pending)} 位，已有数据 {skipped_count} 位")
+            for i, teacher_info in enumerate(pending):
+                detail = (f"（{candidates[i]['kind']}，分数 {candidates[i]['score']}，估计 {candidates[i]['estimate']} 秒）"
+                          if candidates is not None else "")
+                logging.info(f"  待处理: {teacher_info['name']} - {teacher_info['url']}{detail}")
+            return
+
+        # 2. 处理每个教师信息
+        if prompt_variant != "full":
+            from scrapers.smart_scraper import set_prompt_variant
+            set_prompt_variant(prompt_variant)
+            logging.info(f"使用 {prompt_variant} 提示词")
+        logging.info(f"【阶段2：处理教师信息】")
+        logging.info(f"开始处理教师信息... {'(强制使用AMiner)' if force_aminer else ''} {'(无头模式)' if headless else ''}"
+                     f" {f'({workers} 个并行任务)' if workers > 1 else ''}")
+        if skipped_count:
+            logging.info(f"跳过 {skipped_count} 位已有数据的教师")
+
+        def run_one(item: Tuple[int, Dict]) -> Optional[bool]:
+            i, teacher_info = item
+            if candidates is not None and not budget.fits(candidates[i]["estimate"]):
+                logging.info(f"剩余时间 {budget.remaining():.0f} 秒不足以处理 {teacher_info['name']}"
+                             f"（估计 {candidates[i]['estimate']} 秒），推迟到下次运行")
+                return None
+            logging.info(f"")
+            logging.info(f"------ 处理第 {i+1}/{len(pending)} 位教师 ------")
+            return process_and_save_teacher(teacher_info, school_name, output_dir, force_aminer, headless, store)
+
+        if queue_path:
+            queue = WorkQueue(queue_path)
+            added = queue.enqueue((info["url"], info) for info in pending)
+            logging.info(f"工作队列 {queue_path}：新加入 {added} 位教师，当前状态 {queue.stats()}")
+            queue_estimate = min((candidate["estimate"] for candidate in candidates), default=0) if candidates else 0
+            results = run_from_queue(queue, school_name, output_dir, workers, force_aminer, headless, store,
+                                     should_stop=lambda: not budget.fits(queue_estimate))
+        else:
+            # 剩余时间连估计耗时最短的教师都放不下时不再派发任务
+            min_estimate = min((candidate["estimate"] for candidate in candidates), default=0) if candidates else 0
+            # 按教师主页所在主机公平调度：某个主机被限速时先处理其他主机的教师
+            results = SCHEDULER.run([(info["url"], partial(run_one, (i, info))) for i, info in enumerate(pending)],
+                                    workers=workers, should_stop=lambda: not budget.fits(min_estimate))
+            if candidates is not None:
+                state_path = save_state(output_dir, current_run_id(), budget, candidates, results, schedule_state)
+                deferred_count = sum(1 for result in results if result is None)
+                if deferred_count:
+                    logging.info(f"时间预算用完，{deferred_count} 位教师推迟到下次运行（调度状态见 {state_path}）")
+        processed_count = sum(1 for result in results if result is True)
     
-    logging.info(f"")
-    logging.info(f"===============================================")
-    logging.info(f"✅ 所有任务完成！共处理 {processed_count} 位教师数据，跳过 {skipped_count} 位已有数据的教师")
-    logging.info(f"===============================================")
+        logging.info(f"")
+        logging.info(f"===============================================")
+        logging.info(f"✅ 所有任务完成！共处理 {processed_count} 位教师数据，跳过 {skipped_count} 位已有数据的教师")
+        logging.info(f"===============================================")
+    finally:
+        # 导出本次运行的阶段耗时直方图（Prometheus textfile + JSON汇总）；
+        # 提前返回（不支持的学校、获取列表失败、试运行）或出错时同样导出、保存剖析结果并写完日志
+        metrics_paths = export_run(output_dir, current_run_id())
+        logging.info(f"阶段耗时汇总已保存到 {metrics_paths['json']}")
+        for line in format_summary(REGISTRY.snapshot(), top=10):
+            logging.info(line)
+        profile_summary = finish_profiling(current_run_id())
+        if profile_summary:
+            logging.info(f"性能剖析结果已保存到 {profile_summary}")
+        # 写完队列中剩余的日志
+        shutdown_logging()
 
-if __name__ == "__main__":
-    # --- 配置区 ---
-    # 选择要爬取的机构 ("南京信息工程大学" 或 "南京大学")
-    school_name = "南京信息工程大学"
-
-    # 根据学校名称自动设置输出目录
-    match school_name:
-        case "南京信息工程大学":
-            output_dir = "NUIST_teacher_data"
-        case "南京大学":
-            output_dir = "NJU_teacher_data"
-        case _:
-            logging.error(f"未知的学校名称: '{school_name}'。目前暂不支持。")
-            exit() # 直接退出
-
-    # 运行模式选择
-    test_limit = 0    # 测试模式下处理的教师数量，设为0表示处理全部
-    force_aminer = False  # 设置是否强制使用AMiner搜索
-    headless = True  # 设置是否使用无头模式 (True: 不显示浏览器界面, False: 显示)
-    # --- 配置区结束 ---
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="从学校教师门户爬取教师信息，输出结构化JSON文件")
+    parser.add_argument("--school", default="南京信息工程大学", choices=sorted(SCHOOLS), help="要爬取的机构")
+    parser.add_argument("--output-dir", default=None, help="json数据输出目录（默认按学校自动选择，如 NUIST_teacher_data）")
+    parser.add_argument("--limit", type=int, default=0, help="测试模式下处理的教师数量，0表示处理全部")
+    parser.add_argument("--force-aminer", action="store_true", help="即使学校数据合格也从AMiner补充")
+    parser.add_argument("--headless", dest="headless", action="store_true", default=True,
+                        help="无头模式，不显示浏览器界面（默认）")
+    parser.add_argument("--no-headless", dest="headless", action="store_false", help="显示浏览器界面（首次登录AMiner时使用）")
+    parser.add_argument("--workers", type=int, default=1, help="同时处理的教师数")
+    parser.add_argument("--dry-run", action="store_true", help="只获取教师列表并统计待处理的教师，不爬取")
+    parser.add_argument("--profile", nargs="+", default=None, metavar="STAGE",
+                        help="对指定阶段做性能剖析（如 school_scrape merge，或 all）")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N",
+                        help="只处理第I个分片（共N个，按教师URL稳定哈希划分）")
+    parser.add_argument("--queue", default=None, metavar="DB",
+                        help="共享工作队列（SQLite文件），多个进程/机器从中领取教师")
+    parser.add_argument("--store", choices=["files", "segments"], default="files",
+                        help="files：每位教师一个json文件（默认）；segments：JSONL分段存储（<输出目录>/_store）")
+    parser.add_argument("--compress", action="store_true", help="分段存储使用 zstd 压缩封存的分段")
+    parser.add_argument("--time-budget", type=parse_duration, default=None, metavar="DURATION",
+                        help="时间预算（如 8h、90m、1h30m），按优先级处理，放不下的教师推迟到下次运行")
+    parser.add_argument("--priority", type=parse_weights, default=None, metavar="WEIGHTS",
+                        help=f"按优先级处理，打分函数及权重（默认 "
+                             f"{','.join(f'{name}={weight:g}' for name, weight in DEFAULT_WEIGHTS.items())}）")
+    parser.add_argument("--prompt", choices=["full", "compact"], default="full",
+                        help="LLM抽取的提示词：full 完整提示词（默认），compact 紧凑的字段结构 + 规则，输入token约少一半")
+    args = parser.parse_args(argv)
 
     process_all_teachers(
-        school_name=school_name, # 学校名称
-        output_dir=output_dir, # 输出json文件的目录
-        test_limit=test_limit, # 测试模式下处理的教师数量，设为0表示处理全部
-        force_aminer=force_aminer, # 是否强制使用AMiner补充
-        headless=headless # 是否使用无头模式 (True: 不显示浏览器界面, False: 显示)
+        school_name=args.school, # 学校名称
+        output_dir=args.output_dir or SCHOOLS[args.school], # 输出json文件的目录
+        test_limit=args.limit, # 测试模式下处理的教师数量，设为0表示处理全部
+        force_aminer=args.force_aminer, # 是否强制使用AMiner补充
+        headless=args.headless, # 是否使用无头模式 (True: 不显示浏览器界面, False: 显示)
+        profile_stages=args.profile, # 需要性能剖析的阶段
+        workers=max(args.workers, 1), # 同时处理的教师数
+        dry_run=args.dry_run, # 只列出待处理的教师
+        shard=args.shard, # 静态分片
+        queue_path=args.queue, # 共享工作队列
+        store_backend=args.store, # 存储后端
+        compress=args.compress, # 分段存储是否压缩
+        time_budget=args.time_budget, # 时间预算（秒）
+        priority_weights=args.priority, # 优先级打分权重
+        prompt_variant=args.prompt # 提示词变体
     )
+    return 0
+
 
-    
\ No newline at end of file
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,11 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
-import time
 import os
 import certifi
 import logging
 from typing import List, Dict, Tuple
 
+from utils.metrics import span
+from utils.politeness import slot
+
 class NUISTScraper:
     def __init__(self, school_name: str):
         """初始化爬虫"""
@@ -43,8 +45,11 @@ class NUISTScraper:
                 
                 try:
                     # 获取页面内容，使用证书路径和请求头
-                    response = requests.get(list_url, verify=self.cert_path, headers=self.headers, timeout=30)
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    # 按主机限速（见 utils.politeness），避免请求过快
+                    with span("list_page_fetch"), slot(list_url):
+                        response = requests.get(list_url, verify=self.cert_path, headers=self.headers, timeout=30)
+                    with span("list_page_parse"):
+                        soup = BeautifulSoup(response.text, 'html.parser')
                     
                     # 南信大的HTML结构是独特的，我们需要直接查找包含教师信息的<li>元素
                     teacher_elements = soup.select("ul.clearfix > li")
@@ -73,9 +78,6 @@ class NUISTScraper:
                     
                     logging.info(f"第{page}页找到{page_teacher_count}位教师")
                     
-                    # 添加延迟，避免请求过快
-                    time.sleep(1)
-                    
                 except Exception as e:
                     logging.error(f"爬取第{page}页教师列表出错: {str(e)}")
                     continue
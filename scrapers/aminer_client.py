@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+AMiner 免浏览器客户端
+
+LoginManager 扫码登录后保存的是 Playwright 的 storage state（cookies + localStorage），
+原来每次搜索都要启动 Chromium、加载这份状态再逐页点击。这里把同一份状态加载进带连接池的 requests.Session，
+直接调用 AMiner 网页前端使用的 JSON 接口，每页搜索结果只需要一次请求：
+- search_person(name, page)：一页搜索结果
+- find_profile_url(matcher, org)：依次用姓名变体搜索、逐页给结果打分（见 utils.org_match），返回个人主页URL
+个人主页的内容仍由 smart_scraper 爬取。
+登录失效（cookie 全部过期、接口返回 401/403 或要求登录）时抛出 SessionExpired，
+refresh_login() 只在这时启动浏览器，复用 LoginManager 重新登录并保存状态，之后重新加载会话。
+多个工作线程同时发现失效时只刷新一次。
+
+注意：MAGIC_API 及 SEARCH_ACTION 的请求格式取自网页前端发出的请求，AMiner 没有公开文档，
+改版后可能失效。返回格式不符合预期时抛出 AMinerAPIError，aminer_search.search_teacher 会改用浏览器搜索，
+并在本次运行中不再尝试HTTP接口（见 disable()）。
+
+用法：
+    from scrapers.aminer_client import get_client
+    from utils.org_match import NameMatcher
+    client = get_client()          # 没有保存的登录状态时返回 None
+    url = client.find_profile_url(NameMatcher("陈海山"), "南京信息工程大学")
+"""
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.metrics import observe, span
+from utils.org_match import NameMatcher, pick_best
+from utils.politeness import slot
+
+COOKIES_PATH = "config/aminer_cookies.json"
+AMINER_HOST = "www.aminer.cn"
+AMINER_ORIGIN = f"https://{AMINER_HOST}"
+MAGIC_API = "https://apiv2.aminer.cn/magic"
+
+SEARCH_ACTION = "searchapi.SearchPerson"
+PAGE_SIZE = 20
+MAX_PAGES = 5
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# 搜索结果中需要的字段（与网页前端请求的 schema 一致）
+PERSON_SCHEMA = ["id", "name", "name_zh", {"profile": ["position", "affiliation", "affiliation_zh", "org"]}]
+
+
+class SessionExpired(Exception):
+    """保存的登录状态已失效，需要重新登录"""
+
+
+class AMinerAPIError(Exception):
+    """接口返回的格式不符合预期（接口可能已改版）"""
+
+
+def load_storage_state(path: str = COOKIES_PATH) -> Dict[str, Any]:
+    """读取 Playwright 保存的 storage state：{"cookies": [...], "origins": [{"origin", "localStorage": [...]}]}"""
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if not isinstance(state, dict):
+        raise ValueError(f"{path} 不是 Playwright 的 storage state")
+    return state
+
+
+def _local_storage_token(state: Dict[str, Any]) -> Optional[str]:
+    """网页前端把登录令牌保存在 aminer.cn 的 localStorage 中，接口请求通过 Authorization 头携带"""
+    for origin in state.get("origins", []):
+        if AMINER_HOST not in origin.get("origin", ""):
+            continue
+        for item in origin.get("localStorage", []):
+            if item.get("name") == "token" and item.get("value"):
+                value = item["value"]
+                # 有的版本以JSON字符串的形式保存（带引号）
+                return value.strip('"')
+    return None
+
+
+class AMinerClient:
+    """
+    使用保存的登录状态访问 AMiner 接口的HTTP客户端（线程安全）
+
+    参数:
+        cookies_path: LoginManager 保存的 storage state 路径
+        pool_size: 连接池大小，不小于并发的工作线程数即可
+    """
+
+    def __init__(self, cookies_path: str = COOKIES_PATH, pool_size: int = 8):
+        self.cookies_path = cookies_path
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        # 每次重新加载登录状态后加一，用于判断其他线程是否已经刷新过
+        self.generation = 0
+        self.expires_at: Optional[float] = None
+        self.session = self._new_session()
+        self.reload()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=None, respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=retry)
+        session.mount("https://", adapter)
+        session.verify = certifi.where()
+        session.headers.update({"User-Agent": USER_AGENT, "Origin": AMINER_ORIGIN, "Referer": AMINER_ORIGIN + "/"})
+        return session
+
+    def reload(self) -> None:
+        """从 cookies_path 重新加载登录状态，丢弃已过期的 cookie"""
+        state = load_storage_state(self.cookies_path)
+        now = time.time()
+        jar = requests.cookies.RequestsCookieJar()
+        persistent_expiry = []
+        for cookie in state.get("cookies", []):
+            if "aminer" not in cookie.get("domain", ""):
+                continue
+            expires = cookie.get("expires", -1)
+            # Playwright 中 -1 表示会话cookie
+            if expires is not None and 0 < expires <= now:
+                continue
+            if expires is not None and expires > 0:
+                persistent_expiry.append(expires)
+            jar.set_cookie(requests.cookies.create_cookie(
+                name=cookie["name"], value=cookie["value"], domain=cookie["domain"], path=cookie.get("path", "/"),
+                secure=cookie.get("secure", False), expires=int(expires) if expires and expires > 0 else None,
+                rest={"HttpOnly": cookie.get("httpOnly", False)}))
+        if not len(jar):
+            raise SessionExpired(f"{self.cookies_path} 中没有未过期的 AMiner cookie")
+
+        token = _local_storage_token(state)
+        with self._lock:
+            self.session.cookies = jar
+            if token:
+                self.session.headers["Authorization"] = token
+            else:
+                self.session.headers.pop("Authorization", None)
+            self.expires_at = max(persistent_expiry) if persistent_expiry else None
+            self.generation += 1
+
+    @property
+    def expired(self) -> bool:
+        """所有持久cookie都已过期（会话cookie无法在本地判断，由接口响应判断）"""
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def refresh_login(self, generation: Optional[int] = None, headless: bool = False) -> None:
+        """
+        启动浏览器重新登录并保存状态，然后重新加载会话
+
+        参数:
+            generation: 调用方发现失效时的 self.generation；其他线程已经刷新过时直接返回
+            headless: 是否使用无头模式（扫码登录需要可见的浏览器）
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            from playwright.sync_api import sync_playwright
+            from scrapers.aminer_search import LoginManager
+
+            logging.info("AMiner登录状态已失效，启动浏览器刷新登录...")
+            with span("aminer_login"), sync_playwright() as playwright:
+                browser = playwright.chromium.launch(headless=headless)
+                try:
+                    context_params = {"user_agent": USER_AGENT}
+                    if os.path.exists(self.cookies_path) and os.path.getsize(self.cookies_path) > 0:
+                        context_params["storage_state"] = self.cookies_path
+                    page = browser.new_context(**context_params).new_page()
+                    login_manager = LoginManager(page, self.cookies_path)
+                    with slot(AMINER_HOST):
+                        page.goto(AMINER_ORIGIN, wait_until="domcontentloaded", timeout=60000)
+                    if login_manager.check_login():
+                        # 浏览器中的会话仍然有效，保存刷新后的cookie即可
+                        login_manager._save_cookies()
+                    else:
+                        login_manager.manual_login()
+                finally:
+                    browser.close()
+        self.reload()
+
+    def _call(self, action: str, parameters: Dict[str, Any], schema: Optional[Dict[str, Any]] = None) -> Dict:
+        """调用一次 magic 接口，返回第一个结果；登录失效时抛出 SessionExpired"""
+        if self.expired:
+            raise SessionExpired("AMiner cookie 已过期")
+        payload = [{"action": action, "parameters": parameters}]
+        if schema:
+            payload[0]["schema"] = schema
+        with span("aminer_http", action=action), slot(MAGIC_API):
+            response = self.session.post(MAGIC_API, params={"a": f"{action}___"}, json=payload, timeout=30)
+        if response.status_code in (401, 403):
+            raise SessionExpired(f"AMiner 接口返回 {response.status_code}")
+        response.raise_for_status()
+        try:
+            body = response.json()
+        except ValueError:
+            raise AMinerAPIError(f"{action} 返回的不是JSON")
+        results = body.get("data") if isinstance(body, dict) else None
+        if not isinstance(results, list) or not results or not isinstance(results[0], dict):
+            raise AMinerAPIError(f"{action} 返回格式不符合预期: {str(body)[:200]}")
+        result = results[0]
+        if result.get("succeed") is False:
+            message = str(result.get("error") or result.get("message") or "")
+            if result.get("code") in (401, 403) or "login" in message.lower() or "登录" in message:
+                raise SessionExpired(f"AMiner 要求重新登录: {message}")
+            raise AMinerAPIError(f"{action} 调用失败: {message}")
+        return result
+
+    def search_person(self, name: str, page: int = 0) -> List[Dict[str, Any]]:
+        """
+        按姓名搜索学者
+
+        参数:
+            name: 学者姓名
+            page: 页码（从0开始），每页 PAGE_SIZE 条
+
+        返回:
+            List[Dict]: 学者列表，每项至少包含 id、name，机构信息在 profile 中
+        """
+        result = self._call(SEARCH_ACTION, {"offset": page * PAGE_SIZE, "size": PAGE_SIZE, "query": name},
+                            {"person": PERSON_SCHEMA})
+        items = result.get("data", result.get("items", []))
+        if not isinstance(items, list):
+            raise AMinerAPIError(f"{SEARCH_ACTION} 返回的结果不是列表")
+        return [item for item in items if isinstance(item, dict) and item.get("id")]
+
+    def find_profile_url(self, matcher: NameMatcher, org: str, max_pages: int = MAX_PAGES) -> str:
+        """
+        依次用 matcher.queries 搜索，逐页打分，返回机构匹配且姓名最相符的学者的个人主页URL，找不到时返回空字符串
+
+        参数:
+            matcher: 教师姓名的 NameMatcher
+            org: 教师所属机构（org_mapping.json 中的键）
+            max_pages: 所有搜索词合计最多请求的页数
+        """
+        pages = 0
+        found = None
+        for query in matcher.queries:
+            for page in range(max_pages - pages):
+                persons = self.search_person(query, page)
+                pages += 1
+                candidates = []
+                for person in persons:
+                    profile = person.get("profile") or {}
+                    org_text = " ".join(str(profile.get(key) or "") for key in ("affiliation", "affiliation_zh", "org"))
+                    name_text = f"{person.get('name') or ''} {person.get('name_zh') or ''}"
+                    candidates.append((name_text, org_text, person))
+                best, more = pick_best(candidates, org, matcher)
+                found = best
+                if not more or len(persons) < PAGE_SIZE:
+                    break
+            if found is not None or pages >= max_pages:
+                break
+        observe("aminer_search_pages", pages, method="http", result="found" if found else "not_found")
+        if found is None:
+            return ""
+        logging.info(f"找到匹配: {found.get('name_zh') or found.get('name')}（请求 {pages} 页）")
+        return profile_url(found["id"])
+
+
+def profile_url(person_id: str) -> str:
+    """学者的个人主页URL"""
+    return f"{AMINER_ORIGIN}/profile/{person_id}"
+
+
+_client: Optional[AMinerClient] = None
+_client_lock = threading.Lock()
+_disabled = False
+
+
+def get_client(cookies_path: str = COOKIES_PATH) -> Optional[AMinerClient]:
+    """
+    进程内共享的客户端；没有保存的登录状态、状态已全部过期或已停用HTTP接口时返回 None（由调用方改用浏览器）
+    """
+    global _client
+    if _disabled:
+        return None
+    with _client_lock:
+        if _client is None:
+            if not (os.path.exists(cookies_path) and os.path.getsize(cookies_path) > 0):
+                return None
+            try:
+                _client = AMinerClient(cookies_path)
+            except (OSError, ValueError, SessionExpired) as e:
+                logging.info(f"无法使用保存的AMiner登录状态: {e}")
+                return None
+        return _client
+
+
+def disable(reason: str) -> None:
+    """本次运行中停用HTTP接口（接口改版等无法通过重新登录解决的问题）"""
+    global _disabled
+    if not _disabled:
+        logging.warning(f"AMiner HTTP接口不可用，改用浏览器搜索: {reason}")
+    _disabled = True
@@ -1,17 +1,21 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import json
 import os
 import time
 import certifi
 import logging
-from playwright.sync_api import sync_playwright
+
+from utils.metrics import observe, span
+from utils.org_match import NameMatcher, pick_best
+from utils.politeness import slot
 
 # 配置证书环境变量
 os.environ['SSL_CERT_FILE'] = certifi.where()
 os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
 
+AMINER_HOST = "www.aminer.cn"
+
 class LoginManager:
     """
     Aminer登录管理器
@@ -64,6 +68,10 @@ class LoginManager:
 def search_teacher(teacher_name, teacher_org, headless=False):
     """
     搜索教师信息的核心函数
+
+    有保存的登录状态时先用HTTP接口搜索（见 aminer_client），每页结果只需一次请求；
+    登录失效时打开浏览器刷新登录后重试，接口不可用时改用浏览器搜索。
+    搜索词和结果匹配见 utils.org_match：门户上截断的姓名会先清理，结果按机构别名和姓名变体打分
     
     参数:
         teacher_name: 教师姓名
@@ -73,17 +81,60 @@ def search_teacher(teacher_name, teacher_org, headless=False):
     返回:
         str: 教师在Aminer的个人主页完整URL
     """
-    cookies_path = "config/aminer_cookies.json"
-    org_mapping_path = "config/org_mapping.json"
-    
-    # 加载机构映射
+    matcher = NameMatcher(teacher_name)
+    profile_url = _search_teacher_http(matcher, teacher_org, headless)
+    if profile_url is not None:
+        return profile_url
+    return _search_teacher_browser(matcher, teacher_org, headless)
+
+
+def _search_teacher_http(matcher, teacher_org, headless=False):
+    """
+    通过HTTP接口搜索
+
+    返回:
+        Optional[str]: 个人主页URL，没有匹配时为空字符串；无法使用HTTP接口时返回 None
+    """
+    from scrapers import aminer_client
+    import requests
+
+    client = aminer_client.get_client()
+    if client is None:
+        return None
+    logging.info(f"开始搜索 {matcher.raw}（HTTP，搜索词: {'、'.join(matcher.queries)}）...")
     try:
-        with open(org_mapping_path, 'r', encoding='utf-8') as f:
-            org_mapping = json.load(f)
-    except Exception as e:
-        logging.error(f"加载机构映射文件失败: {e}")
-        org_mapping = {teacher_org: [teacher_org]}
-    
+        try:
+            generation = client.generation
+            profile_url = client.find_profile_url(matcher, teacher_org)
+        except aminer_client.SessionExpired as e:
+            logging.info(f"{e}")
+            try:
+                client.refresh_login(generation, headless=headless)
+            except Exception as refresh_error:
+                # 未安装 playwright、浏览器启动失败、登录超时等：本次改用浏览器搜索
+                logging.warning(f"刷新AMiner登录失败，改用浏览器搜索: {type(refresh_error).__name__}: {refresh_error}")
+                return None
+            profile_url = client.find_profile_url(matcher, teacher_org)
+    except aminer_client.SessionExpired as e:
+        logging.warning(f"重新登录后仍无法使用HTTP接口: {e}")
+        return None
+    except aminer_client.AMinerAPIError as e:
+        aminer_client.disable(str(e))
+        return None
+    except requests.RequestException as e:
+        logging.warning(f"HTTP搜索失败，改用浏览器: {e}")
+        return None
+    if not profile_url:
+        logging.warning("未找到匹配的教师")
+    return profile_url
+
+
+def _search_teacher_browser(matcher, teacher_org, headless=False):
+    """通过浏览器搜索（逐页加载搜索结果，取出姓名和机构后打分）"""
+    from playwright.sync_api import sync_playwright
+
+    cookies_path = "config/aminer_cookies.json"
+
     with sync_playwright() as playwright:
         browser = None
         context = None
@@ -92,42 +143,43 @@ def search_teacher(teacher_name, teacher_org, headless=False):
         try:
             cookies_exists = os.path.exists(cookies_path) and os.path.getsize(cookies_path) > 0
             
-            # 启动浏览器，优化启动参数
-            browser = playwright.chromium.launch(
-                headless=headless,
-                slow_mo=50 if not headless else 0,  # 无头模式下不需要减速
-                env={
-                    "SSL_CERT_FILE": certifi.where(),
-                    "REQUESTS_CA_BUNDLE": certifi.where()
-                },
-                ignore_default_args=["--disable-extensions"]
-            )
+            with span("aminer_launch"):
+                # 启动浏览器，优化启动参数
+                browser = playwright.chromium.launch(
+                    headless=headless,
+                    slow_mo=50 if not headless else 0,  # 无头模式下不需要减速
+                    env={
+                        "SSL_CERT_FILE": certifi.where(),
+                        "REQUESTS_CA_BUNDLE": certifi.where()
+                    },
+                    ignore_default_args=["--disable-extensions"]
+                )
             
-            # 创建浏览器上下文，如果cookies存在则加载
-            browser_context_params = {
-                # 禁用图片加载，可显著提高页面加载速度
-                "viewport": {"width": 1280, "height": 720},
-                "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
+                # 创建浏览器上下文，如果cookies存在则加载
+                browser_context_params = {
+                    # 禁用图片加载，可显著提高页面加载速度
+                    "viewport": {"width": 1280, "height": 720},
+                    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+                }
             
-            if cookies_exists:
-                try:
-                    browser_context_params["storage_state"] = cookies_path
-                    context = browser.new_context(**browser_context_params)
-                    logging.info("已加载登录状态")
-                except Exception:
+                if cookies_exists:
+                    try:
+                        browser_context_params["storage_state"] = cookies_path
+                        context = browser.new_context(**browser_context_params)
+                        logging.info("已加载登录状态")
+                    except Exception:
+                        context = browser.new_context(**browser_context_params)
+                else:
                     context = browser.new_context(**browser_context_params)
-            else:
-                context = browser.new_context(**browser_context_params)
             
-            # 配置更长的导航超时时间
-            context.set_default_navigation_timeout(60000)  # 增加到60秒
-            context.set_default_timeout(30000)  # 增加到30秒
+                # 配置更长的导航超时时间
+                context.set_default_navigation_timeout(60000)  # 增加到60秒
+                context.set_default_timeout(30000)  # 增加到30秒
             
-            # 禁用CSS，提高页面加载速度(仅在无头模式时)
-            if headless:
-                context.route("**/*.{png,jpg,jpeg,gif,webp}", lambda route: route.abort())
-                context.route("**/*.css", lambda route: route.abort())
+                # 禁用CSS，提高页面加载速度(仅在无头模式时)
+                if headless:
+                    context.route("**/*.{png,jpg,jpeg,gif,webp}", lambda route: route.abort())
+                    context.route("**/*.css", lambda route: route.abort())
             
             page = context.new_page()
             max_pages = 5
@@ -139,48 +191,54 @@ def search_teacher(teacher_name, teacher_org, headless=False):
             max_retries = 3
             retry_delay = 5  # 秒
             
-            for retry in range(max_retries):
-                try:
-                    page.goto("https://www.aminer.cn", wait_until="domcontentloaded")
-                    break
-                except Exception as e:
-                    if retry < max_retries - 1:
-                        logging.warning(f"访问AMiner失败，{retry_delay}秒后重试 ({retry + 1}/{max_retries}): {e}")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        raise Exception(f"多次尝试访问AMiner失败: {e}")
+            with span("aminer_navigation", page="home"):
+                for retry in range(max_retries):
+                    try:
+                        with slot(AMINER_HOST):
+                            page.goto("https://www.aminer.cn", wait_until="domcontentloaded")
+                        break
+                    except Exception as e:
+                        if retry < max_retries - 1:
+                            logging.warning(f"访问AMiner失败，{retry_delay}秒后重试 ({retry + 1}/{max_retries}): {e}")
+                            time.sleep(retry_delay)
+                            continue
+                        else:
+                            raise Exception(f"多次尝试访问AMiner失败: {e}")
             
-            # 检查登录状态
-            if not login_manager.check_login():
-                logging.info("需要手动登录...")
-                login_manager.manual_login()
-            else:
-                logging.info("已成功登录")
+            # 检查登录状态（包含人工扫码等待时间）
+            with span("aminer_login"):
+                if not login_manager.check_login():
+                    logging.info("需要手动登录...")
+                    login_manager.manual_login()
+                else:
+                    logging.info("已成功登录")
                 
-            logging.info(f"开始搜索 {teacher_name}...")
+            query = matcher.queries[0]
+            logging.info(f"开始搜索 {matcher.raw}（搜索词: {query}）...")
             
-            # 搜索页面访问也添加重试机制
-            for retry in range(max_retries):
-                try:
-                    page.goto(f"https://www.aminer.cn/search/person?q={teacher_name}", 
-                             wait_until="domcontentloaded", timeout=60000)
-                    break
-                except Exception as e:
-                    if retry < max_retries - 1:
-                        logging.warning(f"访问搜索页面失败，{retry_delay}秒后重试 ({retry + 1}/{max_retries}): {e}")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        raise Exception(f"多次尝试访问搜索页面失败: {e}")
+            with span("aminer_navigation", page="search"):
+                # 搜索页面访问也添加重试机制
+                for retry in range(max_retries):
+                    try:
+                        with slot(AMINER_HOST):
+                            page.goto(f"https://www.aminer.cn/search/person?q={query}",
+                                      wait_until="domcontentloaded", timeout=60000)
+                        break
+                    except Exception as e:
+                        if retry < max_retries - 1:
+                            logging.warning(f"访问搜索页面失败，{retry_delay}秒后重试 ({retry + 1}/{max_retries}): {e}")
+                            time.sleep(retry_delay)
+                            continue
+                        else:
+                            raise Exception(f"多次尝试访问搜索页面失败: {e}")
             
-            # 使用更高效的方法等待搜索结果
-            result_selector = ".a-aminer-components-expert-c-person-item-personItem"
+                # 使用更高效的方法等待搜索结果
+                result_selector = ".a-aminer-components-expert-c-person-item-personItem"
             
-            # 检查搜索结果是否存在
-            if not page.wait_for_selector(result_selector, state="attached", timeout=15000):
-                logging.warning("未找到搜索结果")
-                return ""
+                # 检查搜索结果是否存在
+                if not page.wait_for_selector(result_selector, state="attached", timeout=15000):
+                    logging.warning("未找到搜索结果")
+                    return ""
             
             # 使用更高效的方式获取最大页码
             max_pages_text = page.evaluate("""
@@ -202,73 +260,59 @@ def search_teacher(teacher_name, teacher_org, headless=False):
             
             # 遍历所有页面 - 使用更高效的方法
             while current_page <= max_pages:
-                logging.info(f"检查第 {current_page} 页")
+                # 每一页的结果匹配和翻页等待计为一次 aminer_pagination
+                with span("aminer_pagination"):
+                    logging.info(f"检查第 {current_page} 页")
                 
-                # 使用JavaScript直接在页面中查找匹配结果，提高效率
-                found = page.evaluate("""
-                    (params) => {
-                        const teacherOrg = params.teacherOrg;
-                        const orgAliases = params.orgAliases;
-                        const items = document.querySelectorAll('.a-aminer-components-expert-c-person-item-personItem');
-                        let foundLink = null;
-                        
-                        for (const item of items) {
-                            try {
+                    # 页面中只取出每条结果的姓名、机构和链接，匹配和打分在Python中进行
+                    items = page.evaluate("""
+                        () => {
+                            const results = [];
+                            const items = document.querySelectorAll('.a-aminer-components-expert-c-person-item-personItem');
+                            for (const item of items) {
                                 const nameElem = item.querySelector('.profileName .name');
-                                if (!nameElem) continue;
-                                
-                                const name = nameElem.textContent.trim();
-                                const orgElems = item.querySelectorAll('.person_info_item');
-                                
-                                for (const orgElem of orgElems) {
-                                    if (orgElem.innerHTML.includes('lacale')) {
-                                        const orgText = orgElem.textContent.toLowerCase();
-                                        
-                                        for (const alias of orgAliases) {
-                                            if (orgText.includes(alias.toLowerCase())) {
-                                                const link = item.querySelector('.person_name a');
-                                                if (link) {
-                                                    console.log(`找到匹配: ${name}, ${orgText}`);
-                                                    foundLink = link.getAttribute('href');
-                                                    return { name, foundLink };
-                                                }
-                                            }
-                                        }
-                                    }
+                                const link = item.querySelector('.person_name a');
+                                if (!nameElem || !link) continue;
+                                const orgTexts = [];
+                                for (const orgElem of item.querySelectorAll('.person_info_item')) {
+                                    if (orgElem.innerHTML.includes('lacale')) orgTexts.push(orgElem.textContent);
                                 }
-                            } catch (e) {
-                                continue;
+                                results.push({name: nameElem.textContent.trim(), org: orgTexts.join(' '),
+                                              href: link.getAttribute('href')});
                             }
+                            return results;
                         }
-                        return null;
-                    }
-                """, {"teacherOrg": teacher_org, "orgAliases": org_mapping.get(teacher_org, [teacher_org])})
+                    """) or []
+                    found, more = pick_best([(item["name"], item["org"], item) for item in items], teacher_org, matcher)
                 
-                if found and found.get('foundLink'):
-                    profile_url = found.get('foundLink')
+                    if found:
+                        profile_url = found["href"]
                     
-                    # 确保URL是完整的
-                    if not profile_url.startswith("http"):
-                        profile_url = "https://www.aminer.cn" + profile_url
+                        # 确保URL是完整的
+                        if not profile_url.startswith("http"):
+                            profile_url = "https://www.aminer.cn" + profile_url
                     
-                    logging.info(f"找到匹配: {found.get('name', '未知')}")
-                    return profile_url
+                        observe("aminer_search_pages", current_page, method="browser", result="found")
+                        logging.info(f"找到匹配: {found['name']}（检查了 {current_page} 页）")
+                        return profile_url
                 
-                # 检查是否有下一页
-                next_button = page.query_selector(".ant-pagination-next:not(.ant-pagination-disabled)")
-                if next_button:
-                    current_page += 1
-                    next_button.click()
-                    page.wait_for_load_state("domcontentloaded", timeout=8000)
+                    # 检查是否有下一页（本页的结果已经没有姓名相符的人时不再翻页）
+                    next_button = page.query_selector(".ant-pagination-next:not(.ant-pagination-disabled)") if more else None
+                    if next_button:
+                        current_page += 1
+                        with slot(AMINER_HOST):
+                            next_button.click()
+                            page.wait_for_load_state("domcontentloaded", timeout=8000)
                     
-                    # 更高效地等待搜索结果
-                    try:
-                        page.wait_for_selector(result_selector, timeout=8000)
-                    except Exception:
-                        pass
-                else:
-                    break
+                        # 更高效地等待搜索结果
+                        try:
+                            page.wait_for_selector(result_selector, timeout=8000)
+                        except Exception:
+                            pass
+                    else:
+                        break
             
+            observe("aminer_search_pages", current_page, method="browser", result="not_found")
             logging.warning("未找到匹配的教师")
             return ""
         except Exception as e:
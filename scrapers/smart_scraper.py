@@ -1,7 +1,10 @@
-from scrapegraphai.graphs import SmartScraperGraph
 import os
 import certifi
 import logging
+import textwrap
+
+from utils.metrics import observe, span
+from utils.politeness import slot
 
 
 # 环境变量设置
@@ -10,20 +13,31 @@ os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
 
 def scrape_profile(profile_url):
     """使用SmartScraperGraph爬取Aminer个人主页的详细信息"""
+    # scrapegraphai 会带入整个 LLM/langchain 依赖栈，导入耗时数秒，推迟到第一次爬取时
+    from scrapegraphai.graphs import SmartScraperGraph
+
     # 使用智能爬虫爬取
     try:
         logging.info(f"开始使用SmartScraperGraph爬取个人主页: {profile_url}")
-        
-        # 创建智能爬虫实例
+
+        # 网页只在抓取时占用其主机的访问名额，LLM抽取期间只占用LLM API的名额，
+        # 否则教师门户的并发上限（max_in_flight）会同时限制LLM调用的并发
+        html = fetch_page(profile_url)
+
+        # 创建智能爬虫实例（source 不是URL时 ScrapeGraphAI 把它当作网页内容）
+        # 提示词在每次调用中逐字节相同：ScrapeGraphAI 把它放在网页内容之前，
+        # 整段指令成为固定前缀，可以命中服务端的前缀缓存（DeepSeek 上下文缓存、本地服务的KV复用）
         smart_scraper = SmartScraperGraph(
-            prompt=scrape_prompt,
-            source=profile_url,
+            prompt=get_prompt(),
+            source=html,
             config=graph_config
         )
         
         # 执行爬取
         logging.info("执行SmartScraperGraph.run()...")
-        result = smart_scraper.run()
+        with slot(LLM_HOST):
+            result = smart_scraper.run()
+        _record_node_times(smart_scraper, profile_url)
         
         # 检查结果
         if result is None:
@@ -37,6 +51,56 @@ def scrape_profile(profile_url):
         logging.error(f"爬取个人主页 {profile_url} 失败:")
         raise e
 
+def fetch_page(profile_url):
+    """
+    抓取网页HTML，只在抓取期间占用该主机的访问名额
+
+    使用 ScrapeGraphAI 自己的 ChromiumLoader（与图中 Fetch 节点抓取URL时相同），
+    页面中由JS渲染的内容和 storage_state 中的AMiner登录状态都与原来一致
+    """
+    from scrapegraphai.docloaders import ChromiumLoader
+
+    source = "aminer" if "aminer.cn" in profile_url else "school"
+    loader = ChromiumLoader(
+        [profile_url],
+        headless=graph_config.get("headless", True),
+        storage_state=graph_config.get("storage_state"),
+    )
+    with span("page_fetch", source=source), slot(profile_url):
+        documents = loader.load()
+    if not documents or not documents[0].page_content:
+        raise RuntimeError(f"抓取网页失败: {profile_url}")
+    return documents[0].page_content
+
+
+def _record_node_times(graph, profile_url):
+    """
+    把ScrapeGraphAI各节点耗时（GenerateAnswer等=LLM抽取）和LLM的输入/输出token数记入指标；
+    网页由 fetch_page 预先抓取，Fetch 节点只是读入HTML，抓取耗时记在 page_fetch 阶段
+
+    ScrapeGraphAI 不使用流式输出，拿不到首个token的时间（TTFT），这里只能记录整个节点的耗时；
+    TTFT 和前缀缓存命中情况用 benchmarks/bench_prompt_prefix.py --live 直接调用API测量
+    """
+    source = "aminer" if "aminer.cn" in profile_url else "school"
+    try:
+        exec_info = graph.get_execution_info() or []
+    except Exception as e:
+        logging.debug(f"获取执行信息失败: {e}")
+        return
+    for info in exec_info:
+        node = info.get("node_name")
+        if not node or node == "TOTAL RESULT":
+            continue
+        if info.get("exec_time") is not None:
+            observe("scrape_node_duration_seconds", float(info["exec_time"]), source=source, node=node)
+        if info.get("prompt_tokens"):
+            observe("llm_prompt_tokens", float(info["prompt_tokens"]), source=source, node=node, variant=_prompt_variant)
+            observe("llm_completion_tokens", float(info.get("completion_tokens") or 0), source=source, node=node,
+                    variant=_prompt_variant)
+
+# LLM API 所在主机（用于按主机限速）
+LLM_HOST = "api.deepseek.com"
+
 # 爬虫的图配置
 graph_config = {
     "llm": {
@@ -50,7 +114,30 @@ graph_config = {
     "verbose": True,
 }
 
+# 当前使用的提示词变体（见 PROMPTS）
+_prompt_variant = "full"
+
+
+def set_prompt_variant(variant):
+    """选择提示词变体："full" 完整提示词（默认），"compact" 紧凑的字段结构 + 规则"""
+    global _prompt_variant
+    if variant not in PROMPTS:
+        raise ValueError(f"未知的提示词变体 {variant!r}，可选: {', '.join(PROMPTS)}")
+    _prompt_variant = variant
+
+
+def get_prompt(variant=None):
+    """返回提示词（模块加载时已规范化，每次调用返回同一个字符串）"""
+    return PROMPTS[variant or _prompt_variant]
+
+
+def _static_prompt(text):
+    """规范化提示词：去掉公共缩进、首尾空行和行尾空白，保证作为缓存前缀时逐字节稳定"""
+    return "\n".join(line.rstrip() for line in textwrap.dedent(text).strip().splitlines())
+
+
 # 智能爬虫的提示词（结构化数据提取）
+# 只能包含固定内容：不要拼接URL、教师姓名、日期等每次调用都不同的信息，否则前缀缓存失效
 scrape_prompt = """
 请严格按照JSON格式提取结构化以下信息，缺失字段为空字符串：
 
@@ -118,6 +205,27 @@ scrape_prompt = """
 最终输出必须是完整且语法正确的JSON对象！
 """
 
+# 紧凑提示词：字段结构只写类型占位，去掉格式示例，规则压缩为要点；输入token约为完整提示词的一半
+compact_prompt = """
+按以下JSON结构提取教师信息，只输出JSON，缺失的字符串填""、列表填[]：
+{"basic_info":{"name":"","title":[],"admin_role":[],"mentor_qualification":[],"honors":[]},
+"bio_details":{"birth_year":"","education":{"undergrad":"","master":"","phd":""},"work_experience":[]},
+"likes":0,
+"academic":{"research_fields":[],"publications":[{"title_cn":"","title_en":"","year":0,"journal":"","DOI":""}]}}
+规则：
+- title：教授/副教授/研究员/讲师；mentor_qualification：博导/硕导；admin_role：院长/系主任等；honors：院士/杰青等
+- education 每项 "YYYY-YYYY 学校全称 专业"（不含学院），本科<硕士<博士；work_experience 每项 "YYYY-YYYY 单位 职务"
+- birth_year 纯数字；找不到时取本科入学年-18 并加*，如 "1982*"
+- likes：头像下方的点赞数（int）
+- research_fields：具体的研究方向；publications：只选最具代表性的几篇（一作/二作或引用最高），宁缺毋滥
+- 英文论文 title_en 保留原标题，title_cn 必须给出中文翻译；时间冲突取页面最显眼位置的信息
+"""
+
+PROMPTS = {
+    "full": _static_prompt(scrape_prompt),
+    "compact": _static_prompt(compact_prompt),
+}
+
 # 单独测试智能爬虫
 if __name__ == "__main__":
     test_url = "https://www.aminer.cn/profile/haishan-chen/54491420dabfae1e04143cba"
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+教师数据统计分析模块
+
+把 Analysis.ipynb 中的统计逻辑整理为可复用的向量化函数：
+- 出生年份清洗：str.extract 一次性解析整列，带 * 的推断年份单独记为 birth_year_inferred 列
+- 年龄层级分组：pd.cut 按5年分箱
+- 点赞数排名：to_numeric + nlargest
+
+数据优先从列式数据集（utils.dataset，需要 pyarrow）读取，并在读取前增量更新；
+没有 pyarrow 时回退为流式读取JSON文件（utils.corpus_reader，只解析需要的字段）。
+
+用法：
+    python -m utils.analytics likes NUIST_teacher_data [--top 40]
+    python -m utils.analytics age NUIST_teacher_data [--exclude-inferred]
+"""
+from typing import Iterable, List, Optional, Tuple
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.corpus_reader import iter_records
+from utils.record_model import TeacherRecord
+
+# 年龄层级（从新到旧），"未知"放在最后
+GROUP_ORDER = ["95后", "90后", "85后", "80后", "75后", "70后", "65后", "60后", "60前", "未知"]
+# pd.cut 的分箱边界（左闭右开）：[1901,1960) 为60前，……，[1995,2000) 为95后
+_AGE_BINS = [1901, 1960, 1965, 1970, 1975, 1980, 1985, 1990, 1995, 2000]
+_AGE_LABELS = ["60前", "60后", "65后", "70后", "75后", "80后", "85后", "90后", "95后"]
+
+TEACHER_COLUMNS = ["teacher_id", "source", "likes", "birth_year_raw"]
+
+
+def _read_json_frame(data_dir: str) -> pd.DataFrame:
+    """没有列式数据集时的回退方案：流式读取JSON文件中需要的字段"""
+    rows = []
+    source = os.path.basename(os.path.normpath(data_dir))
+    for teacher_id, record in iter_records(data_dir, fields=["likes", "bio_details.birth_year"]):
+        birth_year = record["bio_details.birth_year"]
+        rows.append({
+            "teacher_id": teacher_id,
+            "source": source,
+            "likes": record["likes"],
+            "birth_year_raw": None if birth_year is None else str(birth_year),
+        })
+    return pd.DataFrame(rows, columns=TEACHER_COLUMNS)
+
+
+def records_frame(records: Iterable[Tuple[str, TeacherRecord]], source: str = "") -> pd.DataFrame:
+    """
+    由已加载到内存的记录对象（utils.record_model）生成教师表，不再重新读取文件
+
+    参数:
+        records: (teacher_id, TeacherRecord) 序列，例如 record_model.load_directory() 的结果
+        source: 数据来源名称（通常为输出目录名）
+    """
+    rows = []
+    for teacher_id, record in records:
+        bio_details = record.get('bio_details')
+        birth_year = bio_details.get('birth_year') if bio_details else None
+        rows.append({
+            "teacher_id": teacher_id,
+            "source": source,
+            "likes": record.get('likes'),
+            "birth_year_raw": None if birth_year is None else str(birth_year),
+        })
+    return pd.DataFrame(rows, columns=TEACHER_COLUMNS)
+
+
+def load_teachers(data_dirs: List[str], use_dataset: bool = True) -> pd.DataFrame:
+    """
+    读取一个或多个输出目录的教师表（teacher_id, source, likes, birth_year_raw）
+
+    参数:
+        data_dirs: 教师JSON输出目录列表（可来自多个学校）
+        use_dataset: 是否优先使用列式数据集（会先增量更新）
+    """
+    frames = []
+    for data_dir in data_dirs:
+        if use_dataset:
+            try:
+                from utils.dataset import build_dataset, load_table
+                build_dataset(data_dir)
+                frames.append(load_table(data_dir, "teachers", columns=TEACHER_COLUMNS))
+                continue
+            except ImportError:
+                logging.info("未安装 pyarrow，直接读取JSON文件")
+                use_dataset = False
+        frames.append(_read_json_frame(data_dir))
+    if not frames:
+        return pd.DataFrame(columns=TEACHER_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def clean_birth_year(raw: pd.Series) -> pd.DataFrame:
+    """
+    向量化清洗出生年份
+
+    返回:
+        pd.DataFrame: cleaned_year（可空整数）和 birth_year_inferred（是否为带*的推断值）两列
+    """
+    extracted = raw.astype("string").str.extract(r'(\d{4})(\*?)')
+    return pd.DataFrame({
+        "cleaned_year": pd.to_numeric(extracted[0], errors="coerce").astype("Int64"),
+        "birth_year_inferred": extracted[1].eq("*").fillna(False).astype(bool),
+    }, index=raw.index)
+
+
+def age_group(years: pd.Series) -> pd.Series:
+    """按5年分组，无效或超出范围的年份归为"未知\""""
+    groups = pd.cut(years.astype("float64"), bins=_AGE_BINS, right=False, labels=_AGE_LABELS)
+    return groups.cat.add_categories(["未知"]).fillna("未知").cat.reorder_categories(
+        list(reversed(_AGE_LABELS)) + ["未知"], ordered=True)
+
+
+def age_distribution(df: pd.DataFrame, include_inferred: bool = True) -> pd.DataFrame:
+    """
+    统计各年龄层级的教师人数
+
+    参数:
+        df: 至少包含 birth_year_raw 列的教师表
+        include_inferred: 是否把带*的推断年份计入各层级（否则计入"未知"）
+
+    返回:
+        pd.DataFrame: 以年龄层级为索引（按 GROUP_ORDER 排序），
+        包含 count（人数）和 inferred（其中推断年份的人数）两列
+    """
+    cleaned = clean_birth_year(df["birth_year_raw"])
+    years = cleaned["cleaned_year"]
+    if not include_inferred:
+        years = years.mask(cleaned["birth_year_inferred"])
+    groups = age_group(years)
+    counts = pd.DataFrame({
+        "count": groups.value_counts(sort=False),
+        "inferred": groups[cleaned["birth_year_inferred"].to_numpy()].value_counts(sort=False),
+    })
+    counts = counts.reindex(GROUP_ORDER, fill_value=0).astype(int)
+    counts.index.name = "age_group"
+    return counts
+
+
+def likes_top_n(df: pd.DataFrame, top_n: int = 40) -> pd.DataFrame:
+    """点赞数前 top_n 名（点赞数无法解析的教师不参与排名）"""
+    likes = pd.to_numeric(df["likes"], errors="coerce")
+    valid = df.assign(likes_numeric=likes).dropna(subset=["likes_numeric"])
+    top = valid.nlargest(top_n, "likes_numeric")
+    top = top.assign(likes_numeric=top["likes_numeric"].astype(np.int64))
+    return top[["teacher_id", "source", "likes_numeric"]].reset_index(drop=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="教师数据统计分析")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    likes_parser = subparsers.add_parser("likes", help="点赞数排名")
+    likes_parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录（可指定多个）")
+    likes_parser.add_argument("--top", type=int, default=40, help="显示前N名")
+    age_parser = subparsers.add_parser("age", help="年龄层级分布")
+    age_parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录（可指定多个）")
+    age_parser.add_argument("--exclude-inferred", action="store_true", help="不统计带*的推断出生年份")
+    for sub in (likes_parser, age_parser):
+        sub.add_argument("--no-dataset", action="store_true", help="不使用列式数据集，直接读取JSON")
+        sub.add_argument("--json", action="store_true", help="以JSON格式输出")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    df = load_teachers(args.data_dirs, use_dataset=not args.no_dataset)
+
+    if args.command == "likes":
+        result = likes_top_n(df, args.top)
+        if args.json:
+            print(result.to_json(orient="records", force_ascii=False))
+        else:
+            print(result.to_string(index=False))
+    else:
+        result = age_distribution(df, include_inferred=not args.exclude_inferred)
+        if args.json:
+            print(result.to_json(orient="index", force_ascii=False))
+        else:
+            print(result.to_string())
+            unknown_count = result.loc["未知", "count"]
+            if unknown_count > 0:
+                print(f"\n注意：有 {unknown_count} 位教师的出生年份未知或无法解析。")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+教师数据批量审计模块
+
+该模块对输出目录中已有的全部教师JSON文件做一次性审计：
+复用 check_data_quality 中的完整性规则，并补充结构和类型检查
+（出生年份格式、点赞数类型、教育经历时间顺序等），多进程并行处理，
+最终输出机器可读的审计报告和需要重新爬取的教师清单。
+
+用法：
+    python -m utils.audit_data NUIST_teacher_data [NJU_teacher_data ...] [--workers 4]
+"""
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import time
+
+from utils.check_data_quality import quality_issues
+
+# 出生年份：四位数字，推断值末尾带 *
+BIRTH_YEAR_RE = re.compile(r'^(\d{4})\*?$')
+# 教育经历：以 "YYYY-YYYY" 或 "YYYY-至今" 开头
+EDU_PERIOD_RE = re.compile(r'^\s*(\d{4})(?:\.\d{1,2})?\s*[-–~至]\s*(\d{4}|至今)?')
+
+REQUIRED_SECTIONS = ('basic_info', 'bio_details', 'likes', 'academic', 'data_sources')
+KNOWN_SECTIONS = set(REQUIRED_SECTIONS)
+LIST_FIELDS = ('title', 'mentor_qualification', 'honors')
+EDU_ORDER = ('undergrad', 'master', 'phd')
+
+# 小于该数量时直接在当前进程审计，避免进程池的启动开销
+PARALLEL_THRESHOLD = 256
+
+
+def _issue(severity: str, field: str, message: str) -> Dict:
+    """构造一条审计问题记录"""
+    return {"severity": severity, "field": field, "message": message}
+
+
+def _check_quality(data: Dict) -> List[Dict]:
+    """复用数据质量检查规则（不写日志，只收集原因；字段格式异常时记为一条问题）"""
+    return [_issue("quality", field, reason) for field, reason in quality_issues(data)]
+
+
+def _check_schema(data: Dict) -> List[Dict]:
+    """结构和类型检查"""
+    issues = []
+    current_year = datetime.date.today().year
+
+    for section in REQUIRED_SECTIONS:
+        if section not in data:
+            issues.append(_issue("error", section, "缺少顶层字段"))
+    for section in data:
+        if section not in KNOWN_SECTIONS:
+            issues.append(_issue("warning", section, "未知的顶层字段（可能放错了层级）"))
+
+    # 基本信息
+    basic_info = data.get('basic_info', {})
+    if not isinstance(basic_info, dict):
+        issues.append(_issue("error", "basic_info", f"类型应为dict，实际为{type(basic_info).__name__}"))
+        basic_info = {}
+    if not isinstance(basic_info.get('name', ''), str):
+        issues.append(_issue("error", "basic_info.name", "姓名应为字符串"))
+    for field in LIST_FIELDS:
+        value = basic_info.get(field, [])
+        if not isinstance(value, list):
+            issues.append(_issue("error", f"basic_info.{field}", f"类型应为list，实际为{type(value).__name__}"))
+        elif any(not isinstance(item, str) for item in value):
+            issues.append(_issue("error", f"basic_info.{field}", "列表元素应为字符串"))
+        elif value and not any(value):
+            issues.append(_issue("warning", f"basic_info.{field}", "列表只包含空字符串"))
+
+    # 出生年份
+    bio_details = data.get('bio_details', {})
+    if not isinstance(bio_details, dict):
+        issues.append(_issue("error", "bio_details", f"类型应为dict，实际为{type(bio_details).__name__}"))
+        bio_details = {}
+    birth_year = bio_details.get('birth_year', '')
+    if birth_year not in ('', None):
+        match = BIRTH_YEAR_RE.match(str(birth_year).strip())
+        if not isinstance(birth_year, str) or not match:
+            issues.append(_issue("error", "bio_details.birth_year", f"格式应为YYYY或YYYY*，实际为{birth_year!r}"))
+        elif not 1900 < int(match.group(1)) <= current_year:
+            issues.append(_issue("error", "bio_details.birth_year", f"年份超出合理范围: {birth_year}"))
+
+    # 教育经历时间顺序：本科<硕士<博士
+    education = bio_details.get('education', {})
+    if not isinstance(education, dict):
+        issues.append(_issue("error", "bio_details.education", f"类型应为dict，实际为{type(education).__name__}"))
+        education = {}
+    previous: Optional[Tuple[str, int]] = None
+    for stage in EDU_ORDER:
+        value = education.get(stage, '')
+        if not value:
+            continue
+        if not isinstance(value, str):
+            issues.append(_issue("error", f"bio_details.education.{stage}", "应为字符串"))
+            continue
+        match = EDU_PERIOD_RE.match(value)
+        if not match:
+            issues.append(_issue("warning", f"bio_details.education.{stage}", f"无法解析时间段: {value!r}"))
+            continue
+        start = int(match.group(1))
+        end = match.group(2)
+        if end and end.isdigit() and int(end) < start:
+            issues.append(_issue("error", f"bio_details.education.{stage}", f"结束年份早于开始年份: {value!r}"))
+        if previous and start < previous[1]:
+            issues.append(_issue("error", f"bio_details.education.{stage}",
+                                 f"入学年份 {start} 早于{previous[0]}入学年份 {previous[1]}"))
+        previous = (stage, start)
+
+    # 工作经历
+    work_experience = bio_details.get('work_experience', [])
+    if not isinstance(work_experience, list):
+        issues.append(_issue("error", "bio_details.work_experience", f"类型应为list，实际为{type(work_experience).__name__}"))
+    elif any(not isinstance(item, str) for item in work_experience):
+        issues.append(_issue("error", "bio_details.work_experience", "列表元素应为字符串"))
+
+    # 点赞数（bool 是 int 的子类，需要单独排除）
+    likes = data.get('likes')
+    if 'likes' in data and (not isinstance(likes, int) or isinstance(likes, bool)):
+        issues.append(_issue("error", "likes", f"类型应为int，实际为{type(likes).__name__}: {likes!r}"))
+    elif isinstance(likes, int) and likes < 0:
+        issues.append(_issue("error", "likes", f"点赞数为负数: {likes}"))
+
+    # 学术信息
+    academic = data.get('academic', {})
+    if not isinstance(academic, dict):
+        issues.append(_issue("error", "academic", f"类型应为dict，实际为{type(academic).__name__}"))
+        academic = {}
+    if not isinstance(academic.get('research_fields', []), list):
+        issues.append(_issue("error", "academic.research_fields", "类型应为list"))
+    publications = academic.get('publications', [])
+    if not isinstance(publications, list):
+        issues.append(_issue("error", "academic.publications", "类型应为list"))
+        publications = []
+    for i, pub in enumerate(publications):
+        if not isinstance(pub, dict):
+            issues.append(_issue("error", f"academic.publications[{i}]", f"条目应为dict，实际为{pub!r}"))
+            continue
+        if not (pub.get('title_cn') or pub.get('title_en') or pub.get('DOI')):
+            issues.append(_issue("warning", f"academic.publications[{i}]", "缺少标题和DOI"))
+        year = pub.get('year')
+        if year not in ('', None) and not isinstance(year, int) and not (isinstance(year, str) and year.isdigit()):
+            issues.append(_issue("error", f"academic.publications[{i}].year", f"年份格式错误: {year!r}"))
+        elif isinstance(year, str) and year:
+            issues.append(_issue("warning", f"academic.publications[{i}].year", f"年份应为int: {year!r}"))
+
+    # 数据来源
+    data_sources = data.get('data_sources', {})
+    if not isinstance(data_sources, dict) or not data_sources.get('school_url'):
+        issues.append(_issue("error", "data_sources.school_url", "缺少学校主页URL"))
+
+    return issues
+
+
+def audit_record(data: Any) -> List[Dict]:
+    """
+    审计单条教师记录
+
+    参数:
+        data: 教师数据字典
+
+    返回:
+        List[Dict]: 问题列表，每项包含 severity(error/warning/quality)、field、message
+    """
+    if not isinstance(data, dict):
+        return [_issue("error", "$", f"记录应为dict，实际为{type(data).__name__}")]
+    return _check_schema(data) + _check_quality(data)
+
+
+def audit_file(file_path: str) -> Dict:
+    """审计单个JSON文件，返回该文件的审计结果"""
+    result = {
+        "file": file_path,
+        "name": os.path.splitext(os.path.basename(file_path))[0],
+        "school_url": "",
+    }
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        issues = [_issue("error", "$", f"无法读取或解析JSON: {e}")]
+    else:
+        try:
+            issues = audit_record(data)
+        except Exception as e:
+            # 单条格式异常的记录不应中断整个审计
+            issues = [_issue("error", "$", f"审计记录时出错: {type(e).__name__}: {e}")]
+        if isinstance(data, dict) and isinstance(data.get('data_sources'), dict):
+            result["school_url"] = data['data_sources'].get('school_url', '')
+
+    result["issues"] = issues
+    result["errors"] = sum(1 for issue in issues if issue["severity"] == "error")
+    result["quality_passed"] = not any(issue["severity"] == "quality" for issue in issues)
+    result["passed"] = result["errors"] == 0 and result["quality_passed"]
+    return result
+
+
+def _audit_chunk(file_paths: List[str]) -> List[Dict]:
+    """子进程入口：审计一批文件"""
+    return [audit_file(path) for path in file_paths]
+
+
+def list_record_files(data_dirs: List[str]) -> List[str]:
+    """列出输出目录顶层的所有教师JSON文件（子目录中的快照、报告等不计入）"""
+    file_paths = []
+    for data_dir in data_dirs:
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith('.json'):
+                    file_paths.append(entry.path)
+    return sorted(file_paths)
+
+
+def audit_directories(data_dirs: List[str], workers: Optional[int] = None, chunk_size: int = 128) -> Dict:
+    """
+    并行审计一个或多个输出目录
+
+    参数:
+        data_dirs: 输出目录列表（可来自多个学校）
+        workers: 进程数，默认为CPU核数；设为1则在当前进程执行
+        chunk_size: 每个子任务处理的文件数
+
+    返回:
+        Dict: 审计报告，包含汇总信息和逐条记录结果
+    """
+    start_time = time.time()
+    file_paths = list_record_files(data_dirs)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(file_paths) < PARALLEL_THRESHOLD:
+        results = _audit_chunk(file_paths)
+    else:
+        chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_result in executor.map(_audit_chunk, chunks):
+                results.extend(chunk_result)
+
+    issue_counts: Dict[str, int] = {}
+    for result in results:
+        for issue in result["issues"]:
+            key = f"{issue['severity']}:{issue['field'].split('[')[0]}"
+            issue_counts[key] = issue_counts.get(key, 0) + 1
+
+    return {
+        "generated_at": datetime.datetime.now().isoformat(timespec='seconds'),
+        "data_dirs": list(data_dirs),
+        "summary": {
+            "total": len(results),
+            "passed": sum(1 for r in results if r["passed"]),
+            "with_errors": sum(1 for r in results if r["errors"]),
+            "quality_failed": sum(1 for r in results if not r["quality_passed"]),
+            "issue_counts": dict(sorted(issue_counts.items(), key=lambda item: -item[1])),
+            "elapsed_seconds": round(time.time() - start_time, 3),
+        },
+        "records": results,
+    }
+
+
+def build_worklist(report: Dict) -> List[Dict]:
+    """根据审计报告生成需要重新爬取的教师清单（存在错误或质量不合格的记录）"""
+    worklist = []
+    for record in report["records"]:
+        if record["passed"]:
+            continue
+        worklist.append({
+            "name": record["name"],
+            "url": record["school_url"],
+            "file": record["file"],
+            "reasons": [f"{issue['field']}: {issue['message']}"
+                        for issue in record["issues"] if issue["severity"] in ("error", "quality")],
+        })
+    # 错误多的排在前面
+    worklist.sort(key=lambda item: (-len(item["reasons"]), item["name"]))
+    return worklist
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量审计教师数据质量")
+    parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录（可指定多个）")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数，默认为CPU核数")
+    parser.add_argument("--report", default=None, help="审计报告输出路径，默认为 <第一个目录>/_audit/audit_report.json")
+    parser.add_argument("--worklist", default=None, help="重爬清单输出路径，默认为 <第一个目录>/_audit/rescrape_worklist.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    audit_dir = os.path.join(args.data_dirs[0], "_audit")
+    report_path = args.report or os.path.join(audit_dir, "audit_report.json")
+    worklist_path = args.worklist or os.path.join(audit_dir, "rescrape_worklist.json")
+
+    report = audit_directories(args.data_dirs, workers=args.workers)
+    worklist = build_worklist(report)
+
+    for path, payload in ((report_path, report), (worklist_path, worklist)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+    summary = report["summary"]
+    logging.info(f"共审计 {summary['total']} 条记录，通过 {summary['passed']} 条，"
+                 f"存在错误 {summary['with_errors']} 条，质量不合格 {summary['quality_failed']} 条，"
+                 f"耗时 {summary['elapsed_seconds']:.2f} 秒")
+    for key, count in list(summary["issue_counts"].items())[:10]:
+        logging.info(f"  {key}: {count}")
+    logging.info(f"审计报告已保存到 {report_path}")
+    logging.info(f"重爬清单（{len(worklist)} 位教师）已保存到 {worklist_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
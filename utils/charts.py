@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+统计图表批量渲染模块
+
+无界面（Agg 后端）重新生成 assets/ 下的标准图表：
+- 点赞数前40名.png
+- 教师年龄层次分布.png
+
+每张图的输入数据先在主进程中计算并求哈希，与 assets/.chart_cache.json 中记录的
+哈希一致且图片存在时跳过；需要重绘的图表分发到多个进程并行渲染。
+中文字体只在首次运行时探测一次，结果同样写入缓存文件，后续直接复用。
+
+用法：
+    python -m utils.charts NUIST_teacher_data [--out assets] [--force] [--workers 2]
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+
+from utils.analytics import load_teachers, likes_top_n, age_distribution
+
+CACHE_FILE_NAME = ".chart_cache.json"
+FONT_PREFERENCES = ['FangSong', 'SimHei', 'Microsoft YaHei', 'PingFang SC', 'Source Han Sans CN',
+                    'Noto Sans CJK SC', 'WenQuanYi Micro Hei']
+LIKES_TOP_N = 40
+
+
+# --- 缓存 ---
+
+def _load_cache(out_dir: str) -> Dict:
+    cache_path = os.path.join(out_dir, CACHE_FILE_NAME)
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(out_dir: str, cache: Dict) -> None:
+    cache_path = os.path.join(out_dir, CACHE_FILE_NAME)
+    with open(cache_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(cache_path + ".tmp", cache_path)
+
+
+def _data_hash(payload: Dict) -> str:
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def resolve_chinese_font(cache: Dict) -> Optional[str]:
+    """
+    解析可用的中文字体名，结果缓存在 cache["font"] 中
+
+    缓存的字体文件仍存在时直接使用，否则按 FONT_PREFERENCES 顺序重新探测一次
+    """
+    cached = cache.get("font")
+    if cached and cached.get("path") and os.path.exists(cached["path"]):
+        return cached["name"]
+
+    from matplotlib import font_manager as fm
+    for font_name in FONT_PREFERENCES:
+        try:
+            path = fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False)
+        except ValueError:
+            continue
+        cache["font"] = {"name": font_name, "path": path}
+        logging.info(f"找到字体 '{font_name}'，将用于显示中文。")
+        return font_name
+
+    logging.warning("警告：未能找到指定的任何中文字体。")
+    cache.pop("font", None)
+    return None
+
+
+# --- 渲染函数（在子进程中执行，只接收可序列化的数据） ---
+
+def _setup_pyplot(font_name: Optional[str]):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    if font_name:
+        plt.rcParams['font.sans-serif'] = [font_name]
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def render_likes_top(data: Dict, output_path: str, font_name: Optional[str]) -> str:
+    """绘制点赞数前N名条形图"""
+    plt = _setup_pyplot(font_name)
+    names, likes = data["names"], data["likes"]
+
+    fig = plt.figure(figsize=(24, 12))
+    bars = plt.bar(names, likes)
+    plt.title(f'教师主页点赞数前 {len(names)} 名(截至{data["date"]})', fontsize=28)
+    plt.ylabel('点赞数 (likes)', fontsize=22)
+    plt.xlabel('教师姓名', fontsize=24)
+    # 竖排文字刻度标签
+    plt.xticks(ticks=range(len(names)), labels=['\n'.join(list(name)) for name in names],
+               fontsize=26, linespacing=1.0)
+    plt.yticks(fontsize=24)
+    for bar in bars:
+        yval = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width() / 2.0, yval + 10, int(yval),
+                 va='bottom', ha='center', fontsize=20, fontweight='bold')
+    plt.tight_layout(pad=3.0)
+    fig.savefig(output_path)
+    plt.close(fig)
+    return output_path
+
+
+def render_age_distribution(data: Dict, output_path: str, font_name: Optional[str]) -> str:
+    """绘制教师年龄层级分布条形图（不含"未知"）"""
+    plt = _setup_pyplot(font_name)
+
+    fig = plt.figure(figsize=(14, 9))
+    bars = plt.bar(data["groups"], data["counts"])
+    plt.title('教师年龄层级分布', fontsize=24)
+    plt.ylabel('教师人数', fontsize=18)
+    plt.xlabel('年龄层级', fontsize=18)
+    plt.xticks(fontsize=16)
+    plt.yticks(fontsize=14)
+    for bar in bars:
+        yval = bar.get_height()
+        if yval > 0:
+            plt.text(bar.get_x() + bar.get_width() / 2.0, yval, int(yval),
+                     va='bottom', ha='center', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    return output_path
+
+
+def _render_job(job: Tuple[Callable, Dict, str, Optional[str]]) -> str:
+    """子进程入口"""
+    render, data, output_path, font_name = job
+    return render(data, output_path, font_name)
+
+
+# --- 图表数据 ---
+
+def likes_top_data(df) -> Dict:
+    top = likes_top_n(df, LIKES_TOP_N)
+    return {"names": top["teacher_id"].tolist(), "likes": [int(v) for v in top["likes_numeric"]]}
+
+
+def age_distribution_data(df) -> Dict:
+    counts = age_distribution(df)["count"].drop("未知", errors="ignore")
+    return {"groups": counts.index.tolist(), "counts": [int(v) for v in counts]}
+
+
+# 图表注册表：名称 -> (输出文件名, 数据函数, 渲染函数)
+CHARTS: Dict[str, Tuple[str, Callable, Callable]] = {
+    "likes_top": ("点赞数前40名.png", likes_top_data, render_likes_top),
+    "age_distribution": ("教师年龄层次分布.png", age_distribution_data, render_age_distribution),
+}
+
+
+def render_all(data_dirs: List[str], out_dir: str = "assets", force: bool = False,
+               workers: Optional[int] = None, charts: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    重新生成标准图表，输入数据未变化的图表会被跳过
+
+    参数:
+        data_dirs: 教师JSON输出目录列表
+        out_dir: 图片输出目录
+        force: 忽略缓存，全部重绘
+        workers: 并行进程数，默认为需要重绘的图表数
+        charts: 只渲染指定的图表（默认全部）
+
+    返回:
+        Dict[str, str]: {图表名: "rendered" 或 "skipped"}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cache = _load_cache(out_dir)
+    chart_hashes = cache.setdefault("charts", {})
+    df = load_teachers(data_dirs)
+
+    jobs, pending, status = [], [], {}
+    for name in charts or list(CHARTS):
+        filename, data_fn, render = CHARTS[name]
+        data = data_fn(df)
+        digest = _data_hash(data)
+        output_path = os.path.join(out_dir, filename)
+        if not force and chart_hashes.get(name) == digest and os.path.exists(output_path):
+            status[name] = "skipped"
+            continue
+        # 渲染参数（如日期）不参与哈希，只在数据变化时更新
+        today = datetime.date.today()
+        data["date"] = f"{today.year}年{today.month}月{today.day}日"
+        jobs.append((render, data, output_path, None))
+        pending.append((name, digest))
+
+    if jobs:
+        font_name = resolve_chinese_font(cache)
+        jobs = [(render, data, output_path, font_name) for render, data, output_path, _ in jobs]
+        workers = min(workers or len(jobs), len(jobs))
+        if workers == 1:
+            list(map(_render_job, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(_render_job, jobs))
+        for name, digest in pending:
+            chart_hashes[name] = digest
+            status[name] = "rendered"
+
+    _save_cache(out_dir, cache)
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="无界面批量渲染统计图表")
+    parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录（可指定多个）")
+    parser.add_argument("--out", default="assets", help="图片输出目录")
+    parser.add_argument("--force", action="store_true", help="忽略缓存，全部重绘")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数")
+    parser.add_argument("--chart", action="append", choices=list(CHARTS), help="只渲染指定图表（可重复）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    start_time = time.time()
+    status = render_all(args.data_dirs, out_dir=args.out, force=args.force, workers=args.workers, charts=args.chart)
+    for name, result in status.items():
+        logging.info(f"{CHARTS[name][0]}: {'已重绘' if result == 'rendered' else '数据未变化，跳过'}")
+    logging.info(f"耗时 {time.time() - start_time:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
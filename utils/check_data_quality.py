@@ -9,17 +9,20 @@
 from typing import Dict, List, Any, Tuple
 import logging
 
+from utils.record_model import as_dict
+
 
 def check_data(data: Dict) -> bool:
     """
     检查教师数据是否完整
     
     参数:
-        data: 教师数据字典
+        data: 教师数据字典（也可以是 record_model.TeacherRecord）
     
     返回:
         bool: 数据质量是否合格 (True为合格，False为不合格)
     """
+    data = as_dict(data)
     all_passed = True
     
     # 检查基本信息字段
@@ -111,6 +114,66 @@ def check_work_experience(work_experience: List[Dict]) -> Tuple[bool, str]:
     return True, ""
 
 
+# check_basic_info 会对这些字段取 len()
+_SIZED_BASIC_FIELDS = ('title', 'mentor_qualification', 'honors')
+
+
+def _is_sized(value: Any) -> bool:
+    return value is None or isinstance(value, (list, str))
+
+
+def quality_issues(data: Any) -> List[Tuple[str, str]]:
+    """
+    执行与 check_data 相同的检查，但不写日志，也不会因为字段格式异常抛出异常
+
+    LLM 抽取的结果可能格式异常（例如 basic_info 是字符串、title 是数字），
+    这里先校验字段类型，格式异常的部分记为一条问题，不再调用对应的检查函数。
+
+    参数:
+        data: 教师数据字典（也可以是 record_model.TeacherRecord）
+
+    返回:
+        List[Tuple[str, str]]: [(字段, 原因)]，为空表示合格
+    """
+    data = as_dict(data)
+    if not isinstance(data, dict):
+        return [("$", f"字段格式异常: 记录应为dict，实际为{type(data).__name__}")]
+    issues = []
+
+    basic_info = data.get('basic_info', {})
+    if not isinstance(basic_info, dict):
+        issues.append(('basic_info', f"字段格式异常: 应为dict，实际为{type(basic_info).__name__}"))
+    else:
+        malformed = [field for field in _SIZED_BASIC_FIELDS if not _is_sized(basic_info.get(field))]
+        if malformed:
+            issues.append(('basic_info', f"字段格式异常: {', '.join(malformed)} 应为列表"))
+        else:
+            passed, reason = check_basic_info(basic_info)
+            if not passed:
+                issues.append(('basic_info', reason))
+
+    bio_details = data.get('bio_details', {})
+    if not isinstance(bio_details, dict):
+        issues.append(('bio_details', f"字段格式异常: 应为dict，实际为{type(bio_details).__name__}"))
+        return issues
+    education = bio_details.get('education', {})
+    if not isinstance(education, dict):
+        issues.append(('bio_details', f"字段格式异常: education 应为dict，实际为{type(education).__name__}"))
+    else:
+        passed, reason = check_bio_details(bio_details)
+        if not passed:
+            issues.append(('bio_details', reason))
+
+    work_experience = bio_details.get('work_experience', [])
+    if not _is_sized(work_experience):
+        issues.append(('bio_details.work_experience', f"字段格式异常: 应为列表，实际为{type(work_experience).__name__}"))
+    else:
+        passed, reason = check_work_experience(work_experience)
+        if not passed:
+            issues.append(('bio_details.work_experience', reason))
+    return issues
+
+
 # 测试
 if __name__ == "__main__":
     test_data = {
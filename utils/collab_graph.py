@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+教师合作关系图模块
+
+同一篇论文（DOI相同，或规范化标题足够相似）出现在多位教师的 academic.publications 中，
+即视为这些教师之间存在合作。论文查找复用 utils.pub_dedup.PublicationIndex
+（DOI精确键 + 标题 MinHash/LSH），每篇论文只与同桶候选比较，整体接近线性，
+可以直接处理多个学校的合并语料。
+
+输出：
+- 边：教师—教师，权重为共同论文数，附若干篇论文标题作为示例
+- 节点：度、加权度（共同论文总数）、度中心性、局部聚类系数
+- 连通分量：规模、边数、总权重、密度、核心成员
+
+用法：
+    python -m utils.collab_graph NUIST_teacher_data [其他学校目录...] [--top 20] [--output graph.json]
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from itertools import combinations
+import argparse
+import json
+import logging
+import os
+import time
+
+from utils.corpus_reader import iter_records
+from utils.pub_dedup import DEFAULT_THRESHOLD, PublicationIndex
+
+# 每条边最多保留的示例论文标题数
+MAX_EDGE_PAPERS = 5
+
+NodeKey = Tuple[str, str]
+
+
+def node_id(key: NodeKey) -> str:
+    """节点的字符串标识：<数据来源>/<teacher_id>"""
+    return f"{key[0]}/{key[1]}"
+
+
+class CollaborationGraph:
+    """无向加权图，邻接表存储"""
+
+    def __init__(self):
+        self.names: Dict[NodeKey, str] = {}
+        self.adjacency: Dict[NodeKey, Dict[NodeKey, int]] = {}
+        self.edge_papers: Dict[Tuple[NodeKey, NodeKey], List[str]] = {}
+        self.shared_papers = 0
+
+    def add_node(self, key: NodeKey, name: str) -> None:
+        self.names[key] = name
+        self.adjacency.setdefault(key, {})
+
+    def add_paper(self, authors: Iterable[NodeKey], title: str) -> None:
+        """一篇论文被多位教师收录：两两之间的边权重加1"""
+        authors = sorted(set(authors))
+        if len(authors) < 2:
+            return
+        self.shared_papers += 1
+        for a, b in combinations(authors, 2):
+            self.adjacency[a][b] = self.adjacency[a].get(b, 0) + 1
+            self.adjacency[b][a] = self.adjacency[b].get(a, 0) + 1
+            papers = self.edge_papers.setdefault((a, b), [])
+            if len(papers) < MAX_EDGE_PAPERS and title:
+                papers.append(title)
+
+    def edges(self) -> List[Tuple[NodeKey, NodeKey, int]]:
+        """所有边 (a, b, 权重)，按权重降序"""
+        result = [(a, b, weight) for a, neighbors in self.adjacency.items()
+                  for b, weight in neighbors.items() if a < b]
+        result.sort(key=lambda edge: (-edge[2], edge[0], edge[1]))
+        return result
+
+    def clustering_coefficient(self, key: NodeKey) -> float:
+        """局部聚类系数：邻居之间实际存在的边数 / 可能的边数"""
+        neighbors = self.adjacency[key]
+        degree = len(neighbors)
+        if degree < 2:
+            return 0.0
+        links = sum(1 for u in neighbors for v in self.adjacency[u] if v in neighbors) / 2
+        return links / (degree * (degree - 1) / 2)
+
+    def node_stats(self) -> List[Dict]:
+        """各节点的度、加权度、度中心性和聚类系数，按加权度降序"""
+        n = len(self.adjacency)
+        stats = []
+        for key, neighbors in self.adjacency.items():
+            stats.append({
+                "id": node_id(key), "name": self.names.get(key, key[1]),
+                "degree": len(neighbors),
+                "strength": sum(neighbors.values()),
+                "degree_centrality": round(len(neighbors) / (n - 1), 4) if n > 1 else 0.0,
+                "clustering": round(self.clustering_coefficient(key), 4),
+            })
+        stats.sort(key=lambda item: (-item["strength"], -item["degree"], item["id"]))
+        return stats
+
+    def components(self) -> List[Dict]:
+        """至少包含两位教师的连通分量，按规模降序"""
+        seen: Set[NodeKey] = set()
+        result = []
+        for start, neighbors in self.adjacency.items():
+            if start in seen or not neighbors:
+                continue
+            members, stack = [], [start]
+            seen.add(start)
+            while stack:
+                key = stack.pop()
+                members.append(key)
+                for neighbor in self.adjacency[key]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        stack.append(neighbor)
+            edge_count = sum(len(self.adjacency[key]) for key in members) // 2
+            total_weight = sum(sum(self.adjacency[key].values()) for key in members) // 2
+            size = len(members)
+            hub = max(members, key=lambda key: (sum(self.adjacency[key].values()), key))
+            result.append({
+                "size": size, "edges": edge_count, "weight": total_weight,
+                "density": round(edge_count / (size * (size - 1) / 2), 4),
+                "hub": node_id(hub), "hub_name": self.names.get(hub, hub[1]),
+                "members": sorted(node_id(key) for key in members),
+            })
+        result.sort(key=lambda item: (-item["size"], -item["weight"], item["hub"]))
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "nodes": self.node_stats(),
+            "edges": [{"source": node_id(a), "target": node_id(b), "weight": weight,
+                       "papers": self.edge_papers.get((a, b), [])}
+                      for a, b, weight in self.edges()],
+            "components": self.components(),
+        }
+
+
+def build_graph(sources: Iterable[str], threshold: float = DEFAULT_THRESHOLD,
+                workers: int = 1) -> CollaborationGraph:
+    """
+    由一个或多个输出目录（或JSONL文件）构建合作关系图
+
+    参数:
+        sources: 输出目录或JSONL文件路径
+        threshold: 标题相似度阈值（同 pub_dedup）
+        workers: 读取语料的并行进程数
+
+    返回:
+        CollaborationGraph: 包含全部教师节点（含没有合作关系的教师）
+    """
+    graph = CollaborationGraph()
+    index = PublicationIndex(threshold=threshold)
+    # 论文条目 -> (示例标题, 收录该论文的教师)
+    papers: Dict[int, Tuple[str, Set[NodeKey]]] = {}
+
+    for source in sources:
+        source_name = (os.path.basename(os.path.normpath(source)) if os.path.isdir(source)
+                       else os.path.splitext(os.path.basename(source))[0])
+        records = iter_records(source, fields=["basic_info.name", "academic.publications"], workers=workers)
+        for teacher_id, record in records:
+            key = (source_name, teacher_id)
+            graph.add_node(key, str(record["basic_info.name"] or teacher_id))
+            pubs = record["academic.publications"]
+            for pub in pubs if isinstance(pubs, list) else []:
+                if not isinstance(pub, dict) or not (pub.get('title_en') or pub.get('title_cn') or pub.get('DOI')):
+                    continue
+                entry_id, _ = index.add_or_match(pub)
+                if entry_id not in papers:
+                    papers[entry_id] = (str(pub.get('title_en') or pub.get('title_cn') or pub.get('DOI')), set())
+                papers[entry_id][1].add(key)
+
+    for title, authors in papers.values():
+        graph.add_paper(authors, title)
+    return graph
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="根据共同收录的论文构建教师合作关系图")
+    parser.add_argument("sources", nargs="+", help="教师JSON输出目录或JSONL文件（可指定多个学校）")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="标题相似度阈值")
+    parser.add_argument("--top", type=int, default=20, help="打印加权度最高的前N位教师")
+    parser.add_argument("--workers", type=int, default=1, help="读取语料的并行进程数")
+    parser.add_argument("--output", default=None, help="完整结果输出路径（JSON）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    start_time = time.time()
+    graph = build_graph(args.sources, threshold=args.threshold, workers=args.workers)
+    edges = graph.edges()
+    components = graph.components()
+    connected = sum(component["size"] for component in components)
+    logging.info(f"教师 {len(graph.adjacency)} 位，共同论文 {graph.shared_papers} 篇，合作边 {len(edges)} 条，"
+                 f"有合作关系的教师 {connected} 位，连通分量 {len(components)} 个，"
+                 f"耗时 {time.time() - start_time:.2f} 秒")
+
+    print(f"\n加权度前 {args.top} 名：")
+    for item in [node for node in graph.node_stats() if node["degree"] > 0][:args.top]:
+        print(f"  {item['name']}（{item['id']}）: 合作者 {item['degree']} 位，共同论文 {item['strength']} 篇，"
+              f"度中心性 {item['degree_centrality']:.3f}，聚类系数 {item['clustering']:.2f}")
+    print("\n合作最多的教师对：")
+    for a, b, weight in edges[:args.top]:
+        print(f"  {graph.names[a]} — {graph.names[b]}: {weight} 篇")
+    print("\n连通分量：")
+    for component in components[:args.top]:
+        print(f"  规模 {component['size']}，边 {component['edges']}，密度 {component['density']:.2f}，"
+              f"核心成员 {component['hub_name']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(graph.to_dict(), f, ensure_ascii=False, indent=2)
+        logging.info(f"完整结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
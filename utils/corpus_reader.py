@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+流式语料读取模块
+
+逐条产出教师记录，内存占用与语料规模无关：
+- 数据源可以是输出目录（顶层的 <教师姓名>.json）或 JSONL 导出文件（每行一条记录）
+- 指定 fields（如 "likes"、"bio_details.birth_year"）时只保留这些字段；
+  对于较大的文件，安装了带C后端的 ijson 时按事件流增量解析，取齐所需字段后
+  立即停止，不会为了读 likes 而解析整个出版物列表
+- workers > 1 时多进程并行读取，同时在途的任务数有上限，结果仍按原顺序产出
+
+用法：
+    from utils.corpus_reader import iter_records
+    for teacher_id, record in iter_records("NUIST_teacher_data", fields=["likes", "bio_details.birth_year"]):
+        ...
+
+    python -m utils.corpus_reader NUIST_teacher_data --fields likes bio_details.birth_year [--workers 4]
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+
+try:
+    import ijson
+    # 纯Python后端比 json.loads 还慢，只在有C后端时启用增量解析
+    _STREAMING = ijson.backend in ("yajl2_c", "yajl2_cffi")
+except ImportError:
+    ijson = None
+    _STREAMING = False
+
+# 小文件整体解析更快（ijson 按 64KB 分块读取，小文件的早停收益不抵事件开销）
+STREAM_MIN_BYTES = 128 * 1024
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+# JSONL 每行记录中用于标识教师的字段（没有时使用 basic_info.name）
+ID_FIELD = "teacher_id"
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+# --- 字段投影 ---
+
+def project(data: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    从完整记录中取出指定字段
+
+    参数:
+        data: 完整的教师记录
+        fields: 字段路径列表，嵌套字段用 . 分隔
+
+    返回:
+        Dict[str, Any]: {字段路径: 值}，缺失的字段为 None
+    """
+    projected = {}
+    for field in fields:
+        value = data
+        for key in field.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                break
+        projected[field] = value
+    return projected
+
+
+def _build_value(first_event: str, first_value: Any, events: Iterator) -> Any:
+    """从 ijson 事件流中构建一个完整的对象或数组"""
+    builder = ijson.ObjectBuilder()
+    builder.event(first_event, first_value)
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                break
+    return builder.value
+
+
+def _stream_project(f, fields: Sequence[str]) -> Dict[str, Any]:
+    """增量解析文件，取齐所有字段后立即停止"""
+    projected = dict.fromkeys(fields)
+    remaining = set(fields)
+    events = ijson.parse(f, use_float=True)
+    for prefix, event, value in events:
+        if prefix not in remaining or event in ("map_key", "end_map", "end_array"):
+            continue
+        if event in ("start_map", "start_array"):
+            value = _build_value(event, value, events)
+        projected[prefix] = value
+        remaining.discard(prefix)
+        if not remaining:
+            break
+    return projected
+
+
+# --- 单个数据源的读取 ---
+
+def read_file(file_path: str, fields: Optional[Sequence[str]] = None) -> Record:
+    """
+    读取单个教师JSON文件
+
+    文件无法解析时记录警告，返回空记录（指定 fields 时各字段为 None），
+    与 Analysis.ipynb 原有的容错方式一致
+    """
+    teacher_id = os.path.splitext(os.path.basename(file_path))[0]
+    try:
+        with open(file_path, "rb") as f:
+            if fields is not None and _STREAMING and os.fstat(f.fileno()).st_size >= STREAM_MIN_BYTES:
+                return teacher_id, _stream_project(f, fields)
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"处理文件 {os.path.basename(file_path)} 时出错: {e}")
+        data = {}
+    except Exception as e:
+        if ijson is None or not isinstance(e, ijson.JSONError):
+            raise
+        logging.warning(f"处理文件 {os.path.basename(file_path)} 时出错: {e}")
+        data = {}
+    data = data if isinstance(data, dict) else {}
+    return teacher_id, data if fields is None else project(data, fields)
+
+
+def _parse_line(line: str, line_no: int, fields: Optional[Sequence[str]]) -> Optional[Record]:
+    """解析JSONL中的一行，空行返回 None"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        data = json.loads(line)
+    except ValueError as e:
+        logging.warning(f"第 {line_no} 行解析失败: {e}")
+        data = {}
+    data = data if isinstance(data, dict) else {}
+    basic_info = data.get("basic_info") if isinstance(data.get("basic_info"), dict) else {}
+    teacher_id = data.get(ID_FIELD) or basic_info.get("name") or f"line-{line_no}"
+    return str(teacher_id), data if fields is None else project(data, fields)
+
+
+def _read_files_chunk(args: Tuple[List[str], Optional[Sequence[str]]]) -> List[Record]:
+    """子进程入口：读取一批文件，只把投影后的结果传回主进程"""
+    file_paths, fields = args
+    return [read_file(file_path, fields) for file_path in file_paths]
+
+
+def _parse_lines_chunk(args: Tuple[List[Tuple[int, str]], Optional[Sequence[str]]]) -> List[Record]:
+    """子进程入口：解析一批JSONL行"""
+    lines, fields = args
+    records = (_parse_line(line, line_no, fields) for line_no, line in lines)
+    return [record for record in records if record is not None]
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _run_chunks(func, chunks: Iterator, workers: int, window: int) -> Iterator[Record]:
+    """
+    按顺序执行分块任务：workers 为1时在当前进程执行，
+    否则使用进程池，同时提交的分块不超过 window 个
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield from func(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(func, chunk))
+            if len(in_flight) >= window:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def list_record_files(data_dir: str) -> Iterator[str]:
+    """按文件名顺序列出输出目录顶层的教师JSON文件（_raw 等子目录不计入）"""
+    with os.scandir(data_dir) as entries:
+        names = sorted(entry.name for entry in entries if entry.is_file() and entry.name.endswith(".json"))
+    return (os.path.join(data_dir, name) for name in names)
+
+
+def _iter_jsonl_lines(file_path: str) -> Iterator[Tuple[int, str]]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from enumerate(f, start=1)
+
+
+# --- 对外接口 ---
+
+def iter_records(sources: Union[str, Sequence[str]], fields: Optional[Sequence[str]] = None,
+                 workers: int = 1, chunk_size: int = 64, window: Optional[int] = None) -> Iterator[Record]:
+    """
+    流式读取教师记录
+
+    参数:
+        sources: 输出目录或JSONL文件路径（可传入多个）
+        fields: 需要的字段路径（如 ["likes", "bio_details.birth_year"]），默认返回完整记录
+        workers: 并行进程数，1 表示在当前进程中读取
+        chunk_size: 每个子任务处理的文件数（或JSONL行数）
+        window: 最多同时在途的子任务数，默认为 workers 的2倍
+
+    返回:
+        Iterator[Tuple[str, Dict]]: (teacher_id, 记录)；指定 fields 时记录为 {字段路径: 值}
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    fields = list(fields) if fields is not None else None
+    window = window or max(2 * workers, 1)
+
+    for source in sources:
+        if os.path.isdir(source):
+            chunks = ((paths, fields) for paths in _chunked(list_record_files(source), chunk_size))
+            yield from _run_chunks(_read_files_chunk, chunks, workers, window)
+        elif source.endswith(JSONL_SUFFIXES):
+            chunks = ((lines, fields) for lines in _chunked(_iter_jsonl_lines(source), chunk_size))
+            yield from _run_chunks(_parse_lines_chunk, chunks, workers, window)
+        else:
+            raise ValueError(f"不支持的数据源（应为输出目录或 .jsonl 文件）: {source}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="流式读取教师语料，按字段投影后输出为JSONL")
+    parser.add_argument("sources", nargs="+", help="输出目录或JSONL文件（可指定多个）")
+    parser.add_argument("--fields", nargs="+", default=None, help="只输出这些字段（嵌套字段用 . 分隔）")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--count", action="store_true", help="只统计记录数，不输出内容")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    start_time = time.time()
+    count = 0
+    for teacher_id, record in iter_records(args.sources, fields=args.fields, workers=args.workers):
+        count += 1
+        if not args.count:
+            print(json.dumps({ID_FIELD: teacher_id, **record}, ensure_ascii=False))
+    logging.info(f"共读取 {count} 条记录，耗时 {time.time() - start_time:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
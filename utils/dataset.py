@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+列式数据集构建模块
+
+把输出目录中的教师JSON文件展开成5张列式表（Parquet格式）：
+teachers（教师）、education（教育经历）、work_experience（工作经历）、
+publications（论文）、research_fields（研究领域），保存在 <输出目录>/_dataset/ 下。
+
+构建是增量的：manifest.json 记录每个源文件的 mtime、大小和内容哈希，
+只有新增、修改或删除的文件才会重新展开，其余行直接沿用已有的Parquet表。
+分析时用 load_table 按需读取列（列裁剪），无需再逐个解析JSON。
+
+依赖 pyarrow（pip install pyarrow），读取为 DataFrame 时需要 pandas。
+
+用法：
+    python -m utils.dataset build NUIST_teacher_data [--hash]
+    python -m utils.dataset info NUIST_teacher_data
+"""
+from typing import Dict, List, Any, Optional, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+DATASET_DIR_NAME = "_dataset"
+MANIFEST_NAME = "manifest.json"
+# 数据结构有变化时递增，旧版本数据集会被整体重建
+SCHEMA_VERSION = 1
+
+TABLES = ("teachers", "education", "work_experience", "publications", "research_fields")
+
+# 各表的列定义：(列名, 类型)，类型对应 pyarrow 中的 string/int64/list<string>
+TABLE_COLUMNS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "teachers": (
+        ("teacher_id", "string"), ("source", "string"), ("name", "string"),
+        ("title", "list"), ("admin_role", "list"), ("mentor_qualification", "list"), ("honors", "list"),
+        ("birth_year_raw", "string"), ("birth_year", "int"), ("birth_year_inferred", "bool"),
+        ("likes", "int"), ("school_url", "string"), ("aminer_url", "string"),
+        ("publication_count", "int"), ("research_field_count", "int"),
+    ),
+    "education": (
+        ("teacher_id", "string"), ("stage", "string"), ("raw", "string"),
+        ("start_year", "int"), ("end_year", "int"), ("institution", "string"), ("major", "string"),
+    ),
+    "work_experience": (
+        ("teacher_id", "string"), ("seq", "int"), ("raw", "string"), ("start_year", "int"),
+        ("end_year", "int"), ("organization", "string"), ("position", "string"),
+    ),
+    "publications": (
+        ("teacher_id", "string"), ("seq", "int"), ("title_cn", "string"), ("title_en", "string"),
+        ("year", "int"), ("journal", "string"), ("doi", "string"),
+    ),
+    "research_fields": (
+        ("teacher_id", "string"), ("seq", "int"), ("field", "string"),
+    ),
+}
+
+_BIRTH_YEAR_RE = re.compile(r'(\d{4})')
+# "1991-1995 南京气象学院 天气动力学" / "2007-至今 南京信息工程大学 教授"
+_PERIOD_RE = re.compile(r'^\s*(\d{4})(?:[.\d]*)\s*(?:[-–~至]\s*(\d{4}|至今|今)?[.\d]*)?\s*(.*)$')
+
+
+def _pyarrow():
+    """延迟导入 pyarrow，缺失时给出明确提示"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("构建列式数据集需要 pyarrow，请先运行 pip install pyarrow") from e
+    return pyarrow, pyarrow.parquet
+
+
+def table_schema(table: str):
+    """返回某张表的 pyarrow Schema"""
+    pa, _ = _pyarrow()
+    types = {"string": pa.string(), "int": pa.int64(), "bool": pa.bool_(), "list": pa.list_(pa.string())}
+    return pa.schema([(name, types[kind]) for name, kind in TABLE_COLUMNS[table]])
+
+
+def dataset_dir_for(data_dir: str) -> str:
+    return os.path.join(data_dir, DATASET_DIR_NAME)
+
+
+# --- 记录展开 ---
+
+def _as_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _as_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+
+def _as_list(value: Any) -> List[str]:
+    """把列表或单个字符串统一为非空字符串列表"""
+    if isinstance(value, list):
+        return [str(item) for item in value if item]
+    if value:
+        return [str(value)]
+    return []
+
+
+def _parse_period(text: str) -> Tuple[Optional[int], Optional[int], List[str]]:
+    """解析 "YYYY-YYYY 单位 职务/专业" 格式，返回 (开始年份, 结束年份, 其余部分)"""
+    match = _PERIOD_RE.match(text)
+    if not match:
+        return None, None, text.split()
+    end = match.group(2)
+    end_year = int(end) if end and end.isdigit() else None
+    return int(match.group(1)), end_year, match.group(3).split()
+
+
+def flatten_record(teacher_id: str, data: Dict, source: str = "") -> Dict[str, List[Dict]]:
+    """
+    把一条教师记录展开为各表的行
+
+    参数:
+        teacher_id: 教师标识（文件名去掉扩展名）
+        data: 教师数据字典
+        source: 数据来源目录名（区分不同学校）
+
+    返回:
+        Dict[str, List[Dict]]: {表名: 行列表}
+    """
+    rows: Dict[str, List[Dict]] = {table: [] for table in TABLES}
+    if not isinstance(data, dict):
+        return rows
+
+    basic_info = data.get('basic_info') if isinstance(data.get('basic_info'), dict) else {}
+    bio_details = data.get('bio_details') if isinstance(data.get('bio_details'), dict) else {}
+    academic = data.get('academic') if isinstance(data.get('academic'), dict) else {}
+    data_sources = data.get('data_sources') if isinstance(data.get('data_sources'), dict) else {}
+
+    birth_year_raw = _as_text(bio_details.get('birth_year'))
+    birth_match = _BIRTH_YEAR_RE.search(birth_year_raw) if birth_year_raw else None
+    publications = academic.get('publications') if isinstance(academic.get('publications'), list) else []
+    research_fields = _as_list(academic.get('research_fields'))
+
+    rows["teachers"].append({
+        "teacher_id": teacher_id,
+        "source": source,
+        "name": _as_text(basic_info.get('name')),
+        "title": _as_list(basic_info.get('title')),
+        "admin_role": _as_list(basic_info.get('admin_role')),
+        "mentor_qualification": _as_list(basic_info.get('mentor_qualification')),
+        "honors": _as_list(basic_info.get('honors')),
+        "birth_year_raw": birth_year_raw,
+        "birth_year": int(birth_match.group(1)) if birth_match else None,
+        "birth_year_inferred": bool(birth_year_raw and '*' in birth_year_raw),
+        "likes": _as_int(data.get('likes')),
+        "school_url": _as_text(data_sources.get('school_url')),
+        "aminer_url": _as_text(data_sources.get('aminer_url')),
+        "publication_count": sum(1 for pub in publications if isinstance(pub, dict)),
+        "research_field_count": len(research_fields),
+    })
+
+    education = bio_details.get('education') if isinstance(bio_details.get('education'), dict) else {}
+    for stage in ('undergrad', 'master', 'phd'):
+        raw = education.get(stage)
+        if not raw or not isinstance(raw, str):
+            continue
+        start_year, end_year, rest = _parse_period(raw)
+        rows["education"].append({
+            "teacher_id": teacher_id, "stage": stage, "raw": raw,
+            "start_year": start_year, "end_year": end_year,
+            "institution": rest[0] if rest else None,
+            "major": " ".join(rest[1:]) if len(rest) > 1 else None,
+        })
+
+    # 兼容工作经历被放在顶层的旧数据
+    work_experience = bio_details.get('work_experience', data.get('work_experience'))
+    for seq, raw in enumerate(work_experience if isinstance(work_experience, list) else []):
+        if not raw or not isinstance(raw, str):
+            continue
+        start_year, end_year, rest = _parse_period(raw)
+        rows["work_experience"].append({
+            "teacher_id": teacher_id, "seq": seq, "raw": raw,
+            "start_year": start_year, "end_year": end_year,
+            "organization": rest[0] if rest else None,
+            "position": " ".join(rest[1:]) if len(rest) > 1 else None,
+        })
+
+    for seq, pub in enumerate(publications):
+        if not isinstance(pub, dict):
+            continue
+        rows["publications"].append({
+            "teacher_id": teacher_id, "seq": seq,
+            "title_cn": _as_text(pub.get('title_cn')), "title_en": _as_text(pub.get('title_en')),
+            "year": _as_int(pub.get('year')), "journal": _as_text(pub.get('journal')),
+            "doi": _as_text(pub.get('DOI')),
+        })
+
+    for seq, field in enumerate(research_fields):
+        rows["research_fields"].append({"teacher_id": teacher_id, "seq": seq, "field": field})
+
+    return rows
+
+
+# --- 增量构建 ---
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _load_manifest(dataset_dir: str) -> Dict:
+    manifest_path = os.path.join(dataset_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        return {}
+    return manifest
+
+
+def scan_changes(data_dir: str, files_manifest: Dict[str, Dict], use_hash: bool
+                  ) -> Tuple[Dict[str, Dict], List[str], List[str]]:
+    """
+    对比源文件与 manifest
+
+    返回:
+        (新的文件清单, 需要重新展开的文件名列表, 已删除的文件名列表)
+    """
+    new_manifest: Dict[str, Dict] = {}
+    changed = []
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith('.json'):
+                continue
+            stat = entry.stat()
+            old = files_manifest.get(entry.name)
+            info = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            if old and not use_hash and old["mtime_ns"] == info["mtime_ns"] and old["size"] == info["size"]:
+                new_manifest[entry.name] = old
+                continue
+            info["sha1"] = _file_hash(entry.path)
+            if old and old.get("sha1") == info["sha1"]:
+                # 内容未变（例如只是被touch过），只更新时间戳
+                new_manifest[entry.name] = info
+                continue
+            new_manifest[entry.name] = info
+            changed.append(entry.name)
+    removed = [name for name in files_manifest if name not in new_manifest]
+    return new_manifest, sorted(changed), removed
+
+
+def _write_table_atomic(table, path: str) -> None:
+    _, pq = _pyarrow()
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def build_dataset(data_dir: str, use_hash: bool = False, rebuild: bool = False) -> Dict[str, Any]:
+    """
+    增量构建（或更新）列式数据集
+
+    参数:
+        data_dir: 教师JSON输出目录
+        use_hash: 是否对所有文件计算内容哈希（默认只在 mtime/大小变化时计算）
+        rebuild: 忽略已有数据集，全量重建
+
+    返回:
+        Dict: 构建统计信息（变化文件数、各表行数、耗时）
+    """
+    pa, pq = _pyarrow()
+    start_time = time.time()
+    dataset_dir = dataset_dir_for(data_dir)
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    manifest = {} if rebuild else _load_manifest(dataset_dir)
+    files_manifest = manifest.get("files", {})
+    table_paths = {table: os.path.join(dataset_dir, f"{table}.parquet") for table in TABLES}
+    if any(not os.path.exists(path) for path in table_paths.values()):
+        files_manifest = {}
+
+    new_files, changed, removed = scan_changes(data_dir, files_manifest, use_hash)
+    stale_ids = {os.path.splitext(name)[0] for name in changed + removed}
+    source = os.path.basename(os.path.normpath(data_dir))
+
+    new_rows: Dict[str, List[Dict]] = {table: [] for table in TABLES}
+    for filename in changed:
+        teacher_id = os.path.splitext(filename)[0]
+        try:
+            with open(os.path.join(data_dir, filename), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"跳过无法解析的文件 {filename}: {e}")
+            new_files.pop(filename, None)
+            continue
+        for table, rows in flatten_record(teacher_id, data, source).items():
+            new_rows[table].extend(rows)
+
+    row_counts = {}
+    if changed or removed or not files_manifest:
+        for table in TABLES:
+            schema = table_schema(table)
+            parts = []
+            if files_manifest and os.path.exists(table_paths[table]):
+                existing = pq.read_table(table_paths[table]).cast(schema)
+                if stale_ids:
+                    import pyarrow.compute as pc
+                    keep = pc.invert(pc.is_in(existing["teacher_id"], value_set=pa.array(sorted(stale_ids))))
+                    existing = existing.filter(keep)
+                parts.append(existing)
+            parts.append(pa.Table.from_pylist(new_rows[table], schema=schema))
+            combined = pa.concat_tables(parts).sort_by([("teacher_id", "ascending")])
+            _write_table_atomic(combined, table_paths[table])
+            row_counts[table] = combined.num_rows
+    else:
+        for table in TABLES:
+            row_counts[table] = pq.ParquetFile(table_paths[table]).metadata.num_rows
+
+    manifest = {"schema_version": SCHEMA_VERSION, "source": source, "files": new_files,
+                "row_counts": row_counts, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    manifest_path = os.path.join(dataset_dir, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    return {"changed": len(changed), "removed": len(removed), "row_counts": row_counts,
+            "elapsed_seconds": round(time.time() - start_time, 3)}
+
+
+# --- 读取 ---
+
+def load_arrow_table(data_dir: str, table: str, columns: Optional[List[str]] = None, filters=None):
+    """读取某张表为 pyarrow.Table，columns 指定需要的列（列裁剪），filters 为 Parquet 过滤条件"""
+    if table not in TABLES:
+        raise ValueError(f"未知的表: {table}，可选: {', '.join(TABLES)}")
+    _, pq = _pyarrow()
+    path = os.path.join(dataset_dir_for(data_dir), f"{table}.parquet")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"数据集不存在: {path}，请先运行 python -m utils.dataset build {data_dir}")
+    return pq.read_table(path, columns=columns, filters=filters)
+
+
+def load_table(data_dir: str, table: str, columns: Optional[List[str]] = None, filters=None):
+    """
+    读取某张表为 pandas.DataFrame
+
+    示例:
+        df = load_table("NUIST_teacher_data", "teachers", columns=["name", "likes"])
+    """
+    import pandas as pd
+    pa, _ = _pyarrow()
+    # 整数列使用可空整数类型，避免缺失值把年份等列变成浮点数
+    types_mapper = {pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype()}.get
+    return load_arrow_table(data_dir, table, columns, filters).to_pandas(types_mapper=types_mapper)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="教师数据列式数据集工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="增量构建/更新数据集")
+    build_parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录（可指定多个）")
+    build_parser.add_argument("--hash", action="store_true", help="对所有文件计算内容哈希（更严格，稍慢）")
+    build_parser.add_argument("--rebuild", action="store_true", help="全量重建")
+    info_parser = subparsers.add_parser("info", help="查看数据集信息")
+    info_parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    for data_dir in args.data_dirs:
+        if args.command == "build":
+            stats = build_dataset(data_dir, use_hash=args.hash, rebuild=args.rebuild)
+            logging.info(f"{data_dir}: 变化 {stats['changed']} 个文件，删除 {stats['removed']} 个，"
+                         f"耗时 {stats['elapsed_seconds']:.2f} 秒")
+        else:
+            stats = {"row_counts": _load_manifest(dataset_dir_for(data_dir)).get("row_counts", {})}
+        for table, count in stats["row_counts"].items():
+            logging.info(f"  {table}: {count} 行")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+研究领域归一化与聚类模块
+
+research_fields 是大模型抽取的自由文本，同一方向常有多种写法
+（如“陆面过程与气候模拟”“陆面过程及其气候效应模拟”）。本模块一次性处理全库的研究领域：
+1. 规范化（NFKC、小写、去标点）后按出现次数去重
+2. 字符 2/3-gram 的 TF-IDF 向量（scipy.sparse CSR，次线性词频 + L2 归一化）
+3. 分块稀疏矩阵乘法求候选相似对：每个字符串只用其中最罕见的几个 n-gram 生成候选
+   （前缀过滤），避免常见片段（如“气候”）产生平方级的候选；
+   候选对再用完整向量计算精确余弦相似度
+4. 每个字符串指向相似度最高、且出现次数更多的字符串（不低于阈值），
+   形成森林，树根即规范主题（该主题下最常见的写法）
+
+全过程为向量化的矩阵运算，没有逐对的字符串比较；结果保存为映射表
+<输出目录>/_topics/field_topics.csv（原始写法 -> 规范主题）。
+
+依赖 numpy 和 scipy。
+
+用法：
+    python -m utils.field_topics build NUIST_teacher_data [--threshold 0.6] [--output path.csv]
+    python -m utils.field_topics show NUIST_teacher_data [--min-variants 2]
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import csv
+import logging
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+
+from utils.corpus_reader import iter_records
+
+TOPICS_DIR_NAME = "_topics"
+MAPPING_FILE_NAME = "field_topics.csv"
+MAPPING_COLUMNS = ["field", "normalized", "count", "topic_id", "topic", "parent", "similarity"]
+
+DEFAULT_THRESHOLD = 0.6
+NGRAM_RANGE = (2, 3)
+# 每个字符串只用文档频率最低的若干个 n-gram 生成候选
+PREFIX_NGRAMS = 8
+# 每个 n-gram 只和出现次数最多的若干个字符串构成候选（父节点只会是更常见的写法），
+# 保证每个字符串的候选数有上限，整体随语料规模线性增长
+MAX_POSTINGS = 64
+# 每个字符串只对共享前缀 n-gram 最多的若干个候选计算精确余弦相似度
+MAX_CANDIDATES = 16
+# 每次稀疏矩阵乘法处理的行数，控制峰值内存
+BLOCK_ROWS = 2048
+
+_NON_WORD_RE = re.compile(r'[\W_]+', re.UNICODE)
+_CJK_BOUNDARY_RE = re.compile(r'(?<=[一-鿿]) (?=[一-鿿])')
+
+
+def _sparse():
+    """延迟导入 scipy，缺失时给出明确提示"""
+    try:
+        import scipy.sparse
+    except ImportError as e:
+        raise ImportError("研究领域聚类需要 scipy，请先运行 pip install scipy") from e
+    return scipy.sparse
+
+
+def normalize_field(field: str) -> str:
+    """规范化研究领域：NFKC、小写，标点统一为空格，去掉汉字之间的空格"""
+    text = _NON_WORD_RE.sub(' ', unicodedata.normalize('NFKC', field).lower()).strip()
+    return _CJK_BOUNDARY_RE.sub('', text)
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> List[str]:
+    """字符 n-gram（两端加空格，短字符串至少保留自身）"""
+    padded = f" {text} "
+    grams = [padded[i:i + n] for n in range(ngram_range[0], ngram_range[1] + 1)
+             for i in range(len(padded) - n + 1)]
+    return grams or [padded]
+
+
+def collect_fields(sources: Iterable[str], workers: int = 1) -> Dict[str, Dict[str, int]]:
+    """
+    统计全库研究领域
+
+    返回:
+        Dict[str, Dict[str, int]]: {规范化写法: {原始写法: 出现次数}}
+    """
+    variants: Dict[str, Dict[str, int]] = {}
+    for source in sources:
+        for _, record in iter_records(source, fields=["academic.research_fields"], workers=workers):
+            fields = record["academic.research_fields"]
+            for field in fields if isinstance(fields, list) else [fields] if fields else []:
+                field = str(field).strip()
+                normalized = normalize_field(field)
+                if not normalized:
+                    continue
+                raw_counts = variants.setdefault(normalized, {})
+                raw_counts[field] = raw_counts.get(field, 0) + 1
+    return variants
+
+
+def tfidf_matrix(texts: List[str]):
+    """
+    构建 L2 归一化的字符 n-gram TF-IDF 矩阵
+
+    返回:
+        (scipy.sparse.csr_matrix, np.ndarray): 矩阵（行=字符串）和各列的文档频率
+    """
+    sp = _sparse()
+    vocabulary: Dict[str, int] = {}
+    indices: List[int] = []
+    indptr = [0]
+    for text in texts:
+        indices.extend(vocabulary.setdefault(gram, len(vocabulary)) for gram in char_ngrams(text))
+        indptr.append(len(indices))
+
+    counts = sp.csr_matrix((np.ones(len(indices), dtype=np.float32), np.asarray(indices, dtype=np.int64),
+                            np.asarray(indptr, dtype=np.int64)), shape=(len(texts), len(vocabulary)))
+    counts.sum_duplicates()
+    df = np.bincount(counts.indices, minlength=len(vocabulary))
+    idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+    matrix = counts.copy()
+    matrix.data = (1 + np.log(matrix.data)) * idf[matrix.indices]
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sp.diags((1 / norms).astype(np.float32)) @ matrix
+    return matrix.tocsr(), df
+
+
+def _row_dots(matrix, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """计算若干行对之间的点积（即余弦相似度）"""
+    return np.asarray(matrix[rows].multiply(matrix[cols]).sum(axis=1)).ravel()
+
+
+def prefix_matrix(matrix, df: np.ndarray, prefix_size: int = PREFIX_NGRAMS):
+    """
+    每行只保留文档频率最低的 prefix_size 个 n-gram（取值为1），用于生成候选
+
+    高度相似的字符串共享大部分 n-gram，其中最罕见的几个也几乎必然相同；
+    而常见片段只会出现在短字符串的前缀里，候选规模不会随语料平方增长
+    """
+    sp = _sparse()
+    n = matrix.shape[0]
+    row_ids = np.repeat(np.arange(n), np.diff(matrix.indptr))
+    order = np.lexsort((matrix.indices, df[matrix.indices], row_ids))
+    rank_in_row = np.arange(len(order)) - matrix.indptr[row_ids[order]]
+    selected = order[rank_in_row < prefix_size]
+    return sp.csr_matrix((np.ones(len(selected), dtype=np.float32), (row_ids[selected], matrix.indices[selected])),
+                         shape=matrix.shape)
+
+
+def _truncate_rows(matrix, limit: int):
+    """每行只保留列号最小的 limit 个非零元素"""
+    sp = _sparse()
+    matrix.sort_indices()
+    row_ids = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    keep = (np.arange(len(row_ids)) - matrix.indptr[row_ids]) < limit
+    return sp.csr_matrix((matrix.data[keep], (row_ids[keep], matrix.indices[keep])), shape=matrix.shape)
+
+
+def assign_parents(matrix, df: np.ndarray, threshold: float = DEFAULT_THRESHOLD,
+                   prefix_size: int = PREFIX_NGRAMS, max_postings: int = MAX_POSTINGS,
+                   max_candidates: int = MAX_CANDIDATES, block_rows: int = BLOCK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    为每一行找到相似度最高、且排序更靠前（出现次数更多）的行
+
+    参数:
+        matrix: tfidf_matrix 返回的矩阵，行已按出现次数降序排列
+        df: 各列文档频率
+        threshold: 余弦相似度阈值
+        prefix_size: 每个字符串用于生成候选的 n-gram 数
+        max_postings: 每个 n-gram 最多关联的候选父节点数
+        max_candidates: 每个字符串最多计算精确相似度的候选数
+
+    返回:
+        (parent, similarity): 没有满足条件的行 parent 为自身、similarity 为 1
+    """
+    n = matrix.shape[0]
+    parent = np.arange(n)
+    similarity = np.ones(n, dtype=np.float32)
+
+    candidates = prefix_matrix(matrix, df, prefix_size)
+    candidates_t = _truncate_rows(candidates.T.tocsr(), max_postings)
+
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        # 只需要列号小于行号的候选（更常见的写法）
+        product = (candidates[start:stop] @ candidates_t).tocoo()
+        rows = product.row + start
+        cols = product.col
+        shared = product.data
+        mask = cols < rows
+        rows, cols, shared = rows[mask], cols[mask], shared[mask]
+        if not len(rows):
+            continue
+        # 每行只对共享前缀 n-gram 最多的若干个候选计算精确相似度
+        order = np.lexsort((cols, -shared, rows))
+        rows, cols = rows[order], cols[order]
+        row_starts = np.r_[0, np.flatnonzero(rows[1:] != rows[:-1]) + 1]
+        rank_in_row = np.arange(len(rows)) - np.repeat(row_starts, np.diff(np.r_[row_starts, len(rows)]))
+        rows, cols = rows[rank_in_row < max_candidates], cols[rank_in_row < max_candidates]
+        sims = _row_dots(matrix, rows, cols)
+        mask = sims >= threshold
+        rows, cols, sims = rows[mask], cols[mask], sims[mask]
+        if not len(rows):
+            continue
+        # 每行取相似度最高的候选（相同时取更常见的）
+        order = np.lexsort((cols, -sims, rows))
+        rows, cols, sims = rows[order], cols[order], sims[order]
+        first = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        parent[rows[first]] = cols[first]
+        similarity[rows[first]] = sims[first]
+    return parent, similarity
+
+
+def _find_roots(parent: np.ndarray) -> np.ndarray:
+    """指针跳跃求每个节点的树根（parent 总是指向更小的下标，必然收敛）"""
+    roots = parent.copy()
+    while True:
+        next_roots = roots[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+
+def build_topics(variants: Dict[str, Dict[str, int]], threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    聚类并生成映射表
+
+    参数:
+        variants: collect_fields 的结果
+        threshold: 余弦相似度阈值，越高主题越细
+
+    返回:
+        List[Dict]: 映射表的行，每个原始写法一行（列见 MAPPING_COLUMNS）
+    """
+    totals = {normalized: sum(raw_counts.values()) for normalized, raw_counts in variants.items()}
+    # 出现次数多、较短的写法排在前面，作为规范主题的优先候选
+    texts = sorted(totals, key=lambda text: (-totals[text], len(text), text))
+    if not texts:
+        return []
+    matrix, df = tfidf_matrix(texts)
+    parent, similarity = assign_parents(matrix, df, threshold)
+    roots = _find_roots(parent)
+
+    # 规范主题使用树根最常见的原始写法
+    display = {text: max(variants[text].items(), key=lambda item: (item[1], -len(item[0])))[0] for text in texts}
+    _, topic_ids = np.unique(roots, return_inverse=True)
+    rows = []
+    for i, text in enumerate(texts):
+        for field, count in sorted(variants[text].items(), key=lambda item: -item[1]):
+            rows.append({
+                "field": field, "normalized": text, "count": count,
+                "topic_id": int(topic_ids[i]), "topic": display[texts[roots[i]]],
+                "parent": display[texts[parent[i]]], "similarity": round(float(similarity[i]), 4),
+            })
+    return rows
+
+
+def topics_path_for(data_dir: str) -> str:
+    return os.path.join(data_dir, TOPICS_DIR_NAME, MAPPING_FILE_NAME)
+
+
+def save_mapping(rows: List[Dict], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MAPPING_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(path + ".tmp", path)
+
+
+def load_mapping(path: str) -> Dict[str, str]:
+    """读取映射表，返回 {原始写法: 规范主题}"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return {row["field"]: row["topic"] for row in csv.DictReader(f)}
+
+
+def canonical_fields(fields: Iterable[str], mapping: Dict[str, str]) -> List[str]:
+    """把一位教师的研究领域列表映射为规范主题（保持顺序并去重，未知写法原样保留）"""
+    result = []
+    for field in fields:
+        topic = mapping.get(str(field).strip(), field)
+        if topic not in result:
+            result.append(topic)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="研究领域归一化与聚类")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="聚类全库研究领域并保存映射表")
+    build_parser.add_argument("sources", nargs="+", help="教师JSON输出目录或JSONL文件（可指定多个）")
+    build_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="余弦相似度阈值")
+    build_parser.add_argument("--workers", type=int, default=1, help="读取语料的并行进程数")
+    build_parser.add_argument("--output", default=None, help="映射表路径，默认为 <第一个目录>/_topics/field_topics.csv")
+    show_parser = subparsers.add_parser("show", help="查看已保存的主题")
+    show_parser.add_argument("data_dir", help="教师JSON输出目录")
+    show_parser.add_argument("--min-variants", type=int, default=2, help="只显示至少有N种写法的主题")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == "build":
+        start_time = time.time()
+        variants = collect_fields(args.sources, workers=args.workers)
+        rows = build_topics(variants, threshold=args.threshold)
+        output = args.output or topics_path_for(args.sources[0])
+        save_mapping(rows, output)
+        topic_count = len({row["topic_id"] for row in rows})
+        logging.info(f"研究领域写法 {len(rows)} 种（规范化后 {len(variants)} 种），归并为 {topic_count} 个主题，"
+                     f"耗时 {time.time() - start_time:.2f} 秒，映射表已保存到 {output}")
+    else:
+        path = topics_path_for(args.data_dir)
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        topics: Dict[str, List[str]] = {}
+        for row in rows:
+            topics.setdefault(row["topic"], []).append(row["field"])
+        for topic, fields in sorted(topics.items(), key=lambda item: -len(item[1])):
+            if len(fields) >= args.min_variants:
+                print(f"{topic}（{len(fields)} 种写法）: {' | '.join(fields)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,10 +7,14 @@
 该模块负责合并从不同来源（如学校网站和AMiner）获取的教师数据，
 处理可能的数据冲突，确保最终结果的准确性和完整性。
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Set, Tuple
+from functools import lru_cache
 import logging
 import re # 导入正则表达式模块
 
+from utils.pub_dedup import PublicationIndex
+from utils.record_model import as_dict
+
 # --- 辅助合并函数 ---
 
 def _get_value(data_dict: Dict, key: str, default: Any = None) -> Any:
@@ -27,17 +31,20 @@ def _merge_single_field(school_val: Any, aminer_val: Any, default: Any = '') ->
     else:
         return default
 
-def _merge_list_field(school_list: List, aminer_list: List) -> List:
-    """合并列表字段，去重并过滤空字符串"""
+def _merge_list_set(school_list: List, aminer_list: List) -> Set:
+    """合并列表字段为集合，去重并过滤空字符串"""
     # 确保输入是列表，处理 None 的情况
-    s_list = school_list if isinstance(school_list, list) else []
-    a_list = aminer_list if isinstance(aminer_list, list) else []
+    merged_set = set(school_list) if isinstance(school_list, list) else set()
+    if isinstance(aminer_list, list):
+        merged_set.update(aminer_list)
+    # 列表通常只有几项，先整体建集合再过滤空值比逐项判断快
+    if not all(merged_set):
+        merged_set = {item for item in merged_set if item}
+    return merged_set
 
-    # 合并并去重，同时过滤掉空字符串
-    merged_set = set(item for item in s_list if item)
-    merged_set.update(item for item in a_list if item)
-
-    return sorted(list(merged_set)) # 返回排序后的列表
+def _merge_list_field(school_list: List, aminer_list: List) -> List:
+    """合并列表字段，去重并过滤空字符串"""
+    return sorted(_merge_list_set(school_list, aminer_list)) # 返回排序后的列表
 
 # --- 主要合并逻辑 ---
 
@@ -46,15 +53,15 @@ def merge_data(school_data: Dict, aminer_data: Dict) -> Dict:
     合并来自学校网站和AMiner的教师数据 (优化版)
 
     参数:
-        school_data: 从学校网站获取的教师数据 (可能为 None)
-        aminer_data: 从AMiner获取的教师数据 (可能为 None)
+        school_data: 从学校网站获取的教师数据 (可能为 None，也可以是 record_model.TeacherRecord)
+        aminer_data: 从AMiner获取的教师数据 (可能为 None，也可以是 record_model.TeacherRecord)
 
     返回:
         Dict: 合并后的教师数据
     """
     # 处理输入可能为 None 的情况
-    sd = school_data or {}
-    ad = aminer_data or {}
+    sd = as_dict(school_data) or {}
+    ad = as_dict(aminer_data) or {}
 
     merged_data = {}
 
@@ -130,33 +137,40 @@ def merge_education(school_edu: Dict, aminer_edu: Dict) -> Dict:
     return merged_edu if any(merged_edu.values()) else {}
 
 
+# 匹配开头的 YYYY（同时覆盖 YYYY年、YYYY.MM、YYYY-YYYY 等写法）
+_YEAR_PREFIX_RE = re.compile(r'^(\d{4})')
+
+@lru_cache(maxsize=65536)
+def _extract_year_cached(experience_str: str) -> int:
+    """带缓存的年份解析，同一条经历在批量合并中只解析一次"""
+    match = _YEAR_PREFIX_RE.match(experience_str)
+    if match:
+        return int(match.group(1))
+    return 9999 # 无法解析年份的排在后面
+
 def _extract_year(experience_str: str) -> int:
     """从工作经历字符串中提取起始年份用于排序"""
     if not isinstance(experience_str, str):
         return 9999 # 非字符串排最后
-    # 匹配 YYYY 或 YYYY年
-    match = re.search(r'^(\d{4})', experience_str)
-    if match:
-        return int(match.group(1))
-    # 匹配 YYYY.MM
-    match = re.search(r'^(\d{4})\.', experience_str)
-    if match:
-        return int(match.group(1))
-    return 9999 # 无法解析年份的排在后面
+    return _extract_year_cached(experience_str)
+
+def _work_experience_key(experience: Any) -> Tuple:
+    """工作经历排序键：先按起始年份，同年份按文本排序"""
+    if isinstance(experience, str):
+        return (_extract_year_cached(experience), experience)
+    return (9999, experience)
 
 def merge_work_experience(school_experience: List, aminer_experience: List) -> List:
     """合并工作经历信息 (优化版)"""
-    # 使用辅助函数合并列表并去重过滤空值
-    merged_list = _merge_list_field(school_experience, aminer_experience)
+    # 使用辅助函数合并去重过滤空值
+    merged_set = _merge_list_set(school_experience, aminer_experience)
 
-    # 按提取的年份排序
+    # 按提取的年份排序，一次排序完成（等价于先按文本排序再按年份稳定排序）
     try:
-        # 对于无法解析年份的条目，让它们保持原有相对顺序或排在最后
-        merged_list.sort(key=_extract_year)
+        return sorted(merged_set, key=_work_experience_key)
     except Exception as e:
         logging.warning(f"工作经历排序时出现错误: {e}. 列表可能未完全排序.")
-
-    return merged_list
+        return list(merged_set)
 
 
 def merge_academic(school_academic: Dict, aminer_academic: Dict) -> Dict:
@@ -179,51 +193,40 @@ def merge_academic(school_academic: Dict, aminer_academic: Dict) -> Dict:
 
     return merged_academic
 
+def _pub_sort_year(pub: Dict) -> int:
+    """出版物排序用的年份，处理非数字年份"""
+    year = pub.get('year')
+    if isinstance(year, (int, float)):
+        return int(year)
+    if isinstance(year, str) and year.isdigit():
+        return int(year)
+    return 0 # 无法解析年份的排在前面（降序）
+
 def merge_publications(school_pubs: List, aminer_pubs: List) -> List:
-    """合并出版物列表，优先AMiner，基于DOI或标题+年份去重 (优化版)"""
+    """合并出版物列表，优先AMiner，基于DOI或规范化标题的近似匹配去重 (优化版)"""
     sp = school_pubs if isinstance(school_pubs, list) else []
     ap = aminer_pubs if isinstance(aminer_pubs, list) else []
 
-    merged_pubs_dict = {}
-
-    # 优先处理AMiner的出版物
-    for pub in ap:
-        if not isinstance(pub, dict):
-            logging.debug(f"跳过格式错误的AMiner出版物条目: {type(pub)} - {pub}")
-            continue
-        # 使用 DOI 或 标题+年份 作为键
-        key = pub.get('DOI') or f"{pub.get('title_en', pub.get('title_cn', 'NoTitle'))}_{pub.get('year', 'NoYear')}"
-        # 简单的规范化键，去除空白符
-        key = "".join(str(key).split()).lower()
-        if key not in merged_pubs_dict:
-             # 检查数据有效性
-             if pub.get('title_en') or pub.get('title_cn') or pub.get('DOI'):
-                 merged_pubs_dict[key] = pub
-
-    # 添加学校数据中AMiner没有的出版物
-    for pub in sp:
-        if not isinstance(pub, dict):
-            logging.debug(f"跳过格式错误的学校出版物条目: {type(pub)} - {pub}")
-            continue
-        key = pub.get('DOI') or f"{pub.get('title_en', pub.get('title_cn', 'NoTitle'))}_{pub.get('year', 'NoYear')}"
-        key = "".join(str(key).split()).lower()
-        if key not in merged_pubs_dict:
-             if pub.get('title_en') or pub.get('title_cn') or pub.get('DOI'):
-                 merged_pubs_dict[key] = pub
-
-    # 转为列表并按年份降序排序
-    final_pubs = list(merged_pubs_dict.values())
+    # 近似去重索引：DOI精确匹配 + 规范化标题 MinHash/LSH 匹配
+    index = PublicationIndex()
+    final_pubs = []
+
+    # 优先处理AMiner的出版物，再添加学校数据中AMiner没有的出版物
+    for source, pubs in (("AMiner", ap), ("学校", sp)):
+        for pub in pubs:
+            if not isinstance(pub, dict):
+                logging.debug(f"跳过格式错误的{source}出版物条目: {type(pub)} - {pub}")
+                continue
+            # 检查数据有效性
+            if not (pub.get('title_en') or pub.get('title_cn') or pub.get('DOI')):
+                continue
+            _, is_duplicate = index.add_or_match(pub)
+            if not is_duplicate:
+                final_pubs.append(pub)
+
+    # 按年份降序排序
     try:
-        # 提取年份进行排序，处理非数字年份
-        def get_pub_year(p):
-            year = p.get('year')
-            if isinstance(year, (int, float)):
-                return int(year)
-            if isinstance(year, str) and year.isdigit():
-                return int(year)
-            return 0 # 无法解析年份的排在前面（降序）
-
-        final_pubs.sort(key=get_pub_year, reverse=True)
+        final_pubs.sort(key=_pub_sort_year, reverse=True)
     except Exception as e:
         logging.warning(f"出版物按年份排序时出现错误: {e}. 列表可能未完全排序.")
 
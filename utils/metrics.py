@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行指标模块
+
+用计时区间（span）记录爬取流程各阶段的耗时，按 指标名 + 标签 聚合为直方图，
+运行结束时导出两份文件到 <输出目录>/_metrics/：
+- teacher_analysis.prom：Prometheus textfile 格式（node_exporter 的 textfile collector 可直接采集），每次运行覆盖
+- run-<run_id>.json：本次运行的汇总（次数、总耗时、均值、p50/p90/p99、最大值），保留历史
+
+主要指标：
+- stage_duration_seconds{stage, status}：main.py 中各步骤（列表获取、学校网页、AMiner搜索/爬取、合并等）
+  以及 AMiner 搜索内部的 启动浏览器/登录/页面导航/翻页、smart_scraper 抓取网页的 page_fetch{source}
+- scrape_node_duration_seconds{source, node}：ScrapeGraphAI 各节点（Parse/GenerateAnswer 等）耗时，
+  与 page_fetch 一起区分网页抓取和LLM抽取
+- teacher_duration_seconds：每位教师的总处理耗时
+- llm_prompt_tokens / llm_completion_tokens{source, node, variant}：每次LLM调用的输入/输出token数
+- aminer_search_pages{method, result}：每次AMiner搜索请求/检查的结果页数（method 为 http 或 browser）
+
+用法：
+    with span("aminer_login"):
+        ...
+    export_run(output_dir, run_id)
+    python -m utils.metrics NUIST_teacher_data/_metrics/run-<run_id>.json   # 按总耗时排序打印汇总
+"""
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import argparse
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+METRICS_DIR_NAME = "_metrics"
+PROM_FILE_NAME = "teacher_analysis.prom"
+METRIC_PREFIX = "teacher_analysis_"
+STAGE_METRIC = "stage_duration_seconds"
+
+# 直方图桶上界（秒）：覆盖从毫秒级的解析到数分钟的LLM抽取/人工登录
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+# token数指标的桶上界
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+# 页数指标的桶上界
+PAGE_BUCKETS = (1, 2, 3, 4, 5, 10)
+# 不以秒计的指标使用各自的桶
+METRIC_BUCKETS: Dict[str, Sequence[float]] = {
+    "llm_prompt_tokens": TOKEN_BUCKETS,
+    "llm_completion_tokens": TOKEN_BUCKETS,
+    "aminer_search_pages": PAGE_BUCKETS,
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """单个时间序列：保留原始样本（每次运行最多几千条），导出时再计算桶计数和分位数"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.values: List[float] = []
+
+    def observe(self, value: float) -> None:
+        bisect.insort(self.values, value)
+
+    @property
+    def count(self) -> int:
+        return len(self.values)
+
+    @property
+    def total(self) -> float:
+        return sum(self.values)
+
+    def quantile(self, q: float) -> float:
+        """最近秩法分位数"""
+        if not self.values:
+            return 0.0
+        rank = max(math.ceil(q * len(self.values)), 1)
+        return self.values[rank - 1]
+
+    def bucket_counts(self) -> List[Tuple[float, int]]:
+        """累计桶计数 [(上界, 不超过上界的样本数)]，不含 +Inf"""
+        return [(bound, bisect.bisect_right(self.values, bound)) for bound in self.buckets]
+
+    def summary(self) -> Dict[str, float]:
+        count = self.count
+        total = self.total
+        return {
+            "count": count,
+            "sum": round(total, 4),
+            "mean": round(total / count, 4) if count else 0.0,
+            "p50": round(self.quantile(0.5), 4),
+            "p90": round(self.quantile(0.9), 4),
+            "p99": round(self.quantile(0.99), 4),
+            "max": round(self.values[-1], 4) if count else 0.0,
+        }
+
+
+class MetricsRegistry:
+    """线程安全的指标注册表：{指标名: {标签: Histogram}}"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._metrics.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(METRIC_BUCKETS.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels: str) -> Iterator[None]:
+        """计时区间，记入 stage_duration_seconds{stage, status, ...}，异常时 status=error"""
+        start_time = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.observe(STAGE_METRIC, time.perf_counter() - start_time, stage=stage, status=status, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """JSON汇总：{指标名: [{labels, count, sum, mean, p50, p90, p99, max}]}，按总耗时降序"""
+        with self._lock:
+            result = {}
+            for name, series in sorted(self._metrics.items()):
+                rows = [dict(labels=dict(key), **histogram.summary()) for key, histogram in series.items()]
+                rows.sort(key=lambda row: -row["sum"])
+                result[name] = rows
+            return result
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._metrics.items()):
+                full_name = METRIC_PREFIX + name
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, histogram in sorted(series.items()):
+                    for bound, count in histogram.bucket_counts():
+                        lines.append(f"{full_name}_bucket{_format_labels(key + (('le', _format_bound(bound)),))} {count}")
+                    lines.append(f"{full_name}_bucket{_format_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {histogram.total:.6f}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+# 进程内全局注册表
+REGISTRY = MetricsRegistry()
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    REGISTRY.observe(name, value, **labels)
+
+
+def span(stage: str, **labels: str):
+    return REGISTRY.span(stage, **labels)
+
+
+def export_run(output_dir: str, run_id: Optional[str] = None,
+               registry: MetricsRegistry = REGISTRY) -> Dict[str, str]:
+    """
+    把本次运行的指标写入 <output_dir>/_metrics/
+
+    参数:
+        output_dir: 教师JSON输出目录
+        run_id: 运行标识（用于JSON汇总文件名），默认取当前时间
+        registry: 指标注册表
+
+    返回:
+        Dict[str, str]: {"prometheus": 路径, "json": 路径}
+    """
+    metrics_dir = os.path.join(output_dir, METRICS_DIR_NAME)
+    os.makedirs(metrics_dir, exist_ok=True)
+    run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+
+    prom_path = os.path.join(metrics_dir, PROM_FILE_NAME)
+    with open(prom_path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(registry.to_prometheus())
+    os.replace(prom_path + ".tmp", prom_path)
+
+    json_path = os.path.join(metrics_dir, f"run-{run_id}.json")
+    summary = {"run_id": run_id, "exported_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "metrics": registry.snapshot()}
+    with open(json_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    os.replace(json_path + ".tmp", json_path)
+    return {"prometheus": prom_path, "json": json_path}
+
+
+def format_summary(metrics: Dict[str, List[Dict]], top: int = 20) -> List[str]:
+    """把JSON汇总格式化为便于阅读的文本行（每个指标按总耗时降序）"""
+    lines = []
+    for name, rows in metrics.items():
+        lines.append(f"{name}:")
+        unit = "s" if name.endswith("_seconds") else ""
+        for row in rows[:top]:
+            labels = ",".join(f"{k}={v}" for k, v in row["labels"].items()) or "-"
+            lines.append(f"  {labels:<45} 次数 {row['count']:>5}  总计 {row['sum']:>9.2f}{unit}  "
+                         f"均值 {row['mean']:>7.2f}{unit}  p50 {row['p50']:>7.2f}{unit}  p99 {row['p99']:>7.2f}{unit}  "
+                         f"最大 {row['max']:>7.2f}{unit}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="打印某次运行的阶段耗时汇总")
+    parser.add_argument("summary", help="_metrics/run-<run_id>.json 文件路径")
+    parser.add_argument("--top", type=int, default=20, help="每个指标最多显示的行数")
+    args = parser.parse_args(argv)
+
+    with open(args.summary, 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    print(f"运行 {summary.get('run_id')}（导出于 {summary.get('exported_at')}）")
+    for line in format_summary(summary.get("metrics", {}), top=args.top):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+AMiner 搜索结果的机构与姓名匹配
+
+原来的做法是在每个搜索结果上把 config/org_mapping.json 中的别名逐个转小写做子串查找，
+按教师门户上的姓名原样搜索，只要机构匹配就取第一条。这有几个问题：
+- "Nanjing University" 是 "Nanjing University of Information Science & Technology" 的子串，
+  "NJU" 也会命中 "NJUPT"，南京大学的教师会匹配到其他学校
+- 门户上截断的姓名（"Md Wahiduzzam..."、"Wang Yong（王..."）原样搜索，往往翻完所有页都找不到
+- 不看姓名，第一条机构匹配的结果未必是要找的人
+
+这里提供：
+- OrgTable：把整张别名表编译成一个正则（按长度降序的多选结构，英文别名带词边界，"&" 与 "and" 等价），
+  一次扫描就能找出文本中出现的所有机构，重叠时取最长的别名
+- NameMatcher：清理门户上的姓名（去掉省略号、拆出括号中的中文名），生成搜索用的查询词和姓名变体
+  （英文姓名的两种顺序；安装了 pypinyin 时加上中文姓名的拼音），对候选人的姓名打分，截断的姓名按前缀匹配
+- pick_best()：对一页搜索结果打分，机构必须匹配，姓名明确不符的（同单位的其他人）不采用，姓名相符的优先；
+  一页中没有任何姓名相符的结果时提示调用方不必再翻页
+
+用法：
+    table = get_org_table()
+    matcher = NameMatcher("Wang Yong（王...")
+    matcher.queries            # ['Wang Yong', 'Yong Wang']
+    best, more = pick_best([("Yong Wang 王勇", "Nanjing University of Information Science & Technology", url)],
+                           "南京信息工程大学", matcher, table)
+
+    python -m benchmarks.bench_org_match   # 与逐个别名子串查找对比匹配速度和结果
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import json
+import logging
+import re
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+ORG_MAPPING_PATH = "config/org_mapping.json"
+
+# 候选人得分：机构匹配是前提，姓名完全相符/前缀相符再加分
+ORG_SCORE = 1.0
+NAME_SCORE = 1.0
+PREFIX_SCORE = 0.7
+
+_CJK = r"㐀-䶿一-鿿"
+_CJK_RE = re.compile(f"[{_CJK}]+")
+_NON_WORD_RE = re.compile(f"[^0-9a-z{_CJK}]+")
+_ELLIPSIS_RE = re.compile(r"(\.{2,}|…+|．{2,})\s*$")
+_PAREN_RE = re.compile(r"^(.*?)[（(]([^）)]*)[）)]?(.*)$")
+# 复姓（拼音时作为一个整体放在姓的位置）
+COMPOUND_SURNAMES = ("欧阳", "司马", "诸葛", "上官", "东方", "皇甫", "尉迟", "公孙", "慕容", "夏侯", "令狐", "司徒", "端木")
+
+
+def normalize(text: str) -> str:
+    """小写，"&" 视为 "and"，标点和空白合并为一个空格"""
+    text = (text or "").lower().replace("&", " and ")
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def _alias_pattern(alias: str) -> str:
+    # 英文别名两侧不能紧跟字母数字（"nju" 不匹配 "njupt"），中文别名直接匹配
+    escaped = re.escape(alias).replace(r"\ ", " ")
+    if _CJK_RE.search(alias):
+        return escaped
+    return rf"(?<![0-9a-z]){escaped}(?![0-9a-z])"
+
+
+class OrgTable:
+    """
+    编译后的机构别名表
+
+    参数:
+        mapping: {机构名: [别名, ...]}，与 config/org_mapping.json 的格式相同；机构名本身也作为别名
+    """
+
+    def __init__(self, mapping: Dict[str, Sequence[str]]):
+        self.alias_to_org: Dict[str, str] = {}
+        for org, aliases in mapping.items():
+            for alias in [org, *aliases]:
+                key = normalize(alias)
+                if key:
+                    # 同一别名出现在多个机构下时以先出现的为准
+                    self.alias_to_org.setdefault(key, org)
+        self.orgs = frozenset(self.alias_to_org.values())
+        aliases = sorted(self.alias_to_org, key=len, reverse=True)
+        self.pattern = re.compile("|".join(_alias_pattern(alias) for alias in aliases)) if aliases else None
+
+    def orgs_in(self, text: str) -> Set[str]:
+        """文本中出现的所有机构（重叠时只计最长的别名）"""
+        if self.pattern is None:
+            return set()
+        return {self.alias_to_org[match.group(0)] for match in self.pattern.finditer(normalize(text))}
+
+    def matches(self, text: str, org: str) -> bool:
+        """文本中是否出现该机构；不在别名表中的机构按规范化后的机构名查找"""
+        if org in self.orgs:
+            return org in self.orgs_in(text)
+        key = normalize(org)
+        return bool(key) and key in normalize(text)
+
+
+@lru_cache(maxsize=None)
+def get_org_table(path: str = ORG_MAPPING_PATH) -> OrgTable:
+    """读取并编译机构映射文件（进程内缓存）；文件不可用时返回空表"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            mapping = json.load(f)
+    except Exception as e:
+        logging.error(f"加载机构映射文件失败: {e}")
+        mapping = {}
+    return OrgTable(mapping)
+
+
+def _latin_key(tokens: Iterable[str]) -> str:
+    return " ".join(tokens)
+
+
+def split_name(text: str) -> Tuple[List[str], str]:
+    """把姓名文本拆成 (英文姓名的小写词列表, 中文姓名)，连字符连接的名字合并为一个词（"Hai-Shan" → "haishan"）"""
+    text = text or ""
+    cjk = "".join(_CJK_RE.findall(text))
+    latin = _CJK_RE.sub(" ", text).lower().replace("-", "").replace("'", "")
+    return re.findall(r"[a-z]+", latin), cjk
+
+
+def _pinyin(cjk_name: str) -> Optional[List[str]]:
+    """中文姓名的拼音 [姓, 名]（需要 pypinyin）"""
+    if lazy_pinyin is None or len(cjk_name) < 2:
+        return None
+    surname_len = 2 if cjk_name[:2] in COMPOUND_SURNAMES and len(cjk_name) > 2 else 1
+    surname = "".join(lazy_pinyin(cjk_name[:surname_len]))
+    given = "".join(lazy_pinyin(cjk_name[surname_len:]))
+    return [surname.lower(), given.lower()]
+
+
+class NameMatcher:
+    """
+    教师门户上的姓名及其变体
+
+    参数:
+        name: 门户上的姓名，可以是截断的（以 "..." 或 "…" 结尾）或 "英文名（中文名" 的形式
+    """
+
+    def __init__(self, name: str):
+        self.raw = name
+        text = (name or "").strip()
+        self.truncated = bool(_ELLIPSIS_RE.search(text))
+        text = _ELLIPSIS_RE.sub("", text).strip()
+
+        outer, inner = text, ""
+        paren = _PAREN_RE.match(text)
+        if paren:
+            outer = f"{paren.group(1)} {paren.group(3)}".strip()
+            inner = paren.group(2).strip()
+            # 括号没有闭合说明括号中的内容被截断了
+            inner_truncated = self.truncated or not re.search(r"[）)]", text)
+        else:
+            inner_truncated = False
+
+        latin, cjk = split_name(outer)
+        inner_latin, inner_cjk = split_name(inner)
+        # 括号中被截断的中文名（如 "王"）不足以作为姓名使用
+        if inner_cjk and not (inner_truncated and len(inner_cjk) < 2):
+            cjk = cjk or inner_cjk
+        latin = latin or ([] if inner_truncated else inner_latin)
+        # 只有外层姓名的末尾被截断时才按前缀匹配
+        self.prefix = self.truncated and not paren and bool(latin or cjk)
+        self.latin = latin
+        self.cjk = cjk
+
+        # 完整的英文姓名变体：原顺序与姓名颠倒的顺序
+        variants: List[List[str]] = []
+        if latin:
+            variants.append(latin)
+            if len(latin) > 1 and not self.prefix:
+                variants.append(latin[-1:] + latin[:-1])
+                variants.append(latin[1:] + latin[:1])
+        pinyin = _pinyin(cjk) if cjk and not (self.prefix and not latin) else None
+        if pinyin:
+            variants.append(pinyin[::-1])   # 名在前（论文署名中最常见）
+            variants.append(pinyin)
+        self.latin_variants: List[str] = []
+        for tokens in variants:
+            key = _latin_key(tokens)
+            if key not in self.latin_variants:
+                self.latin_variants.append(key)
+
+    @property
+    def queries(self) -> List[str]:
+        """依次尝试的搜索词：完整的中文名优先，其次是英文姓名变体（首字母大写）"""
+        queries = []
+        if self.cjk and not self.prefix:
+            queries.append(self.cjk)
+        for key in self.latin_variants:
+            query = " ".join(token.capitalize() for token in key.split())
+            if query not in queries:
+                queries.append(query)
+        return queries or [self.raw]
+
+    def score(self, candidate_name: str) -> Optional[float]:
+        """
+        候选人姓名得分
+
+        返回:
+            Optional[float]: NAME_SCORE 完全相符，PREFIX_SCORE 截断姓名的前缀相符，0 不相符；
+                             无法判断时（例如只有中文名、候选人只有英文名且没有安装 pypinyin）返回 None
+        """
+        latin, cjk = split_name(candidate_name)
+        if cjk and self.cjk:
+            if cjk == self.cjk:
+                return NAME_SCORE
+            if self.prefix and cjk.startswith(self.cjk):
+                return PREFIX_SCORE
+            if not (latin and self.latin_variants):
+                return 0.0
+        if latin and self.latin_variants:
+            candidate = _latin_key(latin)
+            candidate_joined = candidate.replace(" ", "")
+            for key in self.latin_variants:
+                if candidate == key or candidate_joined == key.replace(" ", ""):
+                    return NAME_SCORE
+                if self.prefix and candidate.startswith(key):
+                    return PREFIX_SCORE
+            # 词的顺序不同（"Yong Wang" 与 "Wang Yong"）
+            if not self.prefix and sorted(latin) == sorted(self.latin_variants[0].split()):
+                return NAME_SCORE
+            return 0.0
+        return None
+
+
+def pick_best(candidates: Iterable[Tuple[str, str, Any]], org: str, matcher: NameMatcher,
+              table: Optional[OrgTable] = None) -> Tuple[Optional[Any], bool]:
+    """
+    对一页搜索结果打分，返回最佳候选和是否值得继续翻页
+
+    参数:
+        candidates: [(姓名文本, 机构文本, 候选数据)]，按搜索结果的顺序
+        org: 教师所属机构（org_mapping.json 中的键）
+        matcher: 教师姓名的 NameMatcher
+        table: 机构别名表，默认使用 get_org_table()
+
+    返回:
+        Tuple[Optional[Any], bool]: (得分最高的候选数据，没有机构匹配、姓名相符或无法判断的候选时为 None；
+                                     是否继续翻页：找到了候选，或者本页所有结果都能判断、姓名都不相符
+                                     且没有同单位的人时为 False)
+    """
+    table = table or get_org_table()
+    best, best_score = None, 0.0
+    judged_all = True
+    name_hit = False
+    org_hit = False
+    for name_text, org_text, payload in candidates:
+        name_score = matcher.score(name_text)
+        if name_score is None:
+            judged_all = False
+        elif name_score > 0:
+            name_hit = True
+        if not table.matches(org_text, org):
+            continue
+        org_hit = True
+        # 机构匹配但姓名明确不符的是同单位的其他人，不能采用
+        if name_score == 0:
+            continue
+        # 姓名无法判断时与原来的做法一致，只按机构采用
+        score = ORG_SCORE + (name_score or 0.0)
+        # 同分时保留靠前的结果（搜索结果按相关度排序）
+        if score > best_score:
+            best, best_score = payload, score
+    if best is not None:
+        return best, False
+    # 搜索结果按相关度排序，本页已经没有姓名相符的人、也没有同单位的人时，后面的页也不会有
+    return None, not (judged_all and not name_hit and not org_hit)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+按主机的礼貌访问调度模块
+
+爬取多个学校时，流水线会同时访问多个教师门户、aminer.cn 和 LLM API。
+这里为每个主机维护一个令牌桶（平均速率 + 突发量）和最大并发数：
+- slot(url)：访问前获取该主机的令牌和并发名额，必要时等待；只阻塞访问这个主机的线程
+- run(tasks, workers)：按主机分组的任务调度器，各主机之间轮转取任务；
+  某个主机被限速时，空闲的工作线程先去做其他主机的任务，而不是一起等待。
+  任务在派发时就预占其主机的一个令牌和并发名额，任务内部第一次对该主机调用 slot() 时直接使用这份预占，
+  请求结束（或任务结束时仍未使用）即归还并发名额，因此不会重复计数，也不会在整个任务期间占着名额
+
+默认限速见 DEFAULT_LIMITS，未列出的主机使用 "*" 一项；config/politeness.json 存在时会覆盖默认值，格式：
+    {"faculty.nuist.edu.cn": {"rate": 1.0, "burst": 1, "max_in_flight": 2}, "*": {...}}
+"""
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.metrics import observe
+
+CONFIG_PATH = "config/politeness.json"
+
+# rate: 每秒请求数；burst: 令牌桶容量；max_in_flight: 同时进行的请求数
+DEFAULT_LIMITS: Dict[str, Dict[str, float]] = {
+    "faculty.nuist.edu.cn": {"rate": 1.0, "burst": 1, "max_in_flight": 2},
+    "www.aminer.cn": {"rate": 0.5, "burst": 2, "max_in_flight": 2},
+    "apiv2.aminer.cn": {"rate": 0.5, "burst": 2, "max_in_flight": 2},
+    "api.deepseek.com": {"rate": 2.0, "burst": 4, "max_in_flight": 4},
+    "*": {"rate": 1.0, "burst": 2, "max_in_flight": 2},
+}
+
+
+def host_of(url_or_host: str) -> str:
+    """从URL中取出主机名（已经是主机名时原样返回）"""
+    if "://" not in url_or_host:
+        return url_or_host.lower()
+    return (urlsplit(url_or_host).hostname or url_or_host).lower()
+
+
+class HostLimiter:
+    """单个主机的令牌桶和并发名额（调用方持有调度器的锁）"""
+
+    def __init__(self, rate: float, burst: float, max_in_flight: int):
+        self.rate = max(float(rate), 1e-6)
+        self.burst = max(float(burst), 1.0)
+        self.max_in_flight = max(int(max_in_flight), 1)
+        self.tokens = self.burst
+        self.in_flight = 0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_in(self, now: float) -> Optional[float]:
+        """距离可以发起下一个请求的秒数；并发名额已满时返回 None（要等某个请求结束）"""
+        if self.in_flight >= self.max_in_flight:
+            return None
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+        self.in_flight += 1
+
+
+class PolitenessScheduler:
+    """所有主机限速器的集合，线程安全"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._cond = threading.Condition()
+        # 当前线程通过 run() 预占了名额、尚未使用的主机
+        self._local = threading.local()
+
+    def configure(self, host: str, rate: float, burst: float = 1, max_in_flight: int = 1) -> None:
+        """设置（或修改）某个主机的限速"""
+        with self._cond:
+            self.limits[host] = {"rate": rate, "burst": burst, "max_in_flight": max_in_flight}
+            self._hosts.pop(host, None)
+            self._cond.notify_all()
+
+    def _limiter(self, host: str) -> HostLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limit = self.limits.get(host) or self.limits.get("*") or DEFAULT_LIMITS["*"]
+            limiter = self._hosts[host] = HostLimiter(limit.get("rate", 1.0), limit.get("burst", 1),
+                                                      limit.get("max_in_flight", 1))
+        return limiter
+
+    def ready_in(self, url_or_host: str) -> Optional[float]:
+        """该主机还需等待的秒数（0 表示现在即可访问，None 表示并发名额已满）"""
+        with self._cond:
+            return self._limiter(host_of(url_or_host)).ready_in(time.monotonic())
+
+    @contextmanager
+    def slot(self, url_or_host: str) -> Iterator[None]:
+        """获取主机的令牌和并发名额，代码块结束时归还并发名额"""
+        host = host_of(url_or_host)
+        held = getattr(self._local, "held", None)
+        if held and host in held:
+            limiter = held.pop(host)
+        else:
+            start_time = time.monotonic()
+            with self._cond:
+                limiter = self._limiter(host)
+                while True:
+                    now = time.monotonic()
+                    delay = limiter.ready_in(now)
+                    if delay == 0:
+                        limiter.take(now)
+                        break
+                    self._cond.wait(timeout=delay)
+            waited = time.monotonic() - start_time
+            if waited > 0.001:
+                observe("politeness_wait_seconds", waited, host=host)
+        try:
+            yield
+        finally:
+            self._release(limiter)
+
+    def _release(self, limiter: HostLimiter) -> None:
+        with self._cond:
+            limiter.in_flight -= 1
+            self._cond.notify_all()
+
+    def run(self, tasks: Iterable[Tuple[str, Callable[[], Any]]], workers: int = 1,
+            should_stop: Optional[Callable[[], bool]] = None) -> List[Any]:
+        """
+        按主机公平调度执行任务
+
+        参数:
+            tasks: (URL或主机名, 无参函数) 序列；函数内部访问网络时仍应使用 slot() 获取名额
+            workers: 工作线程数
+            should_stop: 每次派发任务前调用，返回 True 时不再派发剩余任务（例如时间预算已用完）
+
+        返回:
+            List[Any]: 与 tasks 顺序一致的返回值（任务抛出的异常作为返回值，未派发的任务为 None）
+        """
+        queues: "OrderedDict[str, Deque[Tuple[int, Callable[[], Any]]]]" = OrderedDict()
+        count = 0
+        for index, (url, func) in enumerate(tasks):
+            queues.setdefault(host_of(url), deque()).append((index, func))
+            count += 1
+        results: List[Any] = [None] * count
+
+        def next_task() -> Optional[Tuple[str, HostLimiter, Tuple[int, Callable[[], Any]]]]:
+            with self._cond:
+                while queues:
+                    if should_stop is not None and should_stop():
+                        return None
+                    now = time.monotonic()
+                    shortest: Optional[float] = None
+                    # 轮转：从最久没有被取过任务的主机开始找第一个当前可访问的主机
+                    for host in list(queues):
+                        delay = self._limiter(host).ready_in(now)
+                        if delay == 0:
+                            limiter = self._limiter(host)
+                            limiter.take(now)
+                            pending = queues.pop(host)
+                            task = pending.popleft()
+                            if pending:
+                                queues[host] = pending
+                            return host, limiter, task
+                        if delay is not None:
+                            shortest = delay if shortest is None else min(shortest, delay)
+                    self._cond.wait(timeout=shortest)
+                return None
+
+        def worker() -> None:
+            self._local.held = {}
+            while True:
+                task = next_task()
+                if task is None:
+                    return
+                host, limiter, (index, func) = task
+                self._local.held[host] = limiter
+                try:
+                    results[index] = func()
+                except Exception as e:
+                    logging.error(f"任务执行出错: {e}")
+                    results[index] = e
+                finally:
+                    # 任务没有用到预占的名额
+                    if self._local.held.pop(host, None) is not None:
+                        self._release(limiter)
+
+        threads = [threading.Thread(target=worker, name=f"polite-{i}", daemon=True)
+                   for i in range(max(min(workers, count), 1))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+
+def load_limits(path: str = CONFIG_PATH) -> Dict[str, Dict[str, float]]:
+    """默认限速，叠加配置文件中的设置"""
+    limits = {host: dict(limit) for host, limit in DEFAULT_LIMITS.items()}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for host, limit in json.load(f).items():
+                    limits.setdefault(host, {}).update(limit)
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取限速配置 {path} 失败，使用默认值: {e}")
+    return limits
+
+
+# 进程内共享的调度器（所有爬虫模块共用同一组主机限速）
+SCHEDULER = PolitenessScheduler(load_limits())
+
+
+def slot(url_or_host: str):
+    return SCHEDULER.slot(url_or_host)
@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+优先级与时间预算调度模块
+
+在固定的时间窗口（例如一个晚上）里运行爬取时，希望先处理最有价值的教师，而不是按门户列表的页码顺序：
+
+- 候选：尚无数据的新教师（kind="new"），以及已有数据但未通过质量检查、且此前没有重新爬取过的教师（kind="recrawl"）
+- 打分：SCORERS 中的打分函数按权重加权求和，可以用 register_scorer() 增加新的打分函数，
+  命令行用 --priority new=100,quality=50,likes=10 选择打分函数和权重
+- 耗时估计：CostModel 读取 <输出目录>/_metrics/ 下最近几次运行的阶段耗时汇总（utils.metrics 导出），
+  按各阶段 p90 耗时和历史上需要AMiner补充的比例估计每位教师的耗时（偏保守）；没有历史数据时使用默认值
+- 时间预算：TimeBudget 给出截止时间，任务开始前检查剩余时间能否容纳该教师的估计耗时，
+  放不下的教师被推迟（剩余时间内仍会尝试后面耗时更短的教师）；正在处理的教师不会被打断
+- 可恢复：运行结束时把已完成、被推迟的教师和已重新爬取过的教师写入 <输出目录>/_schedule/state.json，
+  下次运行时已保存的教师自动跳过，被推迟的教师重新参与排序，重新爬取过的教师不会再次重复爬取
+
+用法：
+    python main.py --time-budget 8h                        # 8小时内按默认优先级处理
+    python main.py --time-budget 90m --priority new=1      # 只按"新教师优先"排序
+    python -m utils.priority NUIST_teacher_data             # 查看耗时估计和上次运行的调度状态
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import re
+import time
+
+from utils.check_data_quality import quality_issues
+from utils.corpus_reader import list_record_files, read_file
+from utils.metrics import METRICS_DIR_NAME, STAGE_METRIC
+
+SCHEDULE_DIR_NAME = "_schedule"
+STATE_FILE_NAME = "state.json"
+
+# 用于估计耗时的最近运行次数
+HISTORY_RUNS = 10
+
+# 没有历史数据时各阶段的耗时估计（秒）以及需要AMiner补充的比例
+DEFAULT_STAGE_SECONDS = {
+    "school_scrape": 40.0,
+    "quality_check": 0.01,
+    "aminer_search": 30.0,
+    "aminer_scrape": 40.0,
+    "merge": 0.1,
+    "save": 0.01,
+}
+DEFAULT_AMINER_RATIO = 0.5
+
+SCHOOL_STAGES = ("school_scrape", "quality_check", "save")
+AMINER_STAGES = ("aminer_search", "aminer_scrape", "merge")
+
+DEFAULT_WEIGHTS = {"new": 100.0, "quality": 50.0, "likes": 10.0}
+# 打分只需要的字段
+SCORE_FIELDS = ("basic_info", "bio_details", "likes")
+
+Scorer = Callable[[Dict, Optional[Dict]], float]
+
+
+# --- 打分函数 ---
+
+SCORERS: Dict[str, Scorer] = {}
+
+
+def register_scorer(name: str) -> Callable[[Scorer], Scorer]:
+    """
+    注册打分函数（装饰器）
+
+    打分函数接收 (教师基本信息 {url, name}, 已有数据或 None)，返回一个数值，通常在 0~1 之间
+    """
+    def decorator(func: Scorer) -> Scorer:
+        SCORERS[name] = func
+        return func
+    return decorator
+
+
+def quality_passed(record: Dict) -> bool:
+    """
+    与 check_data_quality.check_data 相同的判断，但不输出日志（对全部已有数据打分时使用）；
+    字段格式异常的记录视为不合格，会作为 "recrawl" 候选重新爬取
+    """
+    return not quality_issues(record)
+
+
+@register_scorer("new")
+def score_new(teacher_info: Dict, record: Optional[Dict]) -> float:
+    """还没有数据的教师"""
+    return 1.0 if record is None else 0.0
+
+
+@register_scorer("quality")
+def score_quality(teacher_info: Dict, record: Optional[Dict]) -> float:
+    """已有数据但未通过质量检查的教师"""
+    return 1.0 if record is not None and not quality_passed(record) else 0.0
+
+
+@register_scorer("likes")
+def score_likes(teacher_info: Dict, record: Optional[Dict]) -> float:
+    """点赞数多的教师（取对数，新教师没有点赞数时为0）"""
+    likes = (record or {}).get('likes')
+    if isinstance(likes, bool) or not isinstance(likes, (int, float)) or likes <= 0:
+        return 0.0
+    return math.log10(1 + likes)
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """解析 "new=100,quality=50" 形式的权重；只写名称时权重为1"""
+    weights = {}
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in SCORERS:
+            raise ValueError(f"未知的打分函数 {name!r}，可选: {', '.join(sorted(SCORERS))}")
+        try:
+            weights[name] = float(value) if value else 1.0
+        except ValueError:
+            raise ValueError(f"权重应为数字: {part!r}")
+    if not weights:
+        raise ValueError("至少需要一个打分函数")
+    return weights
+
+
+def parse_duration(text: str) -> float:
+    """解析时长："3600"、"90s"、"45m"、"8h"、"1h30m"，返回秒数"""
+    text = text.strip().lower()
+    if re.fullmatch(r"\d+(\.\d+)?", text):
+        return float(text)
+    parts = re.findall(r"(\d+(?:\.\d+)?)([hms])", text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        raise ValueError(f"时长格式应为 3600、90s、45m、8h 或 1h30m: {text!r}")
+    return sum(float(number) * {"h": 3600, "m": 60, "s": 1}[unit] for number, unit in parts)
+
+
+# --- 耗时估计 ---
+
+class CostModel:
+    """根据历史运行的阶段耗时估计每位教师的处理耗时"""
+
+    def __init__(self, stage_seconds: Optional[Dict[str, float]] = None, aminer_ratio: float = DEFAULT_AMINER_RATIO,
+                 runs: int = 0):
+        self.stage_seconds = dict(DEFAULT_STAGE_SECONDS)
+        self.stage_seconds.update(stage_seconds or {})
+        self.aminer_ratio = min(max(aminer_ratio, 0.0), 1.0)
+        self.runs = runs
+
+    @classmethod
+    def from_history(cls, output_dir: str, max_runs: int = HISTORY_RUNS) -> "CostModel":
+        """
+        读取 <output_dir>/_metrics/run-*.json 中最近 max_runs 次运行
+
+        各阶段取成功样本 p90 的按次数加权平均；AMiner补充比例 = AMiner搜索次数 / 学校网页爬取次数
+        """
+        paths = sorted(glob.glob(os.path.join(output_dir, METRICS_DIR_NAME, "run-*.json")),
+                       key=os.path.getmtime)[-max_runs:]
+        weighted: Dict[str, Tuple[float, int]] = {}
+        runs = 0
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    rows = json.load(f).get("metrics", {}).get(STAGE_METRIC, [])
+            except (OSError, ValueError) as e:
+                logging.warning(f"读取运行汇总 {path} 失败: {e}")
+                continue
+            runs += 1
+            for row in rows:
+                labels = row.get("labels", {})
+                stage = labels.get("stage")
+                # 只统计 main.py 中每位教师的步骤（带 page 等额外标签的是步骤内部的细分计时）
+                if stage not in DEFAULT_STAGE_SECONDS or labels.get("status") != "ok" or len(labels) != 2:
+                    continue
+                total, count = weighted.get(stage, (0.0, 0))
+                weighted[stage] = (total + row.get("p90", 0.0) * row.get("count", 0), count + row.get("count", 0))
+
+        stage_seconds = {stage: total / count for stage, (total, count) in weighted.items() if count}
+        school_count = weighted.get("school_scrape", (0.0, 0))[1]
+        aminer_count = weighted.get("aminer_search", (0.0, 0))[1]
+        aminer_ratio = aminer_count / school_count if school_count else DEFAULT_AMINER_RATIO
+        return cls(stage_seconds, aminer_ratio, runs)
+
+    def estimate(self, kind: str = "new", force_aminer: bool = False) -> float:
+        """
+        估计处理一位教师的耗时（秒）
+
+        参数:
+            kind: "new" 按历史比例计入AMiner补充；"recrawl" 质量不合格的教师，一定会走AMiner补充
+            force_aminer: 强制使用AMiner时所有教师都计入AMiner补充
+        """
+        ratio = 1.0 if kind == "recrawl" or force_aminer else self.aminer_ratio
+        return (sum(self.stage_seconds[stage] for stage in SCHOOL_STAGES)
+                + ratio * sum(self.stage_seconds[stage] for stage in AMINER_STAGES))
+
+
+# --- 时间预算 ---
+
+class TimeBudget:
+    """以 time.monotonic() 计的截止时间；seconds 为 None 时不限时"""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return math.inf if self.deadline is None else self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def fits(self, estimate: float) -> bool:
+        """剩余时间能否容纳一个估计耗时为 estimate 的任务"""
+        return estimate <= self.remaining()
+
+
+# --- 候选排序与调度状态 ---
+
+def load_records(output_dir: str, store: Any = None) -> Dict[str, Dict]:
+    """
+    读取已有数据中打分需要的字段
+
+    参数:
+        output_dir: 教师JSON输出目录
+        store: 分段存储（utils.segment_store.SegmentStore），其中的记录覆盖同名的JSON文件
+
+    返回:
+        Dict[str, Dict]: {教师名: {basic_info, bio_details, likes}}
+    """
+    records = {}
+    if os.path.isdir(output_dir):
+        for path in list_record_files(output_dir):
+            teacher_id, record = read_file(path, SCORE_FIELDS)
+            records[teacher_id] = record
+    if store is not None:
+        for teacher_id, record in store.iter_records():
+            records[teacher_id] = {field: record.get(field) for field in SCORE_FIELDS}
+    return records
+
+
+def build_candidates(teacher_info_list: Iterable[Dict], records: Dict[str, Dict], weights: Dict[str, float],
+                     cost_model: CostModel, recrawled: Iterable[str] = (),
+                     force_aminer: bool = False) -> List[Dict[str, Any]]:
+    """
+    生成按优先级排序的候选列表
+
+    参数:
+        teacher_info_list: 门户上的教师列表 [{url, name}]
+        records: 已有数据 {教师名: 数据}
+        weights: {打分函数名: 权重}
+        cost_model: 耗时估计
+        recrawled: 此前已经重新爬取过的教师名，不再作为 recrawl 候选
+
+    返回:
+        List[Dict]: [{info, kind, score, estimate}]，按分数降序、估计耗时升序、列表原顺序排列；
+        已有数据且质量合格（或已重新爬取过）的教师不在其中
+    """
+    recrawled = set(recrawled)
+    candidates = []
+    for index, teacher_info in enumerate(teacher_info_list):
+        record = records.get(teacher_info["name"])
+        if record is None:
+            kind = "new"
+        elif teacher_info["name"] not in recrawled and not quality_passed(record):
+            kind = "recrawl"
+        else:
+            continue
+        score = sum(weight * SCORERS[name](teacher_info, record) for name, weight in weights.items())
+        candidates.append({"info": teacher_info, "kind": kind, "score": round(score, 4),
+                           "estimate": round(cost_model.estimate(kind, force_aminer), 2), "_index": index})
+    candidates.sort(key=lambda c: (-c["score"], c["estimate"], c["_index"]))
+    for candidate in candidates:
+        del candidate["_index"]
+    return candidates
+
+
+def expected_fit(candidates: List[Dict[str, Any]], seconds: Optional[float], workers: int = 1) -> int:
+    """按估计耗时模拟 workers 个并行任务，预计在 seconds 内能完成的候选数"""
+    if seconds is None:
+        return len(candidates)
+    lanes = [0.0] * max(workers, 1)
+    count = 0
+    for candidate in candidates:
+        lane = min(range(len(lanes)), key=lanes.__getitem__)
+        if lanes[lane] + candidate["estimate"] <= seconds:
+            lanes[lane] += candidate["estimate"]
+            count += 1
+    return count
+
+
+def state_path_for(output_dir: str) -> str:
+    return os.path.join(output_dir, SCHEDULE_DIR_NAME, STATE_FILE_NAME)
+
+
+def load_state(output_dir: str) -> Dict[str, Any]:
+    """读取上次运行的调度状态，不存在或损坏时返回空状态"""
+    path = state_path_for(output_dir)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取调度状态 {path} 失败，忽略: {e}")
+    return {}
+
+
+def save_state(output_dir: str, run_id: str, budget: TimeBudget, candidates: List[Dict[str, Any]],
+               results: List[Any], previous: Optional[Dict[str, Any]] = None) -> str:
+    """
+    保存本次运行的调度状态（原子替换）
+
+    参数:
+        candidates: build_candidates() 的结果
+        results: 与 candidates 一一对应：True 成功，False 失败，None 因时间预算被推迟
+        previous: 上次的状态，其中已重新爬取过的教师会保留
+
+    返回:
+        str: 状态文件路径
+    """
+    recrawled = dict((previous or {}).get("recrawled", {}))
+    completed, failed, deferred = [], [], []
+    for candidate, result in zip(candidates, results):
+        name = candidate["info"]["name"]
+        entry = {"name": name, "url": candidate["info"]["url"], "kind": candidate["kind"],
+                 "score": candidate["score"], "estimate": candidate["estimate"]}
+        if result is None:
+            deferred.append(entry)
+            continue
+        if candidate["kind"] == "recrawl":
+            recrawled[name] = run_id
+        (completed if result is True else failed).append(name)
+    state = {
+        "run_id": run_id,
+        "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "time_budget": budget.seconds,
+        "completed": completed,
+        "failed": failed,
+        "deferred": deferred,
+        "recrawled": recrawled,
+    }
+    path = state_path_for(output_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="查看耗时估计和上次运行的调度状态")
+    parser.add_argument("output_dir", help="教师JSON输出目录")
+    parser.add_argument("--runs", type=int, default=HISTORY_RUNS, help="用于估计耗时的最近运行次数")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    model = CostModel.from_history(args.output_dir, args.runs)
+    print(f"耗时估计（基于最近 {model.runs} 次运行，AMiner补充比例 {model.aminer_ratio:.0%}）:")
+    for stage, seconds in model.stage_seconds.items():
+        print(f"  {stage:<15} {seconds:>8.2f}s")
+    print(f"  新教师约 {model.estimate('new'):.1f}s/位，重新爬取约 {model.estimate('recrawl'):.1f}s/位")
+
+    state = load_state(args.output_dir)
+    if state:
+        print(f"上次运行 {state.get('run_id')}（{state.get('updated_at')}）：完成 {len(state.get('completed', []))} 位，"
+              f"失败 {len(state.get('failed', []))} 位，推迟 {len(state.get('deferred', []))} 位，"
+              f"累计重新爬取 {len(state.get('recrawled', {}))} 位")
+        for entry in state.get("deferred", [])[:20]:
+            print(f"  推迟: {entry['name']}（{entry['kind']}，分数 {entry['score']}，估计 {entry['estimate']}s）")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
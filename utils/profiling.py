@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+按阶段的性能剖析模块（默认关闭）
+
+运行变慢时，用来判断时间到底花在 Python 本身（BeautifulSoup 解析、ScrapeGraphAI 构图、JSON处理）
+还是网络等待上：对选定的阶段开启 cProfile 和 tracemalloc，同一阶段的多次调用累计到一起，
+运行结束时写出：
+- <输出目录>/_profiles/<run_id>/<stage>.prof：pstats 格式，可用 snakeviz / `python -m pstats` 查看
+- <输出目录>/_profiles/<run_id>/summary.txt：每个阶段按累计耗时排序的热点函数、内存分配最多的代码行和峰值内存
+
+阶段名与 utils.run_logging.log_stage 相同（list_teachers、school_scrape、quality_check、
+aminer_search、aminer_scrape、merge、save），未开启时 profile_stage 不做任何事，开销可以忽略。
+
+cProfile 只剖析调用线程；同一时刻只剖析一个阶段，并发执行时其他线程上的同名阶段会被跳过。
+
+用法：
+    enable_profiling(output_dir, stages=["school_scrape", "merge"])   # 或 stages=["all"]
+    ...
+    finish_profiling(run_id)
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+PROFILES_DIR_NAME = "_profiles"
+ALL_STAGES = "all"
+# tracemalloc 保存的调用栈深度，1 即只按分配所在的代码行统计
+TRACEMALLOC_FRAMES = 1
+
+
+class StageProfile:
+    """单个阶段的累计剖析结果"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.calls = 0
+        self.skipped = 0
+        self.wall_seconds = 0.0
+        self.peak_bytes = 0
+        # (文件名, 行号) -> [净分配字节数, 净分配次数]
+        self.allocations: Dict[Tuple[str, int], List[int]] = {}
+
+    def add_allocations(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> None:
+        for stat in after.compare_to(before, "lineno"):
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            entry = self.allocations.setdefault((frame.filename, frame.lineno), [0, 0])
+            entry[0] += stat.size_diff
+            entry[1] += stat.count_diff
+
+
+class StageProfiler:
+    """按阶段累计 cProfile 和 tracemalloc 数据"""
+
+    def __init__(self, output_dir: str, stages: Iterable[str], top_n: int = 20, memory: bool = True):
+        self.output_dir = output_dir
+        self.stages = set(stages)
+        self.top_n = top_n
+        self.memory = memory
+        self.results: Dict[str, StageProfile] = {}
+        self._busy = threading.Lock()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def wants(self, stage: str) -> bool:
+        return ALL_STAGES in self.stages or stage in self.stages
+
+    @contextmanager
+    def profile(self, stage: str) -> Iterator[None]:
+        result = self.results.setdefault(stage, StageProfile())
+        if not self._busy.acquire(blocking=False):
+            # 另一个阶段正在剖析（嵌套或并发），本次不计入
+            result.skipped += 1
+            yield
+            return
+        try:
+            before = self._snapshot()
+            if self.memory:
+                tracemalloc.reset_peak()
+            start_time = time.perf_counter()
+            result.profile.enable()
+            try:
+                yield
+            finally:
+                result.profile.disable()
+                result.wall_seconds += time.perf_counter() - start_time
+                result.calls += 1
+                if self.memory:
+                    result.peak_bytes = max(result.peak_bytes, tracemalloc.get_traced_memory()[1])
+                    result.add_allocations(before, self._snapshot())
+        finally:
+            self._busy.release()
+
+    def _snapshot(self) -> Optional[tracemalloc.Snapshot]:
+        if not self.memory:
+            return None
+        # 排除 tracemalloc 和本模块自身的分配
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def write(self, run_id: str) -> Optional[str]:
+        """
+        写出各阶段的 .prof 文件和文本汇总
+
+        参数:
+            run_id: 运行标识，作为子目录名
+
+        返回:
+            Optional[str]: 汇总文件路径，没有任何剖析数据时返回 None
+        """
+        results = {stage: result for stage, result in self.results.items() if result.calls}
+        if not results:
+            return None
+        profile_dir = os.path.join(self.output_dir, PROFILES_DIR_NAME, run_id)
+        os.makedirs(profile_dir, exist_ok=True)
+
+        sections = []
+        for stage, result in sorted(results.items(), key=lambda item: -item[1].wall_seconds):
+            result.profile.dump_stats(os.path.join(profile_dir, f"{stage}.prof"))
+            sections.append(self._format_stage(stage, result))
+
+        summary_path = os.path.join(profile_dir, "summary.txt")
+        with open(summary_path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write("\n\n".join(sections) + "\n")
+        os.replace(summary_path + ".tmp", summary_path)
+        return summary_path
+
+    def _format_stage(self, stage: str, result: StageProfile) -> str:
+        cpu_seconds = pstats.Stats(result.profile).total_tt
+        lines = [f"===== {stage} =====",
+                 f"调用 {result.calls} 次（跳过 {result.skipped} 次），墙钟 {result.wall_seconds:.2f} 秒，"
+                 f"Python 函数内耗时 {cpu_seconds:.2f} 秒"
+                 + (f"，峰值内存 {result.peak_bytes / 1024 / 1024:.1f} MB" if self.memory else "")]
+
+        stream = io.StringIO()
+        stats = pstats.Stats(result.profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        lines.append(f"-- 热点函数（按累计耗时，前 {self.top_n}）--")
+        lines.append(_trim_pstats_output(stream.getvalue()))
+
+        if self.memory and result.allocations:
+            lines.append(f"-- 内存分配（按净分配字节数，前 {self.top_n}）--")
+            top = sorted(result.allocations.items(), key=lambda item: -item[1][0])[:self.top_n]
+            for (filename, lineno), (size, count) in top:
+                source = linecache.getline(filename, lineno).strip()
+                lines.append(f"{size / 1024:>10.1f} KiB {count:>8} 次  {filename}:{lineno}  {source}")
+        return "\n".join(lines)
+
+
+def _trim_pstats_output(text: str) -> str:
+    """去掉 pstats 输出开头的统计行，只保留表格"""
+    lines = text.strip("\n").splitlines()
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("ncalls"):
+            return "\n".join(lines[i:])
+    return "\n".join(lines)
+
+
+# 当前进程的剖析器（未开启时为 None）
+_profiler: Optional[StageProfiler] = None
+
+
+def enable_profiling(output_dir: str, stages: Iterable[str], top_n: int = 20, memory: bool = True) -> StageProfiler:
+    """
+    开启按阶段剖析
+
+    参数:
+        output_dir: 教师JSON输出目录（剖析结果写入其下的 _profiles/）
+        stages: 要剖析的阶段名，"all" 表示全部阶段
+        top_n: 汇总中列出的热点函数/分配位置数量
+        memory: 是否同时用 tracemalloc 统计内存分配（会明显拖慢被剖析的阶段）
+
+    返回:
+        StageProfiler: 剖析器
+    """
+    global _profiler
+    _profiler = StageProfiler(output_dir, stages, top_n=top_n, memory=memory)
+    return _profiler
+
+
+@contextmanager
+def profile_stage(stage: str) -> Iterator[None]:
+    """剖析一个阶段；未开启剖析或该阶段未被选中时什么也不做"""
+    profiler = _profiler
+    if profiler is None or not profiler.wants(stage):
+        yield
+        return
+    with profiler.profile(stage):
+        yield
+
+
+def finish_profiling(run_id: Optional[str] = None) -> Optional[str]:
+    """写出剖析结果并关闭剖析，返回汇总文件路径"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    if profiler.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return profiler.write(run_id or time.strftime("%Y%m%d-%H%M%S"))
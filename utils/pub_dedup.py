@@ -0,0 +1,411 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+出版物模糊去重模块
+
+同一篇论文在学校网页和AMiner上常常存在标点、大小写、空格上的差异，
+或者一边缺少DOI，仅靠精确键无法去重。本模块对规范化后的标题做字符
+n-gram 切分，计算 MinHash 签名（单次哈希 + 分桶的 One Permutation Hashing，
+每个标题只需遍历一次 n-gram），再用 LSH 分段建立倒排索引，
+只对落在同一个桶里的候选做精确 Jaccard 校验，整体复杂度接近线性。
+
+既可用于单个教师的 merge_publications，也可用于全库范围内查找
+多位教师共同发表的论文（find_corpus_duplicates）。
+"""
+from typing import Dict, List, Any, Optional, Tuple, Iterable, FrozenSet
+from functools import lru_cache
+import re
+import unicodedata
+
+# 非文字字符（标点、空白、下划线）
+_NON_WORD_RE = re.compile(r'[\W_]+', re.UNICODE)
+_CJK_RE = re.compile(r'[㐀-鿿]')
+_DOI_PREFIX_RE = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+# ASCII 中的非字母数字字符（与 _NON_WORD_RE 在 ASCII 范围内匹配的字符相同）
+_ASCII_NON_ALNUM = bytes(c for c in range(128) if not chr(c).isalnum())
+
+# 签名长度与LSH分段：96个桶，16段×6行。相似度为 s 的两个标题成为候选的概率约为 1-(1-s^6)^16，
+# S 曲线的拐点约在 (1/16)^(1/6)≈0.63，低于 DEFAULT_THRESHOLD：相似度 0.8 时约 99%，0.85 以上几乎必然，
+# 与条目较少时逐条校验的结果一致；相似度 0.3 的无关标题约 1% 成为候选（再由精确 Jaccard 排除）
+NUM_BUCKETS = 96
+NUM_BANDS = 16
+# 候选经过精确 Jaccard 校验的阈值
+DEFAULT_THRESHOLD = 0.8
+# 允许的年份差（在线发表与正式出版常差一年）
+YEAR_TOLERANCE = 1
+# 条目数不超过该值时逐条校验，比计算签名更快
+SMALL_INDEX_LIMIT = 32
+
+# 抽取结果中表示“缺失”的占位值（ScrapeGraphAI 找不到字段时会填 NA）
+PLACEHOLDER_VALUES = frozenset(('na', 'n/a', 'none', 'null', '无', '暂无'))
+
+_MAX_HASH = 1 << 32
+_HASH_MASK = _MAX_HASH - 1
+
+
+def normalize_title(title: Any) -> str:
+    """规范化标题：全半角统一、小写、去掉标点和空白"""
+    if not isinstance(title, str):
+        return ""
+    return _normalize_title_str(title)
+
+
+@lru_cache(maxsize=1 << 16)
+def _normalize_title_str(title: str) -> str:
+    if title.isascii():
+        # 英文标题的快速路径：NFKC 对 ASCII 不起作用，按字节删除非字母数字字符比正则替换快得多
+        title = title.lower()
+        if title.strip() in PLACEHOLDER_VALUES:
+            return ""
+        return title.encode('ascii').translate(None, _ASCII_NON_ALNUM).decode('ascii')
+    title = unicodedata.normalize('NFKC', title).lower()
+    if title.strip() in PLACEHOLDER_VALUES:
+        return ""
+    return _NON_WORD_RE.sub('', title)
+
+
+def normalize_doi(doi: Any) -> str:
+    """规范化DOI：去掉 https://doi.org/ 等前缀并小写"""
+    if not isinstance(doi, str) or not doi:
+        return ""
+    return _normalize_doi_str(doi)
+
+
+@lru_cache(maxsize=1 << 16)
+def _normalize_doi_str(doi: str) -> str:
+    doi = _DOI_PREFIX_RE.sub('', doi.strip())
+    doi = "".join(doi.split()).lower()
+    return "" if doi in PLACEHOLDER_VALUES else doi
+
+
+def shingles(normalized_title: str) -> FrozenSet[str]:
+    """把规范化标题切成字符 n-gram（中文用2-gram，其它用3-gram）"""
+    if not normalized_title:
+        return frozenset()
+    n = 2 if _CJK_RE.search(normalized_title) else 3
+    if len(normalized_title) <= n:
+        return frozenset((normalized_title,))
+    return frozenset([normalized_title[i:i + n] for i in range(len(normalized_title) - n + 1)])
+
+
+def minhash_signature(shingle_set: FrozenSet[str], num_buckets: int = NUM_BUCKETS) -> Tuple[int, ...]:
+    """
+    计算 One Permutation Hashing 签名
+
+    每个 n-gram 只哈希一次：哈希值对桶数取模决定所在桶，商作为桶内取最小的值；
+    空桶从右侧最近的非空桶借值（加上距离偏移），保证签名长度固定。
+    使用进程内的字符串哈希（有缓存、速度快），签名只能在同一进程内比较。
+    """
+    if not shingle_set:
+        return ()
+    mins = [_MAX_HASH] * num_buckets
+    for shingle in shingle_set:
+        h = hash(shingle) & _HASH_MASK
+        bucket, value = h % num_buckets, h // num_buckets
+        if value < mins[bucket]:
+            mins[bucket] = value
+
+    if _MAX_HASH in mins:
+        # 空桶致密化：从右向左扫描两圈（处理环绕），记住右侧最近的非空桶
+        filled = list(mins)
+        nearest = None
+        for i in range(2 * num_buckets - 1, -1, -1):
+            if mins[i % num_buckets] != _MAX_HASH:
+                nearest = i
+            elif i < num_buckets and nearest is not None:
+                filled[i] = mins[nearest % num_buckets] + (nearest - i) * _MAX_HASH
+        mins = filled
+    return tuple(mins)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """精确 Jaccard 相似度"""
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+def _pub_year(pub: Dict) -> Optional[int]:
+    """提取出版物年份，无法解析时返回 None"""
+    year = pub.get('year')
+    if isinstance(year, bool):
+        return None
+    if isinstance(year, (int, float)):
+        return int(year)
+    if isinstance(year, str) and year.strip().isdigit():
+        return int(year.strip())
+    return None
+
+
+@lru_cache(maxsize=1 << 16)
+def _cached_shingles(normalized_title: str) -> FrozenSet[str]:
+    """带缓存的 n-gram 切分（同一标题在学校/AMiner数据和不同教师间反复出现）"""
+    return shingles(normalized_title)
+
+
+@lru_cache(maxsize=1 << 16)
+def _cached_signature(normalized_title: str, num_buckets: int) -> Tuple[int, ...]:
+    """带缓存的 MinHash 签名"""
+    return minhash_signature(_cached_shingles(normalized_title), num_buckets)
+
+
+@lru_cache(maxsize=1 << 16)
+def _cached_bands(normalized_title: str, num_buckets: int, num_bands: int) -> Tuple[Tuple[int, ...], ...]:
+    """带缓存的 LSH 分段（签名按段切开，同一标题查找和加入索引时各用一次）"""
+    # zip 同一个迭代器 rows 次，依次取出每段的 rows 个值
+    return tuple(zip(*[iter(_cached_signature(normalized_title, num_buckets))] * (num_buckets // num_bands)))
+
+
+def _similar(normalized: str, other_normalized: str, threshold: float) -> bool:
+    """两个规范化标题相同，或 n-gram Jaccard 相似度达到阈值"""
+    if normalized == other_normalized:
+        return True
+    a, b = _cached_shingles(normalized), _cached_shingles(other_normalized)
+    # Jaccard 不超过 较小集合/较大集合，大小相差过多时不必计算交集
+    if len(a) < len(b):
+        if len(a) < threshold * len(b):
+            return False
+    elif len(b) < threshold * len(a):
+        return False
+    return jaccard(a, b) >= threshold
+
+
+# 索引内部条目：(规范化DOI, 年份, {标题字段: 规范化标题})
+_Entry = Tuple[str, Optional[int], Dict[str, str]]
+
+
+class PublicationIndex:
+    """
+    出版物近似去重索引
+
+    用法:
+        index = PublicationIndex()
+        for pub in pubs:
+            entry_id, is_duplicate = index.add_or_match(pub)
+
+    判定规则：
+    1. DOI 相同 -> 重复；双方都有 DOI 且不同 -> 不重复
+    2. 年份都存在且相差超过 YEAR_TOLERANCE -> 不重复
+    3. 英文标题或中文标题的 n-gram Jaccard 相似度 >= threshold -> 重复
+
+    规范化标题完全相同的条目先按 (标题字段, 规范化标题) 精确查找，不计算相似度；
+    其余条目较少时（单个教师的出版物通常只有几条到几十条）直接逐条校验，
+    超过 small_limit 后才计算 MinHash 签名并建立 LSH 索引。
+    """
+
+    TITLE_FIELDS = ('title_en', 'title_cn')
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_buckets: int = NUM_BUCKETS,
+                 num_bands: int = NUM_BANDS, small_limit: int = SMALL_INDEX_LIMIT):
+        if num_buckets % num_bands:
+            raise ValueError("num_buckets 必须是 num_bands 的整数倍")
+        self.threshold = threshold
+        self.num_buckets = num_buckets
+        self.num_bands = num_bands
+        self.rows = num_buckets // num_bands
+        self.small_limit = small_limit
+        self.entries: List[_Entry] = []
+        self._doi_index: Dict[str, int] = {}
+        # {(标题字段, 规范化标题): 条目编号}
+        self._title_index: Dict[Tuple[str, str], int] = {}
+        # {年份: {LSH分段键: [条目编号]}}，按年份分区，只查找年份相差不超过 YEAR_TOLERANCE 的分区；
+        # 条目数超过 small_limit 之前为 None（逐条校验模式）
+        self._band_index: Optional[Dict[Optional[int], Dict[Tuple, List[int]]]] = None
+        # 统计候选校验次数，便于评估索引效果
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _prepare(self, pub: Dict) -> _Entry:
+        get = pub.get
+        titles = {}
+        for field in self.TITLE_FIELDS:
+            title = get(field)
+            if title and type(title) is str:
+                normalized = _normalize_title_str(title)
+                if normalized:
+                    titles[field] = normalized
+        doi, year = get('DOI'), get('year')
+        return (_normalize_doi_str(doi) if doi and type(doi) is str else "",
+                year if type(year) is int else _pub_year(pub), titles)
+
+    def _band_keys(self, titles: Dict[str, str]) -> List[Tuple]:
+        keys = []
+        for field, normalized in titles.items():
+            bands = _cached_bands(normalized, self.num_buckets, self.num_bands)
+            keys.extend((field, band, rows) for band, rows in enumerate(bands))
+        return keys
+
+    def _index_entry(self, entry_id: int) -> None:
+        _, year, titles = self.entries[entry_id]
+        partition = self._band_index.setdefault(year, {})
+        for key in self._band_keys(titles):
+            partition.setdefault(key, []).append(entry_id)
+
+    def _candidates(self, year: Optional[int], titles: Dict[str, str]) -> Iterable[int]:
+        """LSH 分段相同、年份可能相符的条目，按编号升序（与逐条校验一样优先匹配最早加入的条目）"""
+        if year is None:
+            partitions = list(self._band_index.values())
+        else:
+            partitions = [self._band_index.get(y) for y in range(year - YEAR_TOLERANCE, year + YEAR_TOLERANCE + 1)]
+            partitions = [p for p in partitions + [self._band_index.get(None)] if p]
+        seen = set()
+        for key in self._band_keys(titles):
+            for partition in partitions:
+                bucket = partition.get(key)
+                if bucket:
+                    seen.update(bucket)
+        return sorted(seen)
+
+    def _find(self, entry: _Entry) -> Optional[int]:
+        doi, year, titles = entry
+        if not titles or not self.entries:
+            return self._doi_index.get(doi) if doi else None
+        if doi:
+            match = self._doi_index.get(doi)
+            if match is not None:
+                return match
+        # 规范化标题完全相同时只需检查DOI和年份，不计算相似度
+        for key in titles.items():
+            exact = self._title_index.get(key)
+            if exact is not None:
+                other_doi, other_year, _ = self.entries[exact]
+                if (doi == other_doi if doi and other_doi else
+                        year is None or other_year is None or abs(year - other_year) <= YEAR_TOLERANCE):
+                    return exact
+        # 条目较少时逐条校验，否则只校验 LSH 分段中相同的候选
+        entries = self.entries
+        candidates = range(len(entries)) if self._band_index is None else self._candidates(year, titles)
+        threshold = self.threshold
+        for candidate in candidates:
+            other_doi, other_year, other_titles = entries[candidate]
+            if doi and other_doi:
+                continue    # DOI 相同的条目已经由 _doi_index 找到
+            if year is not None and other_year is not None and abs(year - other_year) > YEAR_TOLERANCE:
+                continue
+            self.comparisons += 1
+            for field, normalized in titles.items():
+                other_normalized = other_titles.get(field)
+                if other_normalized and _similar(normalized, other_normalized, threshold):
+                    return candidate
+        return None
+
+    def find(self, pub: Dict) -> Optional[int]:
+        """查找与 pub 重复的已索引条目，返回其编号（不修改索引）"""
+        return self._find(self._prepare(pub))
+
+    def add_or_match(self, pub: Dict) -> Tuple[int, bool]:
+        """
+        查找重复条目，找不到时把 pub 加入索引
+
+        返回:
+            Tuple[int, bool]: (条目编号, 是否为已有条目的重复)
+        """
+        entry = self._prepare(pub)
+        match = self._find(entry)
+        doi = entry[0]
+        if match is not None:
+            # 补全已有条目缺失的DOI，方便后续精确匹配
+            if doi and not self.entries[match][0]:
+                self.entries[match] = (doi,) + self.entries[match][1:]
+                self._doi_index.setdefault(doi, match)
+            return match, True
+
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        if doi:
+            self._doi_index[doi] = entry_id
+        for key in entry[2].items():
+            self._title_index.setdefault(key, entry_id)
+        if self._band_index is not None:
+            self._index_entry(entry_id)
+        elif entry_id >= self.small_limit:
+            # 条目数超过阈值，切换到 LSH 索引模式
+            self._band_index = {}
+            for existing_id in range(len(self.entries)):
+                self._index_entry(existing_id)
+        return entry_id, False
+
+
+def dedupe_publications(pubs: Iterable[Any], index: Optional[PublicationIndex] = None) -> List[Dict]:
+    """对出版物列表近似去重，保留每组中最先出现的条目"""
+    index = index or PublicationIndex()
+    result = []
+    for pub in pubs:
+        if not isinstance(pub, dict):
+            continue
+        if not (pub.get('title_en') or pub.get('title_cn') or pub.get('DOI')):
+            continue
+        _, is_duplicate = index.add_or_match(pub)
+        if not is_duplicate:
+            result.append(pub)
+    return result
+
+
+def find_corpus_duplicates(records: Iterable[Tuple[str, List[Any]]],
+                           threshold: float = DEFAULT_THRESHOLD) -> List[List[Tuple[str, int]]]:
+    """
+    在全库范围内查找被多位教师共同收录的论文
+
+    参数:
+        records: (教师标识, 出版物列表) 的可迭代对象
+        threshold: 标题相似度阈值
+
+    返回:
+        List[List[Tuple[str, int]]]: 每组是同一篇论文在各教师记录中的 (教师标识, 出版物下标)，
+        只返回涉及两位及以上教师的分组
+    """
+    index = PublicationIndex(threshold=threshold)
+    groups: Dict[int, List[Tuple[str, int]]] = {}
+    for teacher_id, pubs in records:
+        if not isinstance(pubs, list):
+            continue
+        for i, pub in enumerate(pubs):
+            if not isinstance(pub, dict):
+                continue
+            if not (pub.get('title_en') or pub.get('title_cn') or pub.get('DOI')):
+                continue
+            entry_id, _ = index.add_or_match(pub)
+            groups.setdefault(entry_id, []).append((teacher_id, i))
+
+    return [members for members in groups.values()
+            if len({teacher_id for teacher_id, _ in members}) > 1]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    import json
+    import os
+
+    parser = argparse.ArgumentParser(description="查找全库范围内被多位教师共同收录的论文")
+    parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录（可指定多个）")
+    parser.add_argument("--output", default=None, help="结果输出路径（JSON），默认只打印摘要")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="标题相似度阈值")
+    args = parser.parse_args(argv)
+
+    def iter_records():
+        for data_dir in args.data_dirs:
+            for filename in sorted(os.listdir(data_dir)):
+                if not filename.endswith('.json'):
+                    continue
+                with open(os.path.join(data_dir, filename), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                academic = data.get('academic') if isinstance(data, dict) else None
+                pubs = academic.get('publications') if isinstance(academic, dict) else None
+                yield os.path.splitext(filename)[0], pubs
+
+    groups = find_corpus_duplicates(iter_records(), threshold=args.threshold)
+    print(f"共发现 {len(groups)} 篇被多位教师共同收录的论文")
+    for members in groups[:20]:
+        print("  " + ", ".join(f"{teacher}[{i}]" for teacher, i in members))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([[list(member) for member in members] for members in groups], f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+教师数据只读查询服务
+
+启动时把语料一次性读入内存并建立倒排索引，其他工具通过HTTP查询，无需各自解析JSON：
+- 索引：姓名、职称、导师资格、研究领域词（中文按二元组切分，英文按单词），
+  出生年份保存为有序数组，范围查询用二分查找
+- 每条记录预先序列化为JSON字节串，详情接口直接返回，列表接口只返回摘要字段
+- 后台线程定期检查源文件（文件名、mtime、大小），有变化时在后台重建索引后整体替换，
+  查询不会被阻塞
+- 响应带 ETag（由索引版本和请求参数决定），客户端带 If-None-Match 时直接返回 304
+
+接口：
+    GET /teachers?name=&title=教授&mentor=博导&birth_from=1980&birth_to=1989&field=陆气相互作用
+                 &sort=likes&page=1&page_size=20
+    GET /teachers/<teacher_id>[?source=NUIST_teacher_data]
+    GET /stats
+
+用法：
+    python -m utils.query_service NUIST_teacher_data [--host 127.0.0.1] [--port 8765] [--reload-interval 5]
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from bisect import bisect_left, bisect_right
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from utils.corpus_reader import JSONL_SUFFIXES, iter_records
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+SORT_KEYS = ("teacher_id", "likes", "birth_year")
+
+_BIRTH_YEAR_RE = re.compile(r'(\d{4})')
+_TOKEN_RE = re.compile(r'[\u4e00-\u9fff]+|[a-z0-9]+')
+
+
+def field_tokens(text: str) -> List[str]:
+    """研究领域分词：中文连续段切成二元组（单字保留原样），英文和数字按单词"""
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if '\u4e00' <= run[0] <= '\u9fff' and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(item) for item in value if item]
+    return [str(value)] if value else []
+
+
+def _as_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+
+def source_signature(sources: Sequence[str]) -> str:
+    """源文件签名（文件名、mtime、大小），用于判断是否需要重建索引"""
+    digest = hashlib.sha1()
+    for source in sources:
+        if os.path.isdir(source):
+            with os.scandir(source) as entries:
+                stats = sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                               for entry in entries if entry.is_file() and entry.name.endswith('.json'))
+        else:
+            stat = os.stat(source)
+            stats = [(source, stat.st_mtime_ns, stat.st_size)]
+        digest.update(repr((source, stats)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class CorpusIndex:
+    """
+    不可变的内存索引，重建时整体替换
+
+    记录按 (source, teacher_id) 排序后以下标表示，各倒排表保存下标的元组
+    """
+
+    def __init__(self, records: Iterable[Tuple[str, str, Dict]], generation: str):
+        self.generation = generation
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        rows = sorted(records, key=lambda item: (item[0], item[1]))
+
+        self.summaries: List[Dict] = []
+        self.documents: List[bytes] = []
+        self.field_texts: List[List[str]] = []
+        self.by_id: Dict[Tuple[str, str], int] = {}
+        self.by_teacher_id: Dict[str, int] = {}
+        by_name: Dict[str, List[int]] = {}
+        by_title: Dict[str, List[int]] = {}
+        by_mentor: Dict[str, List[int]] = {}
+        by_token: Dict[str, List[int]] = {}
+        birth_years: List[Tuple[int, int]] = []
+
+        for pos, (source, teacher_id, data) in enumerate(rows):
+            basic_info = data.get('basic_info') if isinstance(data.get('basic_info'), dict) else {}
+            bio_details = data.get('bio_details') if isinstance(data.get('bio_details'), dict) else {}
+            academic = data.get('academic') if isinstance(data.get('academic'), dict) else {}
+            name = str(basic_info.get('name') or teacher_id)
+            birth_year_raw = bio_details.get('birth_year')
+            birth_match = _BIRTH_YEAR_RE.search(str(birth_year_raw)) if birth_year_raw else None
+            birth_year = int(birth_match.group(1)) if birth_match else None
+            research_fields = _as_list(academic.get('research_fields'))
+            publications = academic.get('publications') if isinstance(academic.get('publications'), list) else []
+
+            summary = {
+                "teacher_id": teacher_id, "source": source, "name": name,
+                "title": _as_list(basic_info.get('title')),
+                "mentor_qualification": _as_list(basic_info.get('mentor_qualification')),
+                "birth_year": birth_year, "likes": _as_int(data.get('likes')),
+                "research_fields": research_fields, "publication_count": len(publications),
+            }
+            self.summaries.append(summary)
+            self.documents.append(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+            self.field_texts.append([field.lower() for field in research_fields])
+            self.by_id[(source, teacher_id)] = pos
+            self.by_teacher_id.setdefault(teacher_id, pos)
+
+            for key in {name.lower(), teacher_id.lower()}:
+                by_name.setdefault(key, []).append(pos)
+            for title in set(summary["title"]):
+                by_title.setdefault(title, []).append(pos)
+            for mentor in set(summary["mentor_qualification"]):
+                by_mentor.setdefault(mentor, []).append(pos)
+            for token in {token for field in research_fields for token in field_tokens(field)}:
+                by_token.setdefault(token, []).append(pos)
+            if birth_year is not None:
+                birth_years.append((birth_year, pos))
+
+        self.by_name = {key: tuple(value) for key, value in by_name.items()}
+        self.by_title = {key: tuple(value) for key, value in by_title.items()}
+        self.by_mentor = {key: tuple(value) for key, value in by_mentor.items()}
+        self.by_token = {key: tuple(value) for key, value in by_token.items()}
+        birth_years.sort()
+        self.birth_year_keys = [year for year, _ in birth_years]
+        self.birth_year_positions = [pos for _, pos in birth_years]
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    @classmethod
+    def load(cls, sources: Sequence[str], workers: int = 1) -> "CorpusIndex":
+        """从输出目录或JSONL文件构建索引"""
+        generation = source_signature(sources)
+        records = []
+        for source in sources:
+            source_name = (os.path.basename(os.path.normpath(source)) if os.path.isdir(source)
+                           else os.path.splitext(os.path.basename(source))[0])
+            records.extend((source_name, teacher_id, data)
+                           for teacher_id, data in iter_records(source, workers=workers))
+        return cls(records, generation)
+
+    def _field_candidates(self, query: str) -> Optional[set]:
+        """研究领域检索：先按词求交集，再确认中文片段确实以子串形式出现在某个研究领域中"""
+        tokens = field_tokens(query)
+        if not tokens:
+            return None
+        candidates = None
+        for token in set(tokens):
+            if len(token) == 1 and '\u4e00' <= token <= '\u9fff':
+                # 单个汉字没有对应的二元组，合并所有包含该字的词
+                postings = {pos for key, value in self.by_token.items() if token in key for pos in value}
+            else:
+                postings = set(self.by_token.get(token, ()))
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return set()
+        cjk_runs = [run for run in _TOKEN_RE.findall(query.lower()) if '\u4e00' <= run[0] <= '\u9fff']
+        return {pos for pos in candidates
+                if all(any(run in field for field in self.field_texts[pos]) for run in cjk_runs)}
+
+    def query(self, name: Optional[str] = None, title: Optional[str] = None, mentor: Optional[str] = None,
+              birth_from: Optional[int] = None, birth_to: Optional[int] = None, field: Optional[str] = None,
+              sort: str = "teacher_id") -> List[int]:
+        """
+        按条件筛选（各条件之间为“与”关系），返回排序后的记录下标列表
+
+        参数:
+            name: 姓名或 teacher_id（不区分大小写的精确匹配）
+            title: 职称（精确匹配，如 "教授"）
+            mentor: 导师资格（精确匹配，如 "博导"）
+            birth_from / birth_to: 出生年份范围（闭区间）
+            field: 研究领域关键词
+            sort: teacher_id（默认）、likes 或 birth_year，后两者降序
+        """
+        selected: Optional[set] = None
+
+        def narrow(positions: Iterable[int]) -> None:
+            nonlocal selected
+            positions = set(positions)
+            selected = positions if selected is None else selected & positions
+
+        if name:
+            narrow(self.by_name.get(name.strip().lower(), ()))
+        if title:
+            narrow(self.by_title.get(title, ()))
+        if mentor:
+            narrow(self.by_mentor.get(mentor, ()))
+        if birth_from is not None or birth_to is not None:
+            lo = 0 if birth_from is None else bisect_left(self.birth_year_keys, birth_from)
+            hi = len(self.birth_year_keys) if birth_to is None else bisect_right(self.birth_year_keys, birth_to)
+            narrow(self.birth_year_positions[lo:hi])
+        if field:
+            candidates = self._field_candidates(field)
+            if candidates is not None:
+                narrow(candidates)
+
+        positions = sorted(selected) if selected is not None else list(range(len(self.summaries)))
+        if sort in ("likes", "birth_year"):
+            positions.sort(key=lambda pos: self.summaries[pos][sort] or 0, reverse=True)
+        return positions
+
+
+class IndexHolder:
+    """持有当前索引，并在后台线程中检测源文件变化、重建索引"""
+
+    def __init__(self, sources: Sequence[str], reload_interval: float = 5.0, workers: int = 1):
+        self.sources = list(sources)
+        self.reload_interval = reload_interval
+        self.workers = workers
+        self.index = CorpusIndex.load(self.sources, workers)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def reload_if_changed(self) -> bool:
+        """源文件有变化时重建索引并替换，返回是否发生了重建"""
+        if source_signature(self.sources) == self.index.generation:
+            return False
+        start_time = time.time()
+        index = CorpusIndex.load(self.sources, self.workers)
+        self.index = index
+        logging.info(f"索引已重建：{len(index)} 位教师，耗时 {time.time() - start_time:.2f} 秒")
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logging.error(f"重建索引失败，继续使用旧索引: {e}")
+
+    def start(self) -> None:
+        if self.reload_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="index-reloader", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# --- HTTP ---
+
+def _int_param(params: Dict[str, List[str]], key: str) -> Optional[int]:
+    values = params.get(key)
+    if not values or not values[0].strip():
+        return None
+    try:
+        return int(values[0])
+    except ValueError:
+        raise ValueError(f"参数 {key} 应为整数: {values[0]}")
+
+
+def _str_param(params: Dict[str, List[str]], key: str) -> Optional[str]:
+    values = params.get(key)
+    return values[0] if values and values[0].strip() else None
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """只读查询接口（由 QueryServer 注入 holder）"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "TeacherQuery/1.0"
+    # 响应头和响应体分两次写出，长连接下不关闭 Nagle 会等待约40ms的延迟确认
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, json.dumps({"error": message}, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self) -> None:
+        index = self.server.holder.index
+        url = urlsplit(self.path)
+        # 索引版本 + 请求路径/参数唯一决定响应内容，命中时无需计算结果
+        etag = '"' + hashlib.sha1(f"{index.generation}|{url.path}?{url.query}".encode('utf-8')).hexdigest()[:20] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        params = parse_qs(url.query)
+        try:
+            if url.path == "/teachers":
+                body = self._list_teachers(index, params)
+            elif url.path.startswith("/teachers/"):
+                body = self._get_teacher(index, unquote(url.path[len("/teachers/"):]), _str_param(params, "source"))
+                if body is None:
+                    self._send_error(HTTPStatus.NOT_FOUND, "未找到该教师")
+                    return
+            elif url.path == "/stats":
+                body = json.dumps({"teachers": len(index), "generation": index.generation,
+                                   "loaded_at": index.loaded_at}, ensure_ascii=False).encode('utf-8')
+            else:
+                self._send_error(HTTPStatus.NOT_FOUND, f"未知的接口: {url.path}")
+                return
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        self._send_json(HTTPStatus.OK, body, etag)
+
+    def _list_teachers(self, index: CorpusIndex, params: Dict[str, List[str]]) -> bytes:
+        sort = _str_param(params, "sort") or "teacher_id"
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort 可选: {', '.join(SORT_KEYS)}")
+        page = max(_int_param(params, "page") or 1, 1)
+        page_size = min(max(_int_param(params, "page_size") or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+        positions = index.query(
+            name=_str_param(params, "name"), title=_str_param(params, "title"),
+            mentor=_str_param(params, "mentor"), birth_from=_int_param(params, "birth_from"),
+            birth_to=_int_param(params, "birth_to"), field=_str_param(params, "field"), sort=sort)
+        start = (page - 1) * page_size
+        result = {
+            "total": len(positions), "page": page, "page_size": page_size,
+            "items": [index.summaries[pos] for pos in positions[start:start + page_size]],
+        }
+        return json.dumps(result, ensure_ascii=False).encode('utf-8')
+
+    def _get_teacher(self, index: CorpusIndex, teacher_id: str, source: Optional[str]) -> Optional[bytes]:
+        if source:
+            pos = index.by_id.get((source, teacher_id))
+        else:
+            pos = index.by_teacher_id.get(teacher_id)
+        return None if pos is None else index.documents[pos]
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], holder: IndexHolder):
+        super().__init__(address, QueryHandler)
+        self.holder = holder
+
+
+def serve(sources: Sequence[str], host: str = "127.0.0.1", port: int = 8765,
+          reload_interval: float = 5.0, workers: int = 1) -> None:
+    """加载语料并启动服务（阻塞直到 Ctrl+C）"""
+    start_time = time.time()
+    holder = IndexHolder(sources, reload_interval=reload_interval, workers=workers)
+    logging.info(f"已加载 {len(holder.index)} 位教师，耗时 {time.time() - start_time:.2f} 秒")
+    holder.start()
+    server = QueryServer((host, port), holder)
+    logging.info(f"查询服务已启动: http://{host}:{server.server_address[1]}/teachers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("服务已停止")
+    finally:
+        holder.stop()
+        server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="教师数据只读查询服务")
+    parser.add_argument("sources", nargs="+", help="教师JSON输出目录或JSONL文件（可指定多个）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认只监听本机）")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--reload-interval", type=float, default=5.0, help="检查源文件变化的间隔（秒），0 表示不热加载")
+    parser.add_argument("--workers", type=int, default=1, help="加载语料时的并行进程数")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    for source in args.sources:
+        if not os.path.isdir(source) and not source.endswith(JSONL_SUFFIXES):
+            parser.error(f"不支持的数据源: {source}")
+    serve(args.sources, host=args.host, port=args.port, reload_interval=args.reload_interval, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
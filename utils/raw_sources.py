@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+原始数据源快照模块
+
+process_single_teacher 在合并前会把学校网页和AMiner各自的原始抽取结果
+保存到 <输出目录>/_raw/<教师姓名>/<来源>.json，这样合并策略（列表排序、
+出版物优先级等）调整后，可以离线批量重新合并，而无需重新爬取或调用LLM。
+某次运行没有使用AMiner数据时会删除该教师旧的AMiner快照，保证快照与保存的结果一致。
+结果保存在分段存储（--store segments）中的教师，重新合并时也写回分段存储。
+
+用法：
+    python -m utils.raw_sources remerge NUIST_teacher_data [--workers 4] [--dry-run]
+"""
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import logging
+import os
+import time
+
+from utils.merge_data import merge_data
+from utils.segment_store import INDEX_NAME, SegmentStore, store_path_for
+
+RAW_DIR_NAME = "_raw"
+SOURCES = ("school", "aminer")
+
+# 小于该数量时直接在当前进程合并，避免进程池的启动开销
+PARALLEL_THRESHOLD = 256
+
+
+def raw_dir_for(output_dir: str, teacher_name: str) -> str:
+    """返回某位教师原始快照所在目录"""
+    return os.path.join(output_dir, RAW_DIR_NAME, teacher_name)
+
+
+def save_raw_snapshot(output_dir: str, teacher_name: str, source: str, data: Dict) -> str:
+    """
+    保存单个数据源的原始抽取结果
+
+    参数:
+        output_dir: json数据输出目录
+        teacher_name: 教师姓名（与合并结果的文件名一致）
+        source: 数据来源 ("school" 或 "aminer")
+        data: 该来源的原始抽取结果（已包含 data_sources）
+
+    返回:
+        str: 快照文件路径
+    """
+    if source not in SOURCES:
+        raise ValueError(f"未知的数据来源: {source}")
+    snapshot_dir = raw_dir_for(output_dir, teacher_name)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    snapshot_path = os.path.join(snapshot_dir, f"{source}.json")
+    tmp_path = snapshot_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+
+def delete_raw_snapshot(output_dir: str, teacher_name: str, source: str) -> bool:
+    """删除单个数据源的原始快照（本次结果没有使用该来源时调用），返回是否删除了文件"""
+    if source not in SOURCES:
+        raise ValueError(f"未知的数据来源: {source}")
+    snapshot_path = os.path.join(raw_dir_for(output_dir, teacher_name), f"{source}.json")
+    try:
+        os.remove(snapshot_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def load_raw_snapshots(output_dir: str, teacher_name: str) -> Dict[str, Dict]:
+    """读取某位教师已保存的所有原始快照，返回 {来源: 数据}"""
+    snapshots = {}
+    snapshot_dir = raw_dir_for(output_dir, teacher_name)
+    for source in SOURCES:
+        snapshot_path = os.path.join(snapshot_dir, f"{source}.json")
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshots[source] = json.load(f)
+    return snapshots
+
+
+def combine_sources(school_data: Dict, aminer_data: Optional[Dict]) -> Dict:
+    """
+    由原始快照生成最终记录，与 process_single_teacher 的逻辑保持一致：
+    没有AMiner数据时直接使用学校数据，否则调用 merge_data 合并
+    """
+    if not aminer_data:
+        return school_data
+    return merge_data(school_data, aminer_data)
+
+
+def open_store(output_dir: str) -> Optional[SegmentStore]:
+    """输出目录已有分段存储时打开它，否则返回 None"""
+    store_path = store_path_for(output_dir)
+    if not os.path.exists(os.path.join(store_path, INDEX_NAME)):
+        return None
+    return SegmentStore(store_path)
+
+
+def _write_if_changed(output_dir: str, teacher_name: str, merged: Dict, dry_run: bool,
+                      store: Optional[SegmentStore] = None) -> str:
+    """
+    与已有结果比较，有变化时写入，返回 updated 或 unchanged
+
+    记录在分段存储中的教师写回分段存储，其余原子写入 <output_dir>/<教师名>.json
+    """
+    if store is not None and teacher_name in store:
+        if store.get(teacher_name) == merged:
+            return "unchanged"
+        if not dry_run:
+            store.put(teacher_name, merged)
+        return "updated"
+
+    output_path = os.path.join(output_dir, f"{teacher_name}.json")
+    if os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            try:
+                if json.load(f) == merged:
+                    return "unchanged"
+            except ValueError:
+                pass
+
+    if not dry_run:
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, output_path)
+    return "updated"
+
+
+def remerge_teacher(output_dir: str, teacher_name: str, dry_run: bool = False,
+                    store: Optional[SegmentStore] = None) -> str:
+    """
+    重新合并单个教师的数据
+
+    返回:
+        str: "updated"（结果有变化）、"unchanged" 或 "missing"（没有学校快照）
+    """
+    snapshots = load_raw_snapshots(output_dir, teacher_name)
+    if "school" not in snapshots:
+        return "missing"
+    merged = combine_sources(snapshots["school"], snapshots.get("aminer"))
+    return _write_if_changed(output_dir, teacher_name, merged, dry_run, store or open_store(output_dir))
+
+
+def _remerge_chunk(args: Tuple[str, List[str], bool], store: Optional[SegmentStore] = None) -> List[Tuple[str, str]]:
+    """
+    子进程入口：重新合并一批教师
+
+    逐条合并，某条快照格式异常时该教师单独记为失败，不影响同一批的其他教师
+    """
+    output_dir, teacher_names, dry_run = args
+    results = []
+    for teacher_name in teacher_names:
+        try:
+            snapshots = load_raw_snapshots(output_dir, teacher_name)
+        except Exception as e:
+            results.append((teacher_name, f"error: {e}"))
+            continue
+        if "school" not in snapshots:
+            results.append((teacher_name, "missing"))
+            continue
+        try:
+            merged = combine_sources(snapshots["school"], snapshots.get("aminer"))
+            results.append((teacher_name, _write_if_changed(output_dir, teacher_name, merged, dry_run, store)))
+        except Exception as e:
+            results.append((teacher_name, f"error: {e}"))
+    return results
+
+
+def remerge_all(output_dir: str, workers: Optional[int] = None, dry_run: bool = False,
+                chunk_size: int = 64) -> Dict[str, int]:
+    """
+    离线批量重新合并整个输出目录（不访问网络，不调用LLM）
+
+    参数:
+        output_dir: json数据输出目录
+        workers: 进程数，默认为CPU核数；设为1则在当前进程执行
+        dry_run: 只统计会发生变化的记录，不写文件
+        chunk_size: 每个子任务处理的教师数
+
+    返回:
+        Dict[str, int]: 各状态的教师数量
+    """
+    raw_root = os.path.join(output_dir, RAW_DIR_NAME)
+    if not os.path.isdir(raw_root):
+        logging.warning(f"未找到原始快照目录: {raw_root}")
+        return {}
+
+    teacher_names = sorted(entry.name for entry in os.scandir(raw_root) if entry.is_dir())
+    workers = workers or os.cpu_count() or 1
+    chunks = [(output_dir, teacher_names[i:i + chunk_size], dry_run)
+              for i in range(0, len(teacher_names), chunk_size)]
+    # 分段存储只允许一个写入者，有分段存储时在当前进程执行
+    store = open_store(output_dir)
+
+    if workers == 1 or len(teacher_names) < PARALLEL_THRESHOLD or store is not None:
+        chunk_results = (_remerge_chunk(chunk, store) for chunk in chunks)
+        results = [item for chunk in chunk_results for item in chunk]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [item for chunk in executor.map(_remerge_chunk, chunks) for item in chunk]
+
+    counts: Dict[str, int] = {}
+    for teacher_name, status in results:
+        if status.startswith("error"):
+            logging.error(f"重新合并 {teacher_name} 失败: {status}")
+            status = "error"
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="原始数据源快照工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    remerge_parser = subparsers.add_parser("remerge", help="基于原始快照离线批量重新合并")
+    remerge_parser.add_argument("output_dir", help="教师JSON输出目录")
+    remerge_parser.add_argument("--workers", type=int, default=None, help="并行进程数，默认为CPU核数")
+    remerge_parser.add_argument("--dry-run", action="store_true", help="只统计变化，不写文件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == "remerge":
+        start_time = time.time()
+        counts = remerge_all(args.output_dir, workers=args.workers, dry_run=args.dry_run)
+        logging.info(f"重新合并完成{'（dry-run）' if args.dry_run else ''}: "
+                     f"更新 {counts.get('updated', 0)} 位，未变化 {counts.get('unchanged', 0)} 位，"
+                     f"缺少学校快照 {counts.get('missing', 0)} 位，失败 {counts.get('error', 0)} 位，"
+                     f"耗时 {time.time() - start_time:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+紧凑的教师记录模型
+
+流水线中的教师数据（school_data、aminer_data、merged_data）都是嵌套字典。
+同时加载多个学校的数据做分析时，每条记录、每篇论文都是一个带完整键表的字典，
+职称、荣誉、期刊名、研究领域之类重复出现的字符串也各自保存一份。
+这里提供一组带 __slots__ 的记录类：
+
+- TeacherRecord / BasicInfo / BioDetails / Education / Academic / Publication，字段与JSON结构一一对应
+- 分类字段（职称、导师资格、行政职务、荣誉、期刊、研究领域、出生年份）用 sys.intern 驻留，
+  相同的字符串在所有记录间只保存一份
+- 缺失的键记为 MISSING，结构之外的键保存在 extra 中，格式异常的值（例如 basic_info 是字符串）原样保留，
+  因此 from_dict(d).to_dict() == d，转换是无损的
+- loads()/dumps() 优先使用 orjson（可选依赖），没有安装时回退到标准库 json
+
+合并（merge_data）和质量检查（check_data）的入口同时接受字典和 TeacherRecord；
+分析时可以用 load_directory() 把多个输出目录加载为记录对象，再用 utils.analytics.records_frame() 生成统计表。
+
+用法：
+    from utils.record_model import TeacherRecord, load_directory
+    record = TeacherRecord.from_json(raw_bytes)
+    record.basic_info.title, record.academic.publications[0].journal
+    data = record.to_dict()
+
+    python -m benchmarks.bench_record_model   # 每万条记录的内存占用与序列化吞吐量，对比普通字典
+"""
+from typing import Any, Dict, Iterator, List, Tuple, Union
+import json
+import logging
+import os
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _Missing:
+    """缺失字段的占位值（区别于值为 None 的字段）"""
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: Any = _Missing()
+
+# 字段类型：
+# RAW   原样保存
+# CAT   分类字符串，驻留
+# CATS  分类字符串列表，逐项驻留（仍为 list，与字典中的取值类型一致）
+# 其余为嵌套的记录类，或 (list, 记录类) 表示记录对象列表
+RAW, CAT, CATS = "raw", "cat", "cats"
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class _Record:
+    """记录类的公共实现：按 _FIELDS 在字典与对象之间转换"""
+    __slots__ = ("extra",)
+    # ((字段名, 字段类型), ...)
+    _FIELDS: Tuple[Tuple[str, Any], ...] = ()
+    _NAMES: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._NAMES = frozenset(name for name, _ in cls._FIELDS)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_Record":
+        obj = cls.__new__(cls)
+        for name, kind in cls._FIELDS:
+            value = data.get(name, MISSING)
+            if value is MISSING or kind is RAW:
+                pass
+            elif kind is CAT:
+                value = _intern(value)
+            elif kind is CATS:
+                value = [_intern(item) for item in value] if type(value) is list else _intern(value)
+            elif type(kind) is tuple:
+                item_cls = kind[1]
+                if type(value) is list:
+                    value = [item_cls.from_dict(item) if type(item) is dict else item for item in value]
+            elif type(value) is dict:
+                value = kind.from_dict(value)
+            setattr(obj, name, value)
+        obj.extra = None if cls._NAMES.issuperset(data) else \
+            {key: value for key, value in data.items() if key not in cls._NAMES}
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（列表等取值与对象共享，不做深拷贝）"""
+        data = {}
+        for name, kind in self._FIELDS:
+            value = getattr(self, name)
+            if value is MISSING:
+                continue
+            if type(kind) is tuple:
+                if type(value) is list:
+                    value = [item.to_dict() if isinstance(item, _Record) else item for item in value]
+            elif isinstance(value, _Record):
+                value = value.to_dict()
+            data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """与字典相同的取值方式（缺失时返回 default）"""
+        value = getattr(self, name, MISSING) if name in self._NAMES else (self.extra or {}).get(name, MISSING)
+        return default if value is MISSING else value
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, _Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name, _ in self._FIELDS
+                           if getattr(self, name) is not MISSING)
+        return f"{type(self).__name__}({fields})"
+
+
+class Publication(_Record):
+    """论文：title_cn, title_en, year, journal（驻留）, DOI"""
+    __slots__ = ("title_cn", "title_en", "year", "journal", "DOI")
+    _FIELDS = (("title_cn", RAW), ("title_en", RAW), ("year", RAW), ("journal", CAT), ("DOI", RAW))
+
+    title_cn: str
+    title_en: str
+    year: Union[int, str]
+    journal: str
+    DOI: str
+
+
+class BasicInfo(_Record):
+    """基本信息：name, title, admin_role, mentor_qualification, honors（列表项均驻留）"""
+    __slots__ = ("name", "title", "admin_role", "mentor_qualification", "honors")
+    _FIELDS = (("name", RAW), ("title", CATS), ("admin_role", CATS), ("mentor_qualification", CATS),
+               ("honors", CATS))
+
+    name: str
+    title: List[str]
+    admin_role: Union[List[str], str]
+    mentor_qualification: List[str]
+    honors: List[str]
+
+
+class Education(_Record):
+    """教育经历：undergrad, master, phd"""
+    __slots__ = ("undergrad", "master", "phd")
+    _FIELDS = (("undergrad", RAW), ("master", RAW), ("phd", RAW))
+
+    undergrad: str
+    master: str
+    phd: str
+
+
+class BioDetails(_Record):
+    """个人信息：birth_year（驻留）, education, work_experience"""
+    __slots__ = ("birth_year", "education", "work_experience")
+    _FIELDS = (("birth_year", CAT), ("education", Education), ("work_experience", RAW))
+
+    birth_year: Union[str, int]
+    education: Education
+    work_experience: List[str]
+
+
+class Academic(_Record):
+    """学术信息：research_fields（驻留）, publications"""
+    __slots__ = ("research_fields", "publications")
+    _FIELDS = (("research_fields", CATS), ("publications", (list, Publication)))
+
+    research_fields: List[str]
+    publications: List[Publication]
+
+
+class TeacherRecord(_Record):
+    """一位教师的完整记录，对应输出目录中的一个JSON文件"""
+    __slots__ = ("basic_info", "bio_details", "likes", "academic", "data_sources")
+    _FIELDS = (("basic_info", BasicInfo), ("bio_details", BioDetails), ("likes", RAW), ("academic", Academic),
+               ("data_sources", RAW))
+
+    basic_info: BasicInfo
+    bio_details: BioDetails
+    likes: int
+    academic: Academic
+    data_sources: Dict[str, str]
+
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]) -> "TeacherRecord":
+        return cls.from_dict(loads(data))
+
+    def to_json(self, indent: bool = False) -> bytes:
+        return dumps(self.to_dict(), indent)
+
+
+def as_dict(data: Any) -> Any:
+    """记录对象转为字典，其他值原样返回（供同时接受两种输入的函数使用）"""
+    return data.to_dict() if isinstance(data, _Record) else data
+
+
+# --- JSON ---
+
+def loads(data: Union[bytes, str]) -> Any:
+    """解析JSON，安装了 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """序列化为UTF-8编码的JSON（不转义中文）；indent=True 时缩进2格，与输出目录中的文件格式一致"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None,
+                      separators=None if indent else (",", ":")).encode("utf-8")
+
+
+def load_directory(data_dir: str) -> Iterator[Tuple[str, TeacherRecord]]:
+    """
+    把输出目录中的教师JSON文件逐个加载为记录对象
+
+    返回:
+        Iterator[Tuple[str, TeacherRecord]]: (teacher_id, 记录)；无法解析的文件记录警告后跳过
+    """
+    with os.scandir(data_dir) as entries:
+        names = sorted(entry.name for entry in entries if entry.is_file() and entry.name.endswith(".json"))
+    for name in names:
+        try:
+            with open(os.path.join(data_dir, name), "rb") as f:
+                data = loads(f.read())
+        except (OSError, ValueError) as e:
+            logging.warning(f"处理文件 {name} 时出错: {e}")
+            continue
+        if isinstance(data, dict):
+            yield os.path.splitext(name)[0], TeacherRecord.from_dict(data)
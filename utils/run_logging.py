@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行日志模块
+
+- 业务代码只往队列里放日志记录（QueueHandler），文件/控制台的写入由 QueueListener
+  的后台线程完成，多个工作线程记录日志时不会互相阻塞在磁盘IO上
+- 除了原有的文本日志，另写一份结构化的 JSONL 日志，每条事件都带有
+  run_id、teacher_id（当前教师）、stage（当前步骤）和 duration（步骤耗时，仅步骤结束事件）
+- teacher_id/stage 通过 contextvars 传递，在 log_context / log_stage 中设置即可，
+  不需要在每条日志里手动拼接
+- 每次运行开始时滚动旧日志（teacher_analysis.log.1、.2 ……），不再覆盖历史
+
+用法：
+    listener = setup_logging(output_dir)
+    with log_context(teacher_id="张三"):
+        with log_stage("school_scrape"):
+            ...
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import os
+import queue
+import time
+import uuid
+
+from utils.metrics import STAGE_METRIC, observe
+from utils.profiling import profile_stage
+
+LOG_FILE_NAME = "teacher_analysis.log"
+JSONL_LOG_FILE_NAME = "teacher_analysis.jsonl"
+# 保留的历史运行日志份数
+LOG_BACKUP_COUNT = 20
+# 步骤结束事件使用的 logger，只写入 JSONL 日志
+EVENT_LOGGER_NAME = "teacher_analysis.events"
+
+_teacher_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("teacher_id", default=None)
+_stage_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("stage", default=None)
+
+_listener: Optional[QueueListener] = None
+_run_id: Optional[str] = None
+
+
+class SimpleFormatter(logging.Formatter):
+    """自定义格式化器，只在WARNING和ERROR级别显示级别前缀（不修改 record 本身）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        result = super().format(record)
+        if record.levelno >= logging.WARNING:
+            return f"{record.levelname} - {result}"
+        return result
+
+
+class JsonlFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event: Dict[str, Any] = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", None),
+            "teacher_id": getattr(record, "teacher_id", None),
+            "stage": getattr(record, "stage", None),
+            "duration": getattr(record, "duration", None),
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        status = getattr(record, "status", None)
+        if status is not None:
+            event["status"] = status
+        if record.exc_info:
+            event["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            event["exc"] = record.exc_text
+        return json.dumps(event, ensure_ascii=False)
+
+
+class ContextFilter(logging.Filter):
+    """
+    在产生日志的线程中为记录附加 run_id/teacher_id/stage
+
+    挂在 QueueHandler 上，保证 contextvars 在入队前读取（后台线程里读不到调用方的上下文）
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = _run_id
+        if not hasattr(record, "teacher_id"):
+            record.teacher_id = _teacher_var.get()
+        if not hasattr(record, "stage"):
+            record.stage = _stage_var.get()
+        if not hasattr(record, "duration"):
+            record.duration = None
+        return True
+
+
+def _is_plain_record(record: logging.LogRecord) -> bool:
+    """文本日志和控制台不显示步骤结束事件"""
+    return record.name != EVENT_LOGGER_NAME
+
+
+def _rotating_handler(path: str, formatter: logging.Formatter) -> RotatingFileHandler:
+    """创建文件处理器；已有非空日志时先滚动为 .1，保留历史运行的日志"""
+    handler = RotatingFileHandler(path, encoding='utf-8', backupCount=LOG_BACKUP_COUNT, delay=True)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        handler.doRollover()
+    handler.setFormatter(formatter)
+    return handler
+
+
+def setup_logging(output_dir: str, level: int = logging.INFO) -> QueueListener:
+    """
+    设置日志配置
+
+    参数:
+        output_dir: 日志文件所在目录（与json数据输出目录相同）
+        level: 日志级别
+
+    返回:
+        QueueListener: 后台写日志的监听器，程序退出时会自动停止
+    """
+    global _listener, _run_id
+    os.makedirs(output_dir, exist_ok=True)
+    shutdown_logging()
+    _run_id = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+    formatter = SimpleFormatter('%(message)s')
+    file_handler = _rotating_handler(os.path.join(output_dir, LOG_FILE_NAME), formatter)
+    file_handler.addFilter(_is_plain_record)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    console_handler.addFilter(_is_plain_record)
+    jsonl_handler = _rotating_handler(os.path.join(output_dir, JSONL_LOG_FILE_NAME), JsonlFormatter())
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    # 清除现有的handlers
+    logger.handlers = [queue_handler]
+
+    _listener = QueueListener(log_queue, file_handler, jsonl_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """停止后台监听器并写完队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+@contextmanager
+def log_context(teacher_id: Optional[str] = None, stage: Optional[str] = None) -> Iterator[None]:
+    """在代码块内为所有日志附加 teacher_id/stage（只设置传入的字段）"""
+    tokens: List = []
+    if teacher_id is not None:
+        tokens.append((_teacher_var, _teacher_var.set(teacher_id)))
+    if stage is not None:
+        tokens.append((_stage_var, _stage_var.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+@contextmanager
+def log_stage(stage: str) -> Iterator[None]:
+    """
+    标记一个处理步骤：代码块内的日志带上 stage，
+    结束时在 JSONL 日志中写一条带 duration 和 status（ok/error）的 stage_end 事件，
+    并把耗时记入 utils.metrics 的 stage_duration_seconds 直方图；开启剖析时同时交给 utils.profiling
+    """
+    token = _stage_var.set(stage)
+    start_time = time.perf_counter()
+    status = "ok"
+    try:
+        with profile_stage(stage):
+            yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start_time
+        observe(STAGE_METRIC, elapsed, stage=stage, status=status)
+        logging.getLogger(EVENT_LOGGER_NAME).info(
+            f"{stage} {status}", extra={"event": "stage_end", "duration": round(elapsed, 4), "status": status})
+        _stage_var.reset(token)
+
+
+def current_run_id() -> Optional[str]:
+    return _run_id
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+JSONL 分段存储模块
+
+每位教师一个带缩进的JSON文件的输出方式扫描慢、占空间，写到一半崩溃还会留下损坏的文件。
+这里提供另一种存储后端：记录以紧凑JSON逐行追加到分段文件（segment）中，
+由 index.json 记录每位教师所在的分段和字节偏移：
+
+- 写入：先把一行追加到当前活动分段并 fsync，再原子替换 index.json（临时文件 + os.replace）。
+  崩溃时最多丢掉尚未写入索引的那一行，重新打开时活动分段中索引之外的残留内容会被截掉
+- 分段达到 SEGMENT_MAX_BYTES 后封存；compression="zstd" 时封存的分段压缩为 .jsonl.zst
+- 同一教师再次写入时追加新行，索引指向最新版本；compact() 重写分段，回收旧版本占用的空间
+- 行格式与 utils.corpus_reader 的JSONL一致：{"teacher_id": ..., 其余字段...}，
+  未压缩的分段可以直接交给 corpus_reader / sqlite_export 等工具读取
+- export_directory() 可以随时导出为原来的“每位教师一个JSON文件”的目录结构
+
+只支持单个写入进程（进程内多线程安全）；多进程爬取时每个进程使用各自的存储目录，最后再合并导出。
+
+zstd 压缩使用 pyarrow 的压缩流（与列式数据集相同的依赖），不压缩时没有额外依赖。
+
+用法：
+    python -m utils.segment_store import NUIST_teacher_data [--store NUIST_teacher_data/_store] [--compress]
+    python -m utils.segment_store export NUIST_teacher_data/_store exported_dir
+    python -m utils.segment_store stats NUIST_teacher_data/_store
+    python -m utils.segment_store compact NUIST_teacher_data/_store
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from utils.corpus_reader import ID_FIELD, iter_records as iter_corpus_records
+
+STORE_DIR_NAME = "_store"
+INDEX_NAME = "index.json"
+SEGMENT_DIR_NAME = "segments"
+# 活动分段超过该大小（未压缩字节数）后封存
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+COMPRESSIONS = (None, "zstd")
+# 文件名中不允许出现的字符（导出时替换为下划线）
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def _pyarrow():
+    """延迟导入 pyarrow，缺失时给出明确提示"""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("zstd 压缩需要 pyarrow，请先运行 pip install pyarrow") from e
+    return pyarrow
+
+
+def store_path_for(output_dir: str) -> str:
+    """输出目录对应的分段存储目录：<output_dir>/_store"""
+    return os.path.join(output_dir, STORE_DIR_NAME)
+
+
+def safe_filename(teacher_id: str) -> str:
+    """导出文件名：替换路径分隔符等不能用于文件名的字符"""
+    name = _UNSAFE_FILENAME_RE.sub("_", teacher_id).strip()
+    return name or "_"
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = 2) -> None:
+    """写JSON文件：先写临时文件并 fsync，再替换目标文件，避免中途崩溃留下损坏的文件"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SegmentStore:
+    """
+    JSONL 分段存储
+
+    参数:
+        path: 存储目录
+        compression: None 或 "zstd"（只影响之后封存的分段；已有存储沿用创建时的设置）
+        segment_max_bytes: 活动分段的封存阈值
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, segment_max_bytes: int = SEGMENT_MAX_BYTES):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        self.path = path
+        self.segment_dir = os.path.join(path, SEGMENT_DIR_NAME)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.RLock()
+        # 最近一次解压的分段（按记录读取压缩分段时避免重复解压）
+        self._cache: Tuple[Optional[str], bytes] = (None, b"")
+        os.makedirs(self.segment_dir, exist_ok=True)
+
+        index_path = os.path.join(path, INDEX_NAME)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.compression = index.get("compression")
+            self.next_segment = index["next_segment"]
+            self.active = index["active"]
+            self.active_size = index["active_size"]
+            # teacher_id -> [分段名, 偏移, 长度]
+            self.entries: Dict[str, List] = index["entries"]
+        else:
+            self.compression = compression
+            self.next_segment = 1
+            self.active = self._new_segment_name()
+            self.active_size = 0
+            self.entries = {}
+            self._write_index()
+        if self.compression == "zstd":
+            _pyarrow()
+        self._recover_active()
+
+    # --- 索引与分段文件 ---
+
+    def _new_segment_name(self) -> str:
+        name = f"seg-{self.next_segment:06d}.jsonl"
+        self.next_segment += 1
+        return name
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.segment_dir, name)
+
+    def _write_index(self) -> None:
+        write_json_atomic(os.path.join(self.path, INDEX_NAME), {
+            "version": 1, "compression": self.compression, "next_segment": self.next_segment,
+            "active": self.active, "active_size": self.active_size, "entries": self.entries,
+        }, indent=None)
+
+    def _recover_active(self) -> None:
+        """截掉活动分段中索引之外的内容（上次写入中途崩溃的残留）"""
+        path = self._segment_path(self.active)
+        if not os.path.exists(path):
+            open(path, "ab").close()
+        elif os.path.getsize(path) > self.active_size:
+            logging.warning(f"分段 {self.active} 末尾有 {os.path.getsize(path) - self.active_size} 字节未写入索引的数据，已截断")
+            with open(path, "r+b") as f:
+                f.truncate(self.active_size)
+
+    def _read_segment(self, name: str) -> bytes:
+        """读取整个分段（压缩分段解压后返回）"""
+        if self._cache[0] == name:
+            return self._cache[1]
+        if name.endswith(".zst"):
+            with _pyarrow().input_stream(self._segment_path(name), compression="zstd") as f:
+                data = f.read()
+        else:
+            with open(self._segment_path(name), "rb") as f:
+                data = f.read()
+        self._cache = (name, data)
+        return data
+
+    def _seal_active(self) -> None:
+        """封存活动分段（需要时压缩），开始新的活动分段"""
+        sealed = self.active
+        if self.compression == "zstd":
+            target = sealed + ".zst"
+            tmp_path = self._segment_path(target) + ".tmp"
+            with open(self._segment_path(sealed), "rb") as f:
+                with _pyarrow().output_stream(tmp_path, compression="zstd") as out:
+                    out.write(f.read())
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(self._segment_path(target) + ".tmp", self._segment_path(target))
+            for entry in self.entries.values():
+                if entry[0] == sealed:
+                    entry[0] = target
+        self.active = self._new_segment_name()
+        self.active_size = 0
+        open(self._segment_path(self.active), "ab").close()
+        self._write_index()
+        if self.compression == "zstd":
+            os.remove(self._segment_path(sealed))
+
+    # --- 读写接口 ---
+
+    def put(self, teacher_id: str, record: Dict[str, Any]) -> None:
+        """写入（或覆盖）一位教师的记录"""
+        self.put_many([(teacher_id, record)])
+
+    def put_many(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """批量写入，所有行追加并 fsync 后只更新一次索引，返回写入条数"""
+        count = 0
+        with self._lock:
+            with open(self._segment_path(self.active), "ab") as f:
+                for teacher_id, record in records:
+                    line = json.dumps({ID_FIELD: teacher_id, **record}, ensure_ascii=False).encode("utf-8") + b"\n"
+                    f.write(line)
+                    self.entries[teacher_id] = [self.active, self.active_size, len(line)]
+                    self.active_size += len(line)
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+            self._write_index()
+            if self.active_size >= self.segment_max_bytes:
+                self._seal_active()
+        return count
+
+    def get(self, teacher_id: str) -> Optional[Dict[str, Any]]:
+        """读取一位教师的记录，不存在时返回 None"""
+        with self._lock:
+            entry = self.entries.get(teacher_id)
+            if entry is None:
+                return None
+            name, offset, length = entry
+            if name.endswith(".zst"):
+                line = self._read_segment(name)[offset:offset + length]
+            else:
+                with open(self._segment_path(name), "rb") as f:
+                    f.seek(offset)
+                    line = f.read(length)
+        data = json.loads(line)
+        data.pop(ID_FIELD, None)
+        return data
+
+    def delete(self, teacher_id: str) -> bool:
+        """从索引中删除（数据在 compact 时回收）"""
+        with self._lock:
+            if self.entries.pop(teacher_id, None) is None:
+                return False
+            self._write_index()
+            return True
+
+    def __contains__(self, teacher_id: str) -> bool:
+        return teacher_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def ids(self) -> List[str]:
+        return list(self.entries)
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """按存储顺序遍历最新版本的记录，每个分段只读取一次"""
+        with self._lock:
+            by_segment: Dict[str, List[Tuple[int, int, str]]] = {}
+            for teacher_id, (name, offset, length) in self.entries.items():
+                by_segment.setdefault(name, []).append((offset, length, teacher_id))
+            segments = sorted(by_segment.items(), key=lambda item: item[0])
+        for name, items in segments:
+            with self._lock:
+                data = self._read_segment(name)
+            for offset, length, teacher_id in sorted(items):
+                record = json.loads(data[offset:offset + length])
+                record.pop(ID_FIELD, None)
+                yield teacher_id, record
+
+    def stats(self) -> Dict[str, Any]:
+        """记录数、分段数、磁盘占用和有效数据比例"""
+        with self._lock:
+            segment_files = [name for name in os.listdir(self.segment_dir) if not name.endswith(".tmp")]
+            disk_bytes = sum(os.path.getsize(self._segment_path(name)) for name in segment_files)
+            live_bytes = sum(entry[2] for entry in self.entries.values())
+            return {"records": len(self.entries), "segments": len(segment_files), "disk_bytes": disk_bytes,
+                    "live_bytes": live_bytes, "compression": self.compression}
+
+    def compact(self) -> Dict[str, Any]:
+        """把最新版本的记录重写到新分段中，删除旧分段"""
+        with self._lock:
+            old_segments = set(os.listdir(self.segment_dir))
+            records = list(self.iter_records())
+            self.entries = {}
+            self.active = self._new_segment_name()
+            self.active_size = 0
+            self.put_many(records)
+            if self.active_size and self.compression == "zstd":
+                self._seal_active()
+            for name in old_segments:
+                if name != self.active:
+                    os.remove(self._segment_path(name))
+            self._cache = (None, b"")
+            return self.stats()
+
+
+# --- 导入与导出 ---
+
+def import_directory(store: SegmentStore, data_dir: str, workers: int = 1, batch_size: int = 256) -> int:
+    """把每位教师一个JSON文件的输出目录导入存储，返回导入条数"""
+    count = 0
+    batch: List[Tuple[str, Dict[str, Any]]] = []
+    for teacher_id, record in iter_corpus_records(data_dir, workers=workers):
+        batch.append((teacher_id, record))
+        if len(batch) >= batch_size:
+            count += store.put_many(batch)
+            batch = []
+    if batch:
+        count += store.put_many(batch)
+    return count
+
+
+def export_directory(store: SegmentStore, out_dir: str) -> int:
+    """导出为每位教师一个JSON文件（indent=2，与 main.py 的输出格式一致），返回导出条数"""
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+    for teacher_id, record in store.iter_records():
+        write_json_atomic(os.path.join(out_dir, f"{safe_filename(teacher_id)}.json"), record)
+        count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="JSONL 分段存储：导入、导出、统计、压实")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="导入每位教师一个JSON文件的输出目录")
+    import_parser.add_argument("data_dir", help="教师JSON输出目录")
+    import_parser.add_argument("--store", default=None, help="存储目录（默认 <data_dir>/_store）")
+    import_parser.add_argument("--compress", action="store_true", help="封存的分段使用 zstd 压缩（仅新建存储时有效）")
+    import_parser.add_argument("--workers", type=int, default=1, help="读取的并行进程数")
+    export_parser = subparsers.add_parser("export", help="导出为每位教师一个JSON文件")
+    export_parser.add_argument("store", help="存储目录")
+    export_parser.add_argument("out_dir", help="导出目录")
+    stats_parser = subparsers.add_parser("stats", help="存储统计")
+    stats_parser.add_argument("store", help="存储目录")
+    compact_parser = subparsers.add_parser("compact", help="回收旧版本记录占用的空间")
+    compact_parser.add_argument("store", help="存储目录")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    start_time = time.time()
+    if args.command == "import":
+        store = SegmentStore(args.store or store_path_for(args.data_dir), "zstd" if args.compress else None)
+        count = import_directory(store, args.data_dir, workers=args.workers)
+        logging.info(f"已导入 {count} 条记录到 {store.path}，耗时 {time.time() - start_time:.2f} 秒")
+    elif args.command == "export":
+        count = export_directory(SegmentStore(args.store), args.out_dir)
+        logging.info(f"已导出 {count} 个文件到 {args.out_dir}，耗时 {time.time() - start_time:.2f} 秒")
+    elif args.command == "stats":
+        print(json.dumps(SegmentStore(args.store).stats(), ensure_ascii=False, indent=2))
+    else:
+        stats = SegmentStore(args.store).compact()
+        logging.info(f"压实完成：{stats['records']} 条记录，{stats['segments']} 个分段，"
+                     f"占用 {stats['disk_bytes'] / 1024:.1f} KiB，耗时 {time.time() - start_time:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
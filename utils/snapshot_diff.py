@@ -0,0 +1,426 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+快照比较模块
+
+重新爬取之后，想知道每位教师具体变了什么：新增的荣誉、职称晋升、新发表的论文、点赞数的变化。
+这里为每条记录按子结构计算指纹（清单，manifest）：
+
+- basic_info、出生年份、教育经历、工作经历、研究领域、点赞数、数据来源各一个哈希，
+  每篇论文单独一个哈希（按DOI，没有DOI时按规范化标题+年份作为键），其余字段合并为一个哈希
+- 记录级哈希由各子结构哈希组合而成；输出目录中的JSON文件还记录文件内容的哈希，
+  文件未变化时直接跳过解析
+- 比较时先读入旧快照的清单，再流式遍历新快照，每条记录只比较一次哈希；
+  只有哈希不同的子结构才会逐字段比较，生成紧凑的变更日志（JSONL）
+
+快照可以是输出目录（顶层的 <教师姓名>.json，以及 _store 分段存储）、JSONL导出文件、
+分段存储目录，或之前保存的清单文件。清单中保存了生成可读变更所需的取值
+（论文只保存哈希和标题），因此刷新前保存一份清单，刷新后即可与当前目录比较，不需要复制整个目录。
+
+用法：
+    python -m utils.snapshot_diff manifest NUIST_teacher_data      # 保存清单到 NUIST_teacher_data/_snapshots/
+    python -m utils.snapshot_diff diff NUIST_teacher_data/_snapshots/manifest-20250101-000000.json NUIST_teacher_data
+    python -m utils.snapshot_diff diff old_export.jsonl NUIST_teacher_data --out changes.jsonl --save-manifest
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+from utils.corpus_reader import ID_FIELD, JSONL_SUFFIXES, iter_records, list_record_files
+from utils.pub_dedup import normalize_doi, normalize_title
+from utils.segment_store import INDEX_NAME, SegmentStore, store_path_for
+
+SNAPSHOT_DIR_NAME = "_snapshots"
+MANIFEST_VERSION = 1
+
+# 变更日志中每个列表字段最多列出的条目数（其余只计数）
+MAX_LISTED = 20
+
+Entry = Dict[str, Any]
+
+
+# --- 指纹 ---
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def _hash_value(value: Any) -> str:
+    """规范化JSON（键排序、紧凑分隔符）的哈希，与字段顺序和缩进无关"""
+    return _hash_bytes(json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+def _as_dict(value: Any) -> Dict:
+    return value if isinstance(value, dict) else {}
+
+
+def _as_list(value: Any) -> List:
+    return value if isinstance(value, list) else []
+
+
+def pub_key(pub: Any) -> str:
+    """论文的比较键：规范化DOI，没有DOI时为规范化标题（优先英文）+ 年份"""
+    if not isinstance(pub, dict):
+        return "raw:" + _hash_value(pub)
+    doi = normalize_doi(pub.get('DOI') or pub.get('doi'))
+    if doi:
+        return "doi:" + doi
+    title = normalize_title(pub.get('title_en')) or normalize_title(pub.get('title_cn'))
+    return f"title:{title}:{str(pub.get('year') or '').strip()}"
+
+
+def _pub_label(pub: Any) -> str:
+    if not isinstance(pub, dict):
+        return str(pub)
+    title = pub.get('title_cn') or pub.get('title_en') or ""
+    return f"{title}（{pub['year']}）" if pub.get('year') else title
+
+
+# 子结构：名称 -> 从记录中取值的函数（论文单独处理）
+PARTS = {
+    "basic_info": lambda record: _as_dict(record.get('basic_info')),
+    "birth_year": lambda record: _as_dict(record.get('bio_details')).get('birth_year'),
+    "education": lambda record: _as_dict(_as_dict(record.get('bio_details')).get('education')),
+    "work_experience": lambda record: _as_list(_as_dict(record.get('bio_details')).get('work_experience')),
+    "research_fields": lambda record: _as_list(_as_dict(record.get('academic')).get('research_fields')),
+    "likes": lambda record: record.get('likes'),
+    "data_sources": lambda record: _as_dict(record.get('data_sources')),
+}
+# 已由 PARTS 和论文覆盖的字段，其余字段计入 "other"
+_COVERED = {"basic_info": None, "bio_details": ("birth_year", "education", "work_experience"),
+            "academic": ("research_fields", "publications"), "likes": None, "data_sources": None}
+
+
+def _other_fields(record: Dict) -> Dict:
+    other = {}
+    for key, value in record.items():
+        if key == ID_FIELD or (key in _COVERED and _COVERED[key] is None):
+            continue
+        if key in _COVERED and isinstance(value, dict):
+            rest = {k: v for k, v in value.items() if k not in _COVERED[key]}
+            if rest:
+                other[key] = rest
+        else:
+            other[key] = value
+    return other
+
+
+def fingerprint(record: Dict, raw_hash: Optional[str] = None) -> Entry:
+    """
+    计算一条记录的清单条目
+
+    返回:
+        Dict: {raw: 文件内容哈希或None, hash: 记录哈希, parts: {子结构: 哈希}, values: {子结构: 取值},
+               pubs: {论文键: [哈希, 标题]}}
+    """
+    values = {name: getter(record) for name, getter in PARTS.items()}
+    parts = {name: _hash_value(value) for name, value in values.items()}
+    parts["other"] = _hash_value(_other_fields(record))
+
+    pubs: Dict[str, List[str]] = {}
+    for pub in _as_list(_as_dict(record.get('academic')).get('publications')):
+        key = pub_key(pub)
+        # 同一记录内键重复的论文（例如学校和AMiner各一条）加序号区分
+        unique_key, n = key, 1
+        while unique_key in pubs:
+            n += 1
+            unique_key = f"{key}#{n}"
+        pubs[unique_key] = [_hash_value(pub), _pub_label(pub)]
+    parts["publications"] = _hash_bytes("".join(sorted(key + h for key, (h, _) in pubs.items())).encode("utf-8"))
+
+    record_hash = _hash_bytes("".join(parts[name] for name in sorted(parts)).encode("utf-8"))
+    return {"raw": raw_hash, "hash": record_hash, "parts": parts, "values": values, "pubs": pubs}
+
+
+# --- 快照读取 ---
+
+def _is_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, INDEX_NAME))
+
+
+def _is_manifest(path: str) -> bool:
+    return os.path.isfile(path) and path.endswith(".json")
+
+
+def iter_entries(source: str, known: Optional[Dict[str, Entry]] = None) -> Iterator[Tuple[str, Entry]]:
+    """
+    流式产出快照中每条记录的清单条目
+
+    参数:
+        source: 输出目录、分段存储目录、JSONL文件或清单文件
+        known: 旧快照的清单；输出目录中文件内容哈希与之相同的记录直接复用旧条目，不再解析JSON
+
+    返回:
+        Iterator[Tuple[str, Dict]]: (teacher_id, 清单条目)
+    """
+    if _is_manifest(source):
+        yield from load_manifest(source).items()
+    elif os.path.isdir(source) and _is_store(source):
+        for teacher_id, record in SegmentStore(source).iter_records():
+            yield teacher_id, fingerprint(record)
+    elif os.path.isdir(source):
+        store_path = store_path_for(source)
+        # 分段存储中的记录优先于同名的JSON文件
+        in_store = set(SegmentStore(store_path).ids()) if _is_store(store_path) else set()
+        for path in list_record_files(source):
+            teacher_id = os.path.splitext(os.path.basename(path))[0]
+            if teacher_id in in_store:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            raw_hash = _hash_bytes(data)
+            old = (known or {}).get(teacher_id)
+            if old is not None and old.get("raw") == raw_hash:
+                yield teacher_id, old
+                continue
+            try:
+                record = json.loads(data)
+            except ValueError as e:
+                logging.warning(f"处理文件 {os.path.basename(path)} 时出错: {e}")
+                record = {}
+            yield teacher_id, fingerprint(record if isinstance(record, dict) else {}, raw_hash)
+        if in_store:
+            yield from iter_entries(store_path)
+    elif source.endswith(JSONL_SUFFIXES):
+        for teacher_id, record in iter_records(source):
+            yield teacher_id, fingerprint(record)
+    else:
+        raise ValueError(f"不支持的快照（应为输出目录、分段存储、JSONL文件或清单文件）: {source}")
+
+
+def load_manifest(path: str) -> Dict[str, Entry]:
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"清单版本不兼容: {path}")
+    return manifest["records"]
+
+
+def save_manifest(entries: Dict[str, Entry], path: str, source: str = "") -> str:
+    """保存清单（紧凑JSON，原子替换）"""
+    manifest = {"version": MANIFEST_VERSION, "source": source,
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"), "records": entries}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def default_manifest_path(output_dir: str) -> str:
+    return os.path.join(output_dir, SNAPSHOT_DIR_NAME, f"manifest-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+
+# --- 比较 ---
+
+def _item_label(item: Any) -> str:
+    return item if isinstance(item, str) else json.dumps(item, ensure_ascii=False, sort_keys=True)
+
+
+def _list_change(old: List, new: List) -> Dict[str, Any]:
+    """列表字段的增删（忽略空字符串占位）"""
+    old_items = {_item_label(item) for item in old if item not in ("", None)}
+    new_items = {_item_label(item) for item in new if item not in ("", None)}
+    change: Dict[str, Any] = {}
+    added = sorted(new_items - old_items)
+    removed = sorted(old_items - new_items)
+    if added:
+        change["added"] = added[:MAX_LISTED]
+    if removed:
+        change["removed"] = removed[:MAX_LISTED]
+    return change
+
+
+def _value_change(field: str, old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    if old == new:
+        return None
+    if isinstance(old, list) or isinstance(new, list):
+        change = _list_change(_as_list(old) if isinstance(old, list) else [old],
+                              _as_list(new) if isinstance(new, list) else [new])
+        # 只有顺序或空占位不同时不算变化
+        return {"field": field, **change} if change else None
+    change = {"field": field, "old": old, "new": new}
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)) \
+            and not isinstance(old, bool) and not isinstance(new, bool):
+        change["delta"] = new - old
+    return change
+
+
+def _dict_changes(prefix: str, old: Dict, new: Dict) -> List[Dict[str, Any]]:
+    changes = []
+    for key in list(old) + [key for key in new if key not in old]:
+        change = _value_change(f"{prefix}.{key}", old.get(key), new.get(key))
+        if change:
+            changes.append(change)
+    return changes
+
+
+def _pub_changes(old: Dict[str, List[str]], new: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+    added = [label for key, (_, label) in new.items() if key not in old]
+    removed = [label for key, (_, label) in old.items() if key not in new]
+    changed = [label for key, (h, label) in new.items() if key in old and old[key][0] != h]
+    if not (added or removed or changed):
+        return None
+    change: Dict[str, Any] = {"field": "publications"}
+    for name, items in (("added", added), ("removed", removed), ("changed", changed)):
+        if items:
+            change[name] = items[:MAX_LISTED]
+            change[f"{name}_count"] = len(items)
+    return change
+
+
+def compare_entries(old: Entry, new: Entry) -> List[Dict[str, Any]]:
+    """比较两个清单条目，只展开哈希不同的子结构"""
+    if old["hash"] == new["hash"]:
+        return []
+    changes: List[Dict[str, Any]] = []
+    for part, new_hash in new["parts"].items():
+        if old["parts"].get(part) == new_hash:
+            continue
+        if part == "publications":
+            change = _pub_changes(old["pubs"], new["pubs"])
+            if change:
+                changes.append(change)
+        elif part == "other":
+            changes.append({"field": "other", "changed": True})
+        else:
+            old_value, new_value = old["values"].get(part), new["values"].get(part)
+            if isinstance(old_value, dict) and isinstance(new_value, dict):
+                changes.extend(_dict_changes(part, old_value, new_value))
+            else:
+                change = _value_change(part, old_value, new_value)
+                if change:
+                    changes.append(change)
+    return changes
+
+
+def diff_snapshots(old_source: str, new_source: str,
+                   new_entries: Optional[Dict[str, Entry]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    比较两个快照，产出变更日志
+
+    参数:
+        old_source / new_source: 输出目录、分段存储目录、JSONL文件或清单文件
+        new_entries: 传入字典时收集新快照的清单条目（用于保存清单）
+
+    返回:
+        Iterator[Dict]: {teacher_id, change: added/removed/modified, changes: [...]}，
+        未变化的记录不产出；最后产出一条 {"summary": {...}}
+    """
+    start_time = time.time()
+    old = dict(iter_entries(old_source))
+    counts = {"added": 0, "removed": 0, "modified": 0, "unchanged": 0}
+    field_counts: Dict[str, int] = {}
+    seen = set()
+    for teacher_id, entry in iter_entries(new_source, known=old):
+        seen.add(teacher_id)
+        if new_entries is not None:
+            new_entries[teacher_id] = entry
+        previous = old.get(teacher_id)
+        if previous is None:
+            counts["added"] += 1
+            yield {ID_FIELD: teacher_id, "change": "added"}
+            continue
+        changes = compare_entries(previous, entry)
+        if not changes:
+            counts["unchanged"] += 1
+            continue
+        counts["modified"] += 1
+        for change in changes:
+            field = change["field"].split(".")[0]
+            field_counts[field] = field_counts.get(field, 0) + 1
+        yield {ID_FIELD: teacher_id, "change": "modified", "changes": changes}
+    for teacher_id in old:
+        if teacher_id not in seen:
+            counts["removed"] += 1
+            yield {ID_FIELD: teacher_id, "change": "removed"}
+    yield {"summary": {**counts, "fields": dict(sorted(field_counts.items(), key=lambda item: -item[1])),
+                       "elapsed_seconds": round(time.time() - start_time, 3)}}
+
+
+def format_change(item: Dict[str, Any]) -> str:
+    """把一条变更日志格式化为一行便于阅读的文本"""
+    teacher_id = item[ID_FIELD]
+    if item["change"] != "modified":
+        return f"{teacher_id}: {'新增' if item['change'] == 'added' else '删除'}"
+    parts = []
+    for change in item["changes"]:
+        field = change["field"]
+        if field == "publications":
+            counts = [f"{label} {change[f'{name}_count']} 篇" for name, label in
+                      (("added", "新增论文"), ("removed", "删除论文"), ("changed", "修改论文")) if name in change]
+            parts.append("，".join(counts))
+        elif "delta" in change:
+            parts.append(f"{field} {change['old']} → {change['new']}（{change['delta']:+g}）")
+        elif "old" in change:
+            parts.append(f"{field} {change['old']!r} → {change['new']!r}")
+        elif field == "other":
+            parts.append("其他字段有变化")
+        else:
+            listed = [f"+{item}" for item in change.get("added", [])] + [f"-{item}" for item in change.get("removed", [])]
+            parts.append(f"{field} {', '.join(listed)}")
+    return f"{teacher_id}: " + "；".join(parts)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="保存快照清单，或比较两个快照生成变更日志")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    manifest_parser = subparsers.add_parser("manifest", help="计算并保存快照清单")
+    manifest_parser.add_argument("source", help="输出目录、分段存储目录或JSONL文件")
+    manifest_parser.add_argument("-o", "--output", default=None,
+                                 help="清单路径，默认为 <输出目录>/_snapshots/manifest-<时间>.json")
+    diff_parser = subparsers.add_parser("diff", help="比较两个快照")
+    diff_parser.add_argument("old", help="旧快照：输出目录、分段存储目录、JSONL文件或清单文件")
+    diff_parser.add_argument("new", help="新快照")
+    diff_parser.add_argument("--out", default=None, help="变更日志（JSONL）输出路径，默认只打印")
+    diff_parser.add_argument("--save-manifest", action="store_true",
+                             help="同时保存新快照的清单（新快照为输出目录时保存到其 _snapshots/ 下）")
+    diff_parser.add_argument("--quiet", action="store_true", help="不逐条打印变更")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == "manifest":
+        start_time = time.time()
+        entries = dict(iter_entries(args.source))
+        output = args.output or default_manifest_path(args.source if os.path.isdir(args.source)
+                                                      else os.path.dirname(os.path.abspath(args.source)))
+        save_manifest(entries, output, args.source)
+        logging.info(f"已保存 {len(entries)} 条记录的清单到 {output}，耗时 {time.time() - start_time:.2f} 秒")
+        return 0
+
+    new_entries: Optional[Dict[str, Entry]] = {} if args.save_manifest else None
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    try:
+        for item in diff_snapshots(args.old, args.new, new_entries):
+            if "summary" in item:
+                summary = item["summary"]
+                logging.info(f"新增 {summary['added']} 位，删除 {summary['removed']} 位，"
+                             f"有变化 {summary['modified']} 位，未变化 {summary['unchanged']} 位，"
+                             f"耗时 {summary['elapsed_seconds']:.2f} 秒")
+                for field, count in summary["fields"].items():
+                    logging.info(f"  {field}: {count} 位")
+            elif not args.quiet:
+                print(format_change(item))
+            if out is not None:
+                out.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    if args.out:
+        logging.info(f"变更日志已保存到 {args.out}")
+    if new_entries is not None:
+        output = default_manifest_path(args.new if os.path.isdir(args.new)
+                                       else os.path.dirname(os.path.abspath(args.new)))
+        save_manifest(new_entries, output, args.new)
+        logging.info(f"新快照的清单已保存到 {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite 导出与全文检索模块
+
+把一个或多个输出目录导入到同一个 SQLite 数据库：
+- 表结构与列式数据集（utils.dataset）一致：teachers、education、work_experience、
+  publications、research_fields，另加 source 列区分学校，列表字段存为JSON文本
+- 研究领域、论文标题（中/英）、期刊、工作经历建立 FTS5 全文索引（trigram 分词，
+  中英文都按子串匹配，不区分大小写），由触发器随基础表自动维护
+- 导入是增量的：files 表记录每个源文件的 mtime、大小和内容哈希，
+  只有新增、修改或删除的教师会被重新写入
+
+trigram 分词要求 SQLite >= 3.34；少于3个字的查询词无法走全文索引，改为 LIKE 扫描。
+
+用法：
+    python -m utils.sqlite_export build NUIST_teacher_data [--db teachers.db]
+    python -m utils.sqlite_export search "陆气相互作用" [--kind field] [--db teachers.db]
+    python -m utils.sqlite_export search "International Journal of Climatology" --kind journal
+"""
+from typing import Dict, List, Any, Optional
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from utils.dataset import TABLES, TABLE_COLUMNS, flatten_record, scan_changes
+
+DEFAULT_DB_PATH = "teachers.db"
+# 数据库结构有变化时递增，旧版本数据库会被整体重建
+SCHEMA_VERSION = 1
+# trigram 分词器至少需要3个字符才能使用索引
+MIN_MATCH_CHARS = 3
+
+_SQL_TYPES = {"string": "TEXT", "int": "INTEGER", "bool": "INTEGER", "list": "TEXT"}
+
+# 全文索引：FTS表名 -> (基础表, 建索引的列)
+FTS_TABLES = {
+    "research_fields_fts": ("research_fields", ("field",)),
+    "publications_fts": ("publications", ("title_cn", "title_en", "journal")),
+    "work_experience_fts": ("work_experience", ("raw",)),
+}
+
+# 检索类别 -> (FTS表名, 列过滤, 基础表中作为结果文本的表达式, LIKE 回退时匹配的列)
+SEARCH_KINDS = {
+    "field": ("research_fields_fts", None, "b.field", ("field",)),
+    "title": ("publications_fts", "{title_cn title_en}", "COALESCE(b.title_cn, b.title_en)", ("title_cn", "title_en")),
+    "journal": ("publications_fts", "journal", "b.journal", ("journal",)),
+    "work": ("work_experience_fts", None, "b.raw", ("raw",)),
+}
+
+
+# --- 建库 ---
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    statements = ["CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+                  "CREATE TABLE IF NOT EXISTS files (source TEXT, filename TEXT, mtime_ns INTEGER, "
+                  "size INTEGER, sha1 TEXT, PRIMARY KEY (source, filename))"]
+    for table in TABLES:
+        columns = [f"{name} {_SQL_TYPES[kind]}" for name, kind in TABLE_COLUMNS[table] if name != "source"]
+        # 显式的 INTEGER PRIMARY KEY 保证 rowid 稳定（VACUUM 不会重排），全文索引依赖它
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, source TEXT, "
+                          f"{', '.join(columns)})")
+        statements.append(f"CREATE INDEX IF NOT EXISTS idx_{table}_teacher ON {table} (source, teacher_id)")
+
+    for fts_table, (table, columns) in FTS_TABLES.items():
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        statements += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column_list}, "
+            f"content='{table}', content_rowid='id', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        ]
+    for statement in statements:
+        conn.execute(statement)
+
+
+def connect(db_path: str = DEFAULT_DB_PATH, rebuild: bool = False) -> sqlite3.Connection:
+    """
+    打开（必要时创建）数据库
+
+    参数:
+        db_path: 数据库文件路径
+        rebuild: 删除已有数据库后重建
+    """
+    if sqlite3.sqlite_version_info < (3, 34, 0):
+        raise RuntimeError(f"全文索引需要 SQLite >= 3.34（trigram 分词），当前版本为 {sqlite3.sqlite_version}")
+    if rebuild and os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    with conn:
+        _create_schema(conn)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is None:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+    if row is not None and row["value"] != str(SCHEMA_VERSION):
+        conn.close()
+        return connect(db_path, rebuild=True)
+    return conn
+
+
+# --- 增量导入 ---
+
+def _delete_teachers(conn: sqlite3.Connection, source: str, teacher_ids: List[str]) -> None:
+    for table in TABLES:
+        conn.executemany(f"DELETE FROM {table} WHERE source = ? AND teacher_id = ?",
+                         [(source, teacher_id) for teacher_id in teacher_ids])
+
+
+def _insert_rows(conn: sqlite3.Connection, source: str, rows: Dict[str, List[Dict]]) -> None:
+    for table in TABLES:
+        if not rows[table]:
+            continue
+        columns = [name for name, _ in TABLE_COLUMNS[table] if name != "source"]
+        list_columns = {name for name, kind in TABLE_COLUMNS[table] if kind == "list"}
+        values = [
+            (source, *[json.dumps(row[name], ensure_ascii=False) if name in list_columns else row[name]
+                       for name in columns])
+            for row in rows[table]
+        ]
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        conn.executemany(f"INSERT INTO {table} (source, {', '.join(columns)}) VALUES ({placeholders})", values)
+
+
+def export_directory(conn: sqlite3.Connection, data_dir: str, use_hash: bool = False) -> Dict[str, Any]:
+    """
+    把一个输出目录增量导入数据库（整个目录在一个事务中完成）
+
+    参数:
+        conn: connect() 返回的连接
+        data_dir: 教师JSON输出目录
+        use_hash: 是否对所有文件计算内容哈希（默认只在 mtime/大小变化时计算）
+
+    返回:
+        Dict: 变化文件数、删除文件数、耗时
+    """
+    start_time = time.time()
+    source = os.path.basename(os.path.normpath(data_dir))
+    files_manifest = {
+        row["filename"]: {"mtime_ns": row["mtime_ns"], "size": row["size"], "sha1": row["sha1"]}
+        for row in conn.execute("SELECT filename, mtime_ns, size, sha1 FROM files WHERE source = ?", (source,))
+    }
+    new_files, changed, removed = scan_changes(data_dir, files_manifest, use_hash)
+
+    with conn:
+        stale_ids = [os.path.splitext(name)[0] for name in changed + removed]
+        _delete_teachers(conn, source, stale_ids)
+        for filename in changed:
+            teacher_id = os.path.splitext(filename)[0]
+            try:
+                with open(os.path.join(data_dir, filename), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"跳过无法解析的文件 {filename}: {e}")
+                new_files.pop(filename, None)
+                continue
+            _insert_rows(conn, source, flatten_record(teacher_id, data, source))
+
+        conn.execute("DELETE FROM files WHERE source = ?", (source,))
+        conn.executemany(
+            "INSERT INTO files (source, filename, mtime_ns, size, sha1) VALUES (?, ?, ?, ?, ?)",
+            [(source, name, info["mtime_ns"], info["size"], info.get("sha1")) for name, info in new_files.items()])
+
+    return {"changed": len(changed), "removed": len(removed), "elapsed_seconds": round(time.time() - start_time, 3)}
+
+
+# --- 检索 ---
+
+def _match_expression(query: str, column_filter: Optional[str]) -> str:
+    """把查询词转为 FTS5 短语查询（trigram 下即子串匹配）"""
+    phrase = '"' + query.replace('"', '""') + '"'
+    return f"{column_filter} : {phrase}" if column_filter else phrase
+
+
+def search(conn: sqlite3.Connection, query: str, kinds: Optional[List[str]] = None, limit: int = 50) -> List[Dict]:
+    """
+    全文检索
+
+    参数:
+        conn: connect() 返回的连接
+        query: 查询词（子串匹配，如 "陆气相互作用"、"International Journal of Climatology"）
+        kinds: 检索类别，可选 field/title/journal/work，默认全部
+        limit: 每个类别最多返回的条数
+
+    返回:
+        List[Dict]: 每条包含 kind、source、teacher_id、name、text；
+        同一类别内按相关度（bm25）排序
+    """
+    query = query.strip()
+    if not query:
+        return []
+    results = []
+    for kind in kinds or list(SEARCH_KINDS):
+        fts_table, column_filter, text_expr, like_columns = SEARCH_KINDS[kind]
+        base_table = FTS_TABLES[fts_table][0]
+        select = (f"SELECT ? AS kind, b.source, b.teacher_id, t.name, {text_expr} AS text "
+                  f"FROM {base_table} b LEFT JOIN teachers t ON t.source = b.source AND t.teacher_id = b.teacher_id ")
+        if len(query) >= MIN_MATCH_CHARS:
+            sql = (select + f"JOIN {fts_table} f ON f.rowid = b.id "
+                   f"WHERE {fts_table} MATCH ? ORDER BY f.rank LIMIT ?")
+            params = (kind, _match_expression(query, column_filter), limit)
+        else:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where = " OR ".join(f"b.{column} LIKE ? ESCAPE '\\'" for column in like_columns)
+            sql = select + f"WHERE {where} ORDER BY b.source, b.teacher_id LIMIT ?"
+            params = (kind, *[pattern] * len(like_columns), limit)
+        results.extend(dict(row) for row in conn.execute(sql, params))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="教师数据 SQLite 导出与全文检索")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="增量导入输出目录")
+    build_parser.add_argument("data_dirs", nargs="+", help="教师JSON输出目录（可指定多个）")
+    build_parser.add_argument("--hash", action="store_true", help="对所有文件计算内容哈希（更严格，稍慢）")
+    build_parser.add_argument("--rebuild", action="store_true", help="删除已有数据库后全量重建")
+    search_parser = subparsers.add_parser("search", help="全文检索")
+    search_parser.add_argument("query", help="查询词")
+    search_parser.add_argument("--kind", action="append", choices=list(SEARCH_KINDS),
+                               help="检索类别（可重复）：field 研究领域，title 论文标题，journal 期刊，work 工作经历")
+    search_parser.add_argument("--limit", type=int, default=50, help="每个类别最多返回的条数")
+    for sub in (build_parser, search_parser):
+        sub.add_argument("--db", default=DEFAULT_DB_PATH, help="数据库文件路径")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == "build":
+        conn = connect(args.db, rebuild=args.rebuild)
+        for data_dir in args.data_dirs:
+            stats = export_directory(conn, data_dir, use_hash=args.hash)
+            logging.info(f"{data_dir}: 变化 {stats['changed']} 个文件，删除 {stats['removed']} 个，"
+                         f"耗时 {stats['elapsed_seconds']:.2f} 秒")
+        conn.close()
+    else:
+        if not os.path.exists(args.db):
+            logging.error(f"数据库不存在: {args.db}，请先运行 python -m utils.sqlite_export build <输出目录>")
+            return 1
+        conn = connect(args.db)
+        start_time = time.perf_counter()
+        results = search(conn, args.query, kinds=args.kind, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        for item in results:
+            print(f"[{item['kind']}] {item['name'] or item['teacher_id']}（{item['source']}）: {item['text']}")
+        logging.info(f"共 {len(results)} 条结果，耗时 {elapsed_ms:.1f} 毫秒")
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+分片与租约式工作队列模块
+
+让多个进程（或共享文件系统上的多台机器）分担同一份教师列表，且不会重复消耗LLM调用：
+
+- 静态分片：--shard i/N 按教师URL的稳定哈希（SHA-1，与进程、机器、Python版本无关）
+  把列表切成N份，每个进程只处理自己的一份，不需要任何协调
+- 动态队列：--queue work.db 把待处理教师写入共享的 SQLite 文件，各工作者领取（claim）任务时
+  获得一段时间的租约，处理期间后台线程定期续约；进程崩溃或机器掉线后租约过期，
+  任务会被其他工作者重新领取。失败的任务重试 max_attempts 次后标记为 failed
+
+SQLite 文件放在网络文件系统上时不能使用 WAL，这里使用默认的回滚日志模式，
+领取任务用 BEGIN IMMEDIATE 串行化，保证同一任务不会被两个工作者同时领取。
+
+用法：
+    python main.py --shard 0/3                      # 三个进程分别用 0/3、1/3、2/3
+    python main.py --queue /shared/nuist_work.db --workers 4
+    python -m utils.work_queue status /shared/nuist_work.db
+    python -m utils.work_queue retry-failed /shared/nuist_work.db
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import argparse
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# 默认租约时长（秒）：需要覆盖一次续约间隔内最慢的单个步骤
+DEFAULT_LEASE_SECONDS = 300
+# 任务最多尝试次数（包括因租约过期被重新领取的次数）
+DEFAULT_MAX_ATTEMPTS = 3
+
+STATUSES = ("pending", "leased", "done", "failed")
+
+
+# --- 静态分片 ---
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """解析 "i/N" 形式的分片参数，返回 (i, N)，要求 0 <= i < N"""
+    try:
+        index, total = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"分片参数格式应为 i/N，例如 0/4: {text!r}")
+    if total < 1 or not 0 <= index < total:
+        raise ValueError(f"分片编号应满足 0 <= i < N: {text!r}")
+    return index, total
+
+
+def shard_of(key: str, total: int) -> int:
+    """按稳定哈希计算 key 所属的分片编号"""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % total
+
+
+def in_shard(key: str, shard: Tuple[int, int]) -> bool:
+    index, total = shard
+    return shard_of(key, total) == index
+
+
+def default_worker_id() -> str:
+    """工作者标识：主机名:进程号:线程名"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+# --- 租约队列 ---
+
+class WorkQueue:
+    """
+    基于 SQLite 文件的租约式工作队列
+
+    每个操作单独打开连接，可以在多线程中共用同一个对象。
+    任务以 key（教师URL）去重，payload 为任意可JSON序列化的字典（教师信息）。
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS tasks ("
+                         "key TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+                         "owner TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                         "error TEXT, updated_at REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_expires)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务：BEGIN IMMEDIATE 立即获取写锁，避免两个工作者读到同一个可领取的任务"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        加入任务（已存在的 key 保持原状态不变）
+
+        参数:
+            items: (key, payload) 序列
+
+        返回:
+            int: 新加入的任务数
+        """
+        now = time.time()
+        rows = [(key, json.dumps(payload, ensure_ascii=False), now) for key, payload in items]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO tasks (key, payload, updated_at) VALUES (?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    def claim(self, owner: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        领取一个任务：待处理的任务，或租约已过期的任务
+
+        返回:
+            (key, payload)，没有可领取的任务时返回 None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT key, payload FROM tasks WHERE attempts < ? AND "
+                "(status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "ORDER BY rowid LIMIT 1", (self.max_attempts, now)).fetchone()
+            if row is None:
+                # 租约过期且已用完重试次数的任务标记为失败，避免一直占着 leased 状态
+                conn.execute("UPDATE tasks SET status = 'failed', error = COALESCE(error, '租约过期'), updated_at = ? "
+                             "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                             (now, now, self.max_attempts))
+                return None
+            conn.execute("UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ?, "
+                         "attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                         (owner, now + self.lease_seconds, now, row[0]))
+        return row[0], json.loads(row[1])
+
+    def renew(self, key: str, owner: str) -> bool:
+        """续约；租约已被其他工作者接管时返回 False"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE tasks SET lease_expires = ?, updated_at = ? "
+                                  "WHERE key = ? AND owner = ? AND status = 'leased'",
+                                  (now + self.lease_seconds, now, key, owner))
+            return cursor.rowcount == 1
+
+    def complete(self, key: str, owner: str) -> bool:
+        """标记任务完成"""
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE tasks SET status = 'done', lease_expires = NULL, error = NULL, "
+                                  "updated_at = ? WHERE key = ? AND owner = ?", (time.time(), key, owner))
+            return cursor.rowcount == 1
+
+    def fail(self, key: str, owner: str, error: str = "") -> bool:
+        """处理失败：未用完重试次数的任务回到待处理状态，否则标记为 failed"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, lease_expires = NULL, error = ?, updated_at = ? WHERE key = ? AND owner = ?",
+                (self.max_attempts, error[:2000], time.time(), key, owner))
+            return cursor.rowcount == 1
+
+    def retry_failed(self) -> int:
+        """把失败的任务重置为待处理（重试次数清零）"""
+        with self._transaction() as conn:
+            return conn.execute("UPDATE tasks SET status = 'pending', attempts = 0, owner = NULL, "
+                                "updated_at = ? WHERE status = 'failed'", (time.time(),)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数（租约已过期的 leased 任务单独计为 expired）"""
+        result = {status: 0 for status in STATUSES}
+        result["expired"] = 0
+        with self._connect() as conn:
+            for status, expired, count in conn.execute(
+                    "SELECT status, status = 'leased' AND lease_expires < ?, COUNT(*) FROM tasks GROUP BY 1, 2",
+                    (time.time(),)):
+                result["expired" if expired else status] += count
+        return result
+
+    def failures(self, limit: int = 20) -> List[Tuple[str, int, str]]:
+        """失败任务 (key, 尝试次数, 错误信息)"""
+        with self._connect() as conn:
+            return conn.execute("SELECT key, attempts, error FROM tasks WHERE status = 'failed' "
+                                "ORDER BY updated_at DESC LIMIT ?", (limit,)).fetchall()
+
+    @contextmanager
+    def hold(self, key: str, owner: str) -> Iterator[threading.Event]:
+        """
+        持有租约：后台线程每隔 lease_seconds/3 续约一次
+
+        返回的 Event 在租约丢失（被其他工作者接管）时被置位，调用方可据此放弃结果
+        """
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def keep_alive() -> None:
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self.renew(key, owner):
+                        logging.warning(f"任务 {key} 的租约已被其他工作者接管")
+                        lost.set()
+                        return
+                except sqlite3.Error as e:
+                    logging.warning(f"续约任务 {key} 失败: {e}")
+
+        thread = threading.Thread(target=keep_alive, name=f"lease-{key[-16:]}", daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+            thread.join()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="查看或维护租约式工作队列")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    status_parser = subparsers.add_parser("status", help="各状态任务数和最近的失败")
+    status_parser.add_argument("db", help="队列数据库文件")
+    retry_parser = subparsers.add_parser("retry-failed", help="把失败的任务重置为待处理")
+    retry_parser.add_argument("db", help="队列数据库文件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    queue = WorkQueue(args.db)
+    if args.command == "status":
+        stats = queue.stats()
+        print("  ".join(f"{status}: {count}" for status, count in stats.items()))
+        for key, attempts, error in queue.failures():
+            print(f"  失败（{attempts} 次）: {key} - {error}")
+    else:
+        logging.info(f"已重置 {queue.retry_failed()} 个失败任务")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())